@@ -109,6 +109,29 @@ async def chat_with_ai(
        print(f"상세 오류: {error_details}")
        raise HTTPException(status_code=500, detail=f"채팅 처리 중 오류 발생: {str(e)} | 상세: {error_details[:200]}")
 
+@router.post("/chat/stream")
+async def chat_with_ai_stream(
+    message: str = Query(..., description="채팅 메시지"),
+    mode: str = Query("auto", description="채팅 모드"),
+    current_user: dict = Depends(get_current_user)
+):
+    """AI 채팅 스트리밍 (SSE) - 응답 토큰을 생성되는 대로 전달"""
+    try:
+        from llm_service.routers.chat import unified_chat_stream_endpoint
+        from llm_service.models.chat_models import ChatRequest
+
+        chat_request = ChatRequest(
+            user_id=current_user.get("uid"),
+            message=message,
+            conversation_context={},
+            user_context=get_user_context(current_user)
+        )
+        return await unified_chat_stream_endpoint(chat_request)
+
+    except Exception as e:
+        print(f"AI 채팅 스트리밍 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"채팅 처리 중 오류 발생: {str(e)}")
+
 @router.post("/chat/ai-only")
 async def chat_ai_only(
     message: str = Query(..., description="채팅 메시지"),
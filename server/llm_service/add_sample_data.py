@@ -25,7 +25,7 @@ for env_path in env_paths:
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.vector_service import VectorService
+from llm_service.services.retrieval_engine import get_vector_service
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -47,7 +47,7 @@ async def add_sample_data():
     # VectorService 초기화
     print("\n1️⃣ VectorService 초기화 중...")
     try:
-        vector_service = VectorService()
+        vector_service = get_vector_service()
         print("✅ 초기화 완료")
     except Exception as e:
         print(f"❌ 초기화 실패: {e}")
@@ -10,6 +10,7 @@ load_dotenv()
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from llm_service.prompts.utils.prompt_loader import prompt_manager, get_system_prompt
+from llm_service.config.llm_config import LLMConfig
 
 class AIScheduleCoordinator:
     def __init__(self):
@@ -17,7 +18,7 @@ class AIScheduleCoordinator:
         if not api_key:
             raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
         
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key, base_url=LLMConfig.BASE_URL)
         self.prompt_manager = prompt_manager
         print("✅ OpenAI 클라이언트 및 PromptManager 초기화 완료")
     
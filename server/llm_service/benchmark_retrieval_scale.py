@@ -0,0 +1,287 @@
+"""
+검색 규모 벤치마크 스크립트 (10k / 100k / 1M 문서)
+
+EXPERIMENT_RESULTS.md는 28개 문서 기준이라 운영 규모에서의 동작을 알 수 없습니다.
+이 스크립트는 합성 한국어 육아 코퍼스를 만들어 오프라인 임베딩으로 색인한 뒤
+규모별로 다음을 측정하고 JSON으로 저장합니다.
+
+1. 코퍼스 생성: 주제별 템플릿 기반 합성 육아 문서 (재현 가능하도록 seed 고정)
+2. 오프라인 임베딩: utils/offline_embeddings.HashingEmbeddings (API 호출/비용 없음)
+3. 색인 처리량: 배치 저장 docs/s, BM25 재구축 시간
+4. 쿼리 지연시간: Vector only / BM25 only / Hybrid 각각 p50/p95/p99
+5. 메모리: 색인 전후 RSS
+
+사용법:
+    cd server/llm_service
+    python benchmark_retrieval_scale.py                          # 10k, 100k, 1M
+    python benchmark_retrieval_scale.py --sizes 10000 --queries 100
+    python benchmark_retrieval_scale.py --output results.json
+
+결과 파일은 실행마다 benchmark_results/ 아래에 쌓이므로 실행 간 비교가 가능합니다.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llm_service.services.vector_service import VectorService
+from llm_service.utils.offline_embeddings import HashingEmbeddings
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# ========== 1. 합성 코퍼스 생성 ==========
+
+TOPICS: Dict[str, Dict[str, List[str]]] = {
+    "sleep": {
+        "subjects": ["밤잠", "낮잠", "수면 교육", "잠투정", "새벽 기상"],
+        "details": ["재우는 시간이 너무 오래 걸려요", "자다가 자주 깨서 울어요", "수면 루틴을 만들어 보세요", "잠들기 전 조명을 낮춰 주세요"],
+    },
+    "food": {
+        "subjects": ["이유식", "편식", "간식", "유아식", "분유"],
+        "details": ["채소를 잘 안 먹어요", "양을 조금씩 늘려 보세요", "알레르기 반응을 확인해야 해요", "식사 시간을 일정하게 지켜 주세요"],
+    },
+    "health": {
+        "subjects": ["예방접종", "열감기", "소아과", "중이염", "수족구"],
+        "details": ["접종 후 미열이 날 수 있어요", "해열제 복용 간격을 지켜 주세요", "증상이 계속되면 병원에 가보세요", "충분한 수분 섭취가 중요해요"],
+    },
+    "place": {
+        "subjects": ["키즈카페", "놀이터", "어린이 도서관", "수영장", "체험관"],
+        "details": ["주말에 아이랑 가기 좋아요", "유모차 진입이 편해요", "실내라 비 오는 날 좋아요", "예약하고 방문하는 게 좋아요"],
+    },
+    "schedule": {
+        "subjects": ["등원", "하원", "공동육아 모임", "품앗이 돌봄", "어린이집 상담"],
+        "details": ["시간 맞춰 함께 가실 분 찾아요", "이번 주 일정을 공유해요", "참석 여부를 알려 주세요", "순서를 정해서 돌아가며 맡아요"],
+    },
+    "community": {
+        "subjects": ["동네 육아 모임", "워킹맘 모임", "같은 아파트 품앗이", "육아 정보 공유", "아빠 육아 모임"],
+        "details": ["새로 이사 와서 함께할 분을 찾아요", "한 달에 두 번 모여요", "아이 연령대가 비슷해요", "긴급 돌봄을 서로 도와요"],
+    },
+}
+
+AGES = ["돌 지난", "두 살", "세 살", "네 살", "다섯 살", "여섯 살", "일곱 살"]
+AREAS = ["도봉구", "노원구", "강북구", "의정부", "성북구", "중랑구"]
+
+
+def generate_corpus(size: int, seed: int = 42) -> Tuple[List[str], List[Dict], List[str]]:
+    """합성 한국어 육아 코퍼스 생성
+
+    Returns:
+        (texts, metadatas, ids)
+    """
+    rng = random.Random(seed)
+    topic_names = list(TOPICS.keys())
+    texts, metadatas, ids = [], [], []
+    for i in range(size):
+        topic = topic_names[i % len(topic_names)]
+        parts = TOPICS[topic]
+        text = (
+            f"{rng.choice(AREAS)} {rng.choice(AGES)} 아이 {rng.choice(parts['subjects'])} 관련. "
+            f"{rng.choice(parts['details'])}. {rng.choice(parts['details'])}."
+        )
+        texts.append(text)
+        metadatas.append({"type": "benchmark", "topic": topic, "id": f"doc_{i}"})
+        ids.append(f"doc_{i}")
+    return texts, metadatas, ids
+
+
+def generate_queries(count: int, seed: int = 7) -> List[str]:
+    """코퍼스와 같은 주제 분포의 검색 쿼리 생성"""
+    rng = random.Random(seed)
+    topic_names = list(TOPICS.keys())
+    queries = []
+    for i in range(count):
+        parts = TOPICS[topic_names[i % len(topic_names)]]
+        queries.append(f"{rng.choice(AGES)} 아이 {rng.choice(parts['subjects'])} {rng.choice(parts['details'])}")
+    return queries
+
+
+# ========== 측정 유틸 ==========
+
+def current_rss_mb() -> float:
+    """현재 프로세스 RSS (MB). /proc를 쓸 수 없으면 최대 RSS로 대체"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """프로세스 최대 RSS (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 bytes 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 및 평균 (ms)"""
+    if not samples_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    if len(samples_ms) == 1:
+        value = samples_ms[0]
+        return {"p50": value, "p95": value, "p99": value, "mean": value}
+    cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49], 3),
+        "p95": round(cuts[94], 3),
+        "p99": round(cuts[98], 3),
+        "mean": round(statistics.fmean(samples_ms), 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+# ========== 2~4. 색인 / 쿼리 측정 ==========
+
+async def benchmark_size(
+    size: int, queries: List[str], dimension: int, batch_size: int, top_k: int
+) -> Dict:
+    """한 가지 규모에 대해 색인 처리량과 검색 지연시간 측정"""
+    persist_dir = tempfile.mkdtemp(prefix=f"bench_chroma_{size}_")
+    try:
+        rss_before = current_rss_mb()
+
+        gen_start = time.perf_counter()
+        texts, metadatas, ids = generate_corpus(size)
+        generate_seconds = time.perf_counter() - gen_start
+
+        vector_service = VectorService(
+            persist_directory=persist_dir,
+            embeddings=HashingEmbeddings(dimension=dimension),
+            collection_name="benchmark",
+        )
+
+        # 색인 처리량 (임베딩 + Chroma 저장 + BM25 재구축 1회)
+        ingest_start = time.perf_counter()
+        await vector_service.add_texts_batch(texts, metadatas, ids=ids, batch_size=batch_size)
+        ingest_seconds = time.perf_counter() - ingest_start
+
+        # BM25 재구축 단독 시간 (쓰기 후 재색인 비용)
+        bm25_start = time.perf_counter()
+        vector_service._update_bm25_index()
+        bm25_rebuild_seconds = time.perf_counter() - bm25_start
+
+        del texts, metadatas, ids
+        rss_after_ingest = current_rss_mb()
+
+        # 쿼리 지연시간 (모드별로 같은 쿼리 세트)
+        modes = {
+            "vector": lambda q: vector_service.search_similar_documents(q, top_k=top_k, use_hybrid=False),
+            "bm25": lambda q: vector_service.keyword_search(q, top_k=top_k),
+            "hybrid": lambda q: vector_service.search_similar_documents(q, top_k=top_k, use_hybrid=True),
+        }
+        latency = {}
+        for mode, search in modes.items():
+            await search(queries[0])  # 워밍업
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                await search(query)
+                samples.append((time.perf_counter() - start) * 1000)
+            latency[mode] = percentiles(samples)
+            print(f"   {mode:>6}: p50 {latency[mode]['p50']:.1f}ms / p95 {latency[mode]['p95']:.1f}ms / p99 {latency[mode]['p99']:.1f}ms")
+
+        return {
+            "documents": size,
+            "corpus_generation_seconds": round(generate_seconds, 3),
+            "ingest": {
+                "seconds": round(ingest_seconds, 3),
+                "docs_per_second": round(size / ingest_seconds, 1) if ingest_seconds else None,
+                "batch_size": batch_size,
+                "bm25_rebuild_seconds": round(bm25_rebuild_seconds, 3),
+            },
+            "query_latency_ms": latency,
+            "memory_mb": {
+                "rss_before": round(rss_before, 1),
+                "rss_after_ingest": round(rss_after_ingest, 1),
+                "rss_delta": round(rss_after_ingest - rss_before, 1),
+                "peak_rss": round(peak_rss_mb(), 1),
+            },
+            "bm25_documents": len(vector_service.bm25_documents),
+        }
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="검색 규모 벤치마크 (Vector / BM25 / Hybrid)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="측정할 문서 수 (쉼표 구분, 기본값: 10000,100000,1000000)")
+    parser.add_argument("--queries", type=int, default=200, help="규모별 측정 쿼리 수")
+    parser.add_argument("--dimension", type=int, default=256, help="오프라인 임베딩 차원")
+    parser.add_argument("--batch-size", type=int, default=1000, help="색인 배치 크기")
+    parser.add_argument("--top-k", type=int, default=5, help="검색 결과 수")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본값: benchmark_results/retrieval_scale_<시각>.json)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    queries = generate_queries(args.queries)
+
+    print("=" * 60)
+    print("📊 검색 규모 벤치마크 (오프라인 임베딩)")
+    print(f"   규모: {sizes}, 쿼리: {len(queries)}개, 차원: {args.dimension}")
+    print("=" * 60)
+
+    results = []
+    for size in sizes:
+        print(f"\n📦 {size:,}개 문서")
+        result = await benchmark_size(size, queries, args.dimension, args.batch_size, args.top_k)
+        print(f"   색인: {result['ingest']['docs_per_second']:,} docs/s, "
+              f"메모리 +{result['memory_mb']['rss_delta']}MB")
+        results.append(result)
+
+    report = {
+        "benchmark": "retrieval_scale",
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "sizes": sizes,
+            "queries": len(queries),
+            "embedding": f"HashingEmbeddings(dimension={args.dimension})",
+            "batch_size": args.batch_size,
+            "top_k": args.top_k,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / "benchmark_results" / f"retrieval_scale_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ 결과 저장: {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,274 @@
+"""
+일정 파싱 단계적 처리(cascade) 벤치마크 스크립트
+
+MessageAnalyzer는 규칙(시간 문법 + 참석 요청 + 장소 키워드)으로 먼저 분석하고
+애매한 메시지만 LLM으로 보냅니다. 이 스크립트는 메시지 묶음에 규칙 단계만 실행해
+다음을 측정하고 JSON으로 저장합니다. (API 호출/비용 없음)
+
+1. LLM 호출 감소: 매 턴 분석 호출(기준) 대비 LLM까지 가는 메시지 비율, 사유별 개수
+   (장소 키워드 변환은 QueryTransformer 캐시를 거치므로 서로 다른 질문 수만큼만 호출)
+2. 규칙 정확도: 레이블 있는 메시지에서 LLM 없이 끝난 것들의 일정 판정 / 시각 정확도
+3. 규칙 처리 시간: 메시지당 p50/p95 (µs)
+4. 절약 추정: 호출 1회 평균 지연 / 토큰 × 줄어든 호출 수
+
+사용법:
+    cd server/llm_service
+    python benchmark_schedule_cascade.py                              # 내장 레이블 코퍼스
+    python benchmark_schedule_cascade.py --corpus messages.txt        # 한 줄에 메시지 하나 (또는 JSONL)
+    python benchmark_schedule_cascade.py --from-query-log             # 질문 로그 재생
+
+결과 파일은 실행마다 benchmark_results/ 아래에 쌓이므로 실행 간 비교가 가능합니다.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llm_service.config.keyword_config import KeywordConfig
+from llm_service.services.message_analyzer import MessageAnalyzer
+from llm_service.services.query_log_service import QueryLogService
+
+# ========== 내장 레이블 코퍼스 ==========
+# (메시지, 일정 여부, 기대 시각 HH:MM 또는 None)
+# 실제 채팅 비율처럼 일반 육아 질문이 대부분이고 일정 메시지는 일부
+
+LABELED_CORPUS: List[tuple] = [
+    # 일반 / 의료 / 장소 질문 (일정 아님)
+    ("안녕하세요", False, None),
+    ("아이가 밤에 잠을 안 자요", False, None),
+    ("편식하는 아이 채소 먹이는 방법", False, None),
+    ("떼쓰는 아이 어떻게 훈육하나요", False, None),
+    ("배변 훈련은 언제 시작하나요", False, None),
+    ("아이 열이 38도인데 어떻게 해야 하나요", False, None),
+    ("해열제 몇 시간 간격으로 먹여야 하나요", False, None),
+    ("감기 걸린 아이 어린이집 보내도 되나요", False, None),
+    ("아이가 1시간 동안 울어요", False, None),
+    ("생후 100일 잔치 준비물 알려주세요", False, None),
+    ("근처 놀이터 추천해줘", False, None),
+    ("5살 아이와 가기 좋은 공원 추천해주세요", False, None),
+    ("아이랑 갈만한 키즈카페 어디 있어요", False, None),
+    ("비 오는 날 갈만한 실내 장소 추천", False, None),
+    ("소아과 어디가 좋아요", False, None),
+    ("유아 스마트폰 하루 몇 시간까지 괜찮나요", False, None),
+    ("어린이집 적응 기간 얼마나 걸리나요", False, None),
+    ("고마워요", False, None),
+    ("아이가 다시 시작하자고 떼써요", False, None),
+    ("낮잠은 몇 살까지 재워야 하나요", False, None),
+    ("밤 12시에 열이 나요", False, None),
+    ("누구 유모차 물려주실 분 계세요", False, None),
+    # 일정 (시각이 분명)
+    ("오늘 저녁 6시에 2동앞 놀이터에서 만나요 시간되는 엄빠들 나와주세요", True, "18:00"),
+    ("내일 오전10시부터 뒷공터에서 움직이는 놀이공원이 온데요 누구누구 갈거에요??", True, "10:00"),
+    ("다음주 화요일 오후 3시 반에 키즈카페 모임 참석하실 분", True, "15:30"),
+    ("토요일 오전 11시 중앙공원에서 같이 놀아요 참여 가능하신 분", True, "11:00"),
+    ("3월 5일 10:30에 도서관 모임 있어요 참석 부탁드려요", True, "10:30"),
+    ("오후 2시부터 4시까지 수영장 같이 가실분", True, "14:00"),
+    ("이번주말 캐러반체험하러 가려고 참석가능한 엄빠들 어디세요?", True, "10:00"),
+    ("모레 저녁 7시 단지 놀이터 모임 함께해요", True, "19:00"),
+    ("금요일 하원 도움 필요해요 4시에 가능하신 분", True, "16:00"),
+    ("12/24 크리스마스 파티 참석 가능한지 알려주세요", True, "10:00"),
+    # 일정 (애매 → LLM 확인 대상)
+    ("다음주에 한번 모여요", True, None),
+    ("내일 저녁에 볼까요 누구 시간 되세요", True, "18:00"),
+    ("3시에 만나요", True, "15:00"),
+    ("나중에 같이 공원 가요", True, None),
+]
+
+
+def classify_intent(message: str) -> str:
+    """UnifiedChatService.classify_intent_and_urgency와 같은 키워드 규칙"""
+    for intent, keywords in KeywordConfig.get_intent_keywords().items():
+        if any(keyword in message for keyword in keywords):
+            return intent
+    return "general"
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """텍스트(한 줄에 메시지 하나) 또는 JSONL(message/query 필드) 코퍼스"""
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                message = row.get("message") or row.get("query")
+                if message:
+                    items.append({"message": message, "is_schedule": row.get("is_schedule"),
+                                  "expected_time": row.get("expected_time")})
+            else:
+                items.append({"message": line, "is_schedule": None, "expected_time": None})
+    return items
+
+
+def load_query_log(path: Optional[str]) -> List[Dict[str, Any]]:
+    return [
+        {"message": entry["query"], "is_schedule": None, "expected_time": None}
+        for entry in QueryLogService(path=path).iter_entries()
+        if entry.get("query")
+    ]
+
+
+def run_cascade(analyzer: MessageAnalyzer, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """규칙 단계만 실행해 LLM까지 가는 메시지와 규칙 정확도 측정"""
+    reasons: Counter = Counter()
+    durations_us: List[float] = []
+    escalated_samples: List[str] = []
+    keyword_queries = set()  # 키워드 변환이 필요한 정규화된 질문 (캐시 미스 = 처음 보는 질문)
+    labeled = {"checked": 0, "schedule_correct": 0, "time_checked": 0, "time_correct": 0}
+    mistakes: Dict[str, Dict[str, Any]] = {}  # 메시지별 한 번만 기록
+
+    for item in items:
+        message = item["message"]
+        intent = classify_intent(message)
+
+        start = time.perf_counter()
+        rules = analyzer.analyze_basic(message)
+        needs_llm = analyzer.needs_llm(rules, intent)
+        durations_us.append((time.perf_counter() - start) * 1_000_000)
+
+        schedule = rules["schedule"]
+        if needs_llm:
+            if analyzer.schedule_parser.needs_llm(schedule):
+                reasons["schedule_ambiguous"] += 1
+            else:
+                reasons["place_keyword_missing"] += 1
+                keyword_queries.add(analyzer.query_transformer.normalize_query(message))
+            if len(escalated_samples) < 20 and message not in escalated_samples:
+                escalated_samples.append(message)
+            continue
+
+        reasons["rules_only"] += 1
+        if item["is_schedule"] is None:
+            continue
+
+        # LLM 없이 끝난 메시지의 규칙 판정 정확도
+        predicted = bool(schedule["has_time"] or schedule["rsvp_required"])
+        labeled["checked"] += 1
+        if predicted == item["is_schedule"]:
+            labeled["schedule_correct"] += 1
+        else:
+            mistakes.setdefault(message, {"message": message, "expected": item["is_schedule"], "predicted": predicted})
+        if item["is_schedule"] and item["expected_time"]:
+            labeled["time_checked"] += 1
+            actual = schedule["time"][11:16] if schedule["time"] else None
+            if actual == item["expected_time"]:
+                labeled["time_correct"] += 1
+            else:
+                mistakes.setdefault(message, {"message": message, "expected_time": item["expected_time"], "actual_time": actual})
+
+    durations_us.sort()
+    return {
+        "reasons": dict(reasons),
+        "keyword_transform_llm_calls": len(keyword_queries),
+        "escalated_samples": escalated_samples,
+        "labeled": labeled,
+        "mistakes": list(mistakes.values()),
+        "rule_latency_us": {
+            "p50": round(statistics.median(durations_us), 1),
+            "p95": round(durations_us[int(len(durations_us) * 0.95) - 1], 1),
+            "max": round(durations_us[-1], 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="일정 파싱 규칙 우선 cascade 벤치마크 (LLM 호출 감소)")
+    parser.add_argument("--corpus", default=None, help="메시지 코퍼스 경로 (텍스트 또는 JSONL)")
+    parser.add_argument("--from-query-log", action="store_true", help="질문 로그를 코퍼스로 사용")
+    parser.add_argument("--log", default=None, help="질문 로그 JSONL 경로 (기본값: QUERY_LOG_PATH 또는 ./data/query_log.jsonl)")
+    parser.add_argument("--repeat", type=int, default=20, help="내장 코퍼스 반복 횟수 (처리 시간 측정용)")
+    parser.add_argument("--llm-latency-ms", type=float, default=900, help="분석 LLM 호출 1회 평균 지연")
+    parser.add_argument("--tokens-per-call", type=int, default=450, help="분석 LLM 호출 1회 평균 토큰 (입력 + 출력)")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본값: benchmark_results/schedule_cascade_<시각>.json)")
+    args = parser.parse_args()
+
+    if args.corpus:
+        items, source = load_corpus(args.corpus), args.corpus
+    elif args.from_query_log:
+        log = QueryLogService(path=args.log)
+        items, source = load_query_log(str(log.path)), str(log.path)
+    else:
+        items = [
+            {"message": message, "is_schedule": is_schedule, "expected_time": expected}
+            for message, is_schedule, expected in LABELED_CORPUS
+        ] * max(args.repeat, 1)
+        source = f"builtin({len(LABELED_CORPUS)} x {args.repeat})"
+    if not items:
+        print(f"❌ 측정할 메시지가 없습니다: {source}")
+        return
+
+    analyzer = MessageAnalyzer()
+
+    print("=" * 60)
+    print("📅 일정 파싱 cascade 벤치마크 (규칙 우선, 애매한 메시지만 LLM)")
+    print(f"   입력: {source}, 메시지 {len(items)}개, 규칙 확정 기준 confidence ≥ "
+          f"{analyzer.schedule_parser.CONFIDENCE_THRESHOLD}")
+    print("=" * 60)
+
+    result = run_cascade(analyzer, items)
+    total = len(items)
+    llm_calls = result["reasons"].get("schedule_ambiguous", 0) + result["keyword_transform_llm_calls"]
+    saved = total - llm_calls
+    labeled = result["labeled"]
+
+    summary = {
+        "messages": total,
+        "llm_calls_before": total,  # 매 턴 분석 호출
+        "llm_calls_after": llm_calls,
+        "llm_call_reduction": round(saved / total, 4),
+        "estimated_latency_saved_ms_per_turn": round(saved / total * args.llm_latency_ms, 1),
+        "estimated_tokens_saved": saved * args.tokens_per_call,
+    }
+    if labeled["checked"]:
+        summary["rules_schedule_accuracy"] = round(labeled["schedule_correct"] / labeled["checked"], 4)
+    if labeled["time_checked"]:
+        summary["rules_time_accuracy"] = round(labeled["time_correct"] / labeled["time_checked"], 4)
+
+    print(f"\nLLM 호출: {total} → {llm_calls} ({summary['llm_call_reduction']:.1%} 감소)")
+    print(f"사유별: {result['reasons']}")
+    print(f"턴당 평균 절약 지연 (추정): {summary['estimated_latency_saved_ms_per_turn']}ms, "
+          f"절약 토큰 (추정): {summary['estimated_tokens_saved']:,}")
+    if "rules_schedule_accuracy" in summary:
+        print(f"규칙 일정 판정 정확도: {summary['rules_schedule_accuracy']:.1%}"
+              + (f", 시각 정확도: {summary['rules_time_accuracy']:.1%}" if "rules_time_accuracy" in summary else ""))
+    print(f"규칙 처리 시간: p50 {result['rule_latency_us']['p50']}µs, p95 {result['rule_latency_us']['p95']}µs")
+    if result["mistakes"]:
+        print(f"⚠️  규칙 판정 오류 {len(result['mistakes'])}건 (결과 파일 mistakes 참고)")
+
+    report = {
+        "benchmark": "schedule_cascade",
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "source": source,
+            "confidence_threshold": analyzer.schedule_parser.CONFIDENCE_THRESHOLD,
+            "llm_latency_ms": args.llm_latency_ms,
+            "tokens_per_call": args.tokens_per_call,
+        },
+        "summary": summary,
+        **result,
+    }
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / "benchmark_results" / f"schedule_cascade_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ 결과 저장: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+답변 캐시 재생 시뮬레이터 / 유사도 임계값 튜너
+
+search_similar_cache의 threshold=0.90은 근거 없이 정한 값입니다.
+이 스크립트는 기록된 질문 흐름(services/query_log_service.py의 JSONL)을
+CacheService에 그대로 재생하면서 임계값별로 다음을 측정합니다.
+
+1. 히트율 (L1 정확 일치 / L2 유사 일치)과 절약된 LLM 호출 수, 절약된 대기 시간 추정
+2. 오답 위험: 레이블(같은 의미의 질문 묶음)이 있으면 다른 질문의 답이 나간 비율
+3. 유사도 분포: 각 질문과 가장 가까운 이전 질문의 유사도 (같은 의미 / 다른 의미 구분)
+4. 의도별 권장 임계값: 정밀도 목표(--min-precision)를 지키면서 히트율이 가장 높은 값
+
+저장소는 메모리 Chroma, 임베딩은 기본으로 utils/offline_embeddings.HashingEmbeddings를 사용하므로
+API 호출/비용 없이 돌아갑니다. 다만 해싱 임베딩의 코사인 거리는 운영 캐시가 쓰는
+text-embedding-3-small과 척도가 달라서, 이때 나온 임계값은 임계값 간 상대 비교와
+로그 간 비교 용도일 뿐 운영 설정값으로 쓰면 안 됩니다.
+운영에 적용할 임계값은 --embeddings openai(운영과 같은 임베딩 모델, API 비용 발생)로 구합니다.
+
+로그 한 줄에 "label" 필드(같은 의미의 질문이면 같은 값)가 있으면 정확도를 계산합니다.
+레이블이 없는 로그는 히트율/분포만 보고합니다.
+
+사용법:
+    cd server/llm_service
+    python cache_replay_simulator.py                           # ./data/query_log.jsonl 재생
+    python cache_replay_simulator.py --log other_log.jsonl
+    python cache_replay_simulator.py --synthetic 2000          # 레이블 있는 합성 질문 흐름
+    python cache_replay_simulator.py --thresholds 0.8,0.85,0.9,0.95
+    python cache_replay_simulator.py --embeddings openai        # 운영 임베딩으로 권장 임계값 계산
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import chromadb
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llm_service.config.keyword_config import KeywordConfig
+from llm_service.config.llm_config import LLMConfig
+from llm_service.services.cache_service import CacheService, GLOBAL_SCOPE
+from llm_service.services.query_log_service import QueryLogService
+from llm_service.utils.offline_embeddings import HashingEmbeddings
+
+# 해싱 임베딩은 OpenAI 임베딩보다 유사도가 전반적으로 낮게 나오므로 넓은 범위를 훑음
+DEFAULT_THRESHOLDS = [0.40, 0.45, 0.50, 0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95]
+# 운영 임베딩(text-embedding-3-small)은 현재 기본값 0.90 주변을 촘촘하게 훑음
+OPENAI_THRESHOLDS = [0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.96]
+HISTOGRAM_BUCKETS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.01]
+
+# ========== 합성 질문 흐름 ==========
+
+# 같은 의미의 질문 묶음 (label → 의도, 표현들)
+# 숫자/대상만 다른 질문(예: 38도 vs 39도)은 다른 묶음으로 두어 오답 위험을 드러냄
+SYNTHETIC_CLUSTERS: Dict[str, Dict[str, Any]] = {
+    "fever_38": {"intent": "medical", "variants": [
+        "아이 열이 38도인데 어떻게 해야 하나요", "아기 열이 38도예요 어떻게 하죠", "38도 열 나는 아이 어떻게 해요"]},
+    "fever_39": {"intent": "medical", "variants": [
+        "아이 열이 39도인데 병원 가야 하나요", "아기 열이 39도 넘으면 응급실 가야 하나요"]},
+    "antipyretic_interval": {"intent": "medical", "variants": [
+        "해열제 몇 시간 간격으로 먹여야 하나요", "해열제 복용 간격이 어떻게 되나요", "해열제 다시 먹이려면 몇 시간 지나야 해요"]},
+    "cold_daycare": {"intent": "medical", "variants": [
+        "감기 걸린 아이 어린이집 보내도 되나요", "감기 기운 있는데 어린이집 등원해도 될까요"]},
+    "sleep_routine": {"intent": "general", "variants": [
+        "아이가 밤에 잠을 안 자요", "아기가 밤에 잠을 잘 안 자요 어떻게 하죠", "밤잠 재우기가 너무 힘들어요"]},
+    "nap_stop": {"intent": "general", "variants": [
+        "낮잠은 몇 살까지 재워야 하나요", "낮잠 끊는 시기가 언제예요"]},
+    "picky_eating": {"intent": "general", "variants": [
+        "아이가 채소를 안 먹어요", "편식하는 아이 채소 먹이는 방법", "채소를 너무 싫어하는 아이 어떻게 하나요"]},
+    "tantrum": {"intent": "general", "variants": [
+        "떼쓰는 아이 어떻게 훈육하나요", "아이가 떼를 너무 많이 써요", "마트에서 떼쓰는 아이 대처법"]},
+    "screen_time": {"intent": "general", "variants": [
+        "유아 스마트폰 하루 몇 시간까지 괜찮나요", "아이 영상 시청 시간 얼마나 허용해야 하나요"]},
+    "toilet_training": {"intent": "general", "variants": [
+        "배변 훈련은 언제 시작하나요", "기저귀 떼기 언제부터 하면 되나요", "배변 훈련 시작 시기가 궁금해요"]},
+    "toilet_regression": {"intent": "general", "variants": [
+        "배변 훈련 끝났는데 다시 실수해요", "기저귀 뗐는데 다시 바지에 실수해요"]},
+    "daycare_adapt": {"intent": "general", "variants": [
+        "어린이집 적응 기간 얼마나 걸리나요", "어린이집 처음 보내는데 적응 기간이 궁금해요"]},
+}
+
+
+def generate_synthetic_log(count: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """인기 질문이 자주 반복되는(Zipf 분포) 레이블 있는 합성 질문 흐름"""
+    rng = random.Random(seed)
+    labels = list(SYNTHETIC_CLUSTERS.keys())
+    rng.shuffle(labels)
+    weights = [1.0 / (rank + 1) for rank in range(len(labels))]
+    entries = []
+    for _ in range(count):
+        label = rng.choices(labels, weights=weights)[0]
+        cluster = SYNTHETIC_CLUSTERS[label]
+        query = rng.choice(cluster["variants"])
+        # 끝 문장부호/공백만 다른 중복 (L1에서 정확 일치로 처리되는 경우)
+        query += rng.choice(["", "?", "??", " "])
+        entries.append({"query": query, "intent": cluster["intent"], "scope": GLOBAL_SCOPE, "label": label})
+    return entries
+
+
+def classify_intent(query: str) -> str:
+    """UnifiedChatService.classify_intent_and_urgency와 같은 키워드 규칙"""
+    for intent, keywords in KeywordConfig.get_intent_keywords().items():
+        if any(keyword in query for keyword in keywords):
+            return intent
+    return "general"
+
+
+def load_log(path: str) -> List[Dict[str, Any]]:
+    entries = []
+    for entry in QueryLogService(path=path).iter_entries():
+        if not entry.get("query"):
+            continue
+        entry.setdefault("intent", classify_intent(entry["query"]))
+        entry["scope"] = entry.get("scope") or GLOBAL_SCOPE
+        entries.append(entry)
+    return entries
+
+
+# ========== 재생 ==========
+
+def create_embeddings(kind: str, dimension: int):
+    """재생용 임베딩 (hashing: 오프라인 / openai: 운영 캐시와 같은 모델)"""
+    if kind == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        return OpenAIEmbeddings(model=LLMConfig.EMBEDDING_MODEL, base_url=LLMConfig.BASE_URL)
+    return HashingEmbeddings(dimension=dimension)
+
+
+def new_cache(embeddings: Any, name: str) -> CacheService:
+    """재생용 CacheService (메모리 Chroma + 지정한 임베딩, 용량 제한 없음)"""
+    return CacheService(
+        l1_max_entries=1_000_000,
+        max_entries=1_000_000,
+        client=chromadb.EphemeralClient(),
+        embeddings=embeddings,
+        collection_name=name,
+    )
+
+
+def answer_for(entry: Dict[str, Any]) -> str:
+    """재생용 답변: 레이블을 답변으로 저장해 두면 히트 시 올바른 답인지 바로 판별 가능"""
+    return entry.get("label") or CacheService.normalize_query(entry["query"])
+
+
+async def replay_threshold(
+    entries: List[Dict[str, Any]], threshold: float, embeddings: Any, index: int
+) -> Dict[str, Any]:
+    """질문 흐름을 한 임계값으로 재생 (히트면 캐시 답변 사용, 미스면 답변 생성 후 저장)"""
+    cache = new_cache(embeddings, f"replay_{index}")
+    by_intent: Dict[str, Dict[str, int]] = defaultdict(
+        lambda: {"lookups": 0, "l1_hits": 0, "l2_hits": 0, "correct_hits": 0, "labeled_hits": 0}
+    )
+    for entry in entries:
+        stats = by_intent[entry["intent"]]
+        stats["lookups"] += 1
+        cached = await cache.search_similar_cache(entry["query"], threshold=threshold, scope=entry["scope"])
+        if cached:
+            stats[f"{cached['tier']}_hits"] += 1
+            if entry.get("label"):
+                stats["labeled_hits"] += 1
+                stats["correct_hits"] += int(cached["answer"] == entry["label"])
+        else:
+            await cache.save_cache(entry["query"], answer_for(entry), intent=entry["intent"], scope=entry["scope"])
+    return {intent: dict(stats) for intent, stats in by_intent.items()}
+
+
+async def similarity_distribution(
+    entries: List[Dict[str, Any]], embeddings: Any
+) -> Dict[str, Any]:
+    """각 질문과 가장 가까운 이전 질문의 유사도 분포 (같은 의미 / 다른 의미)"""
+    cache = new_cache(embeddings, "replay_distribution")
+    seen = set()
+    samples: Dict[str, List[float]] = {"same_label": [], "different_label": [], "unlabeled": []}
+    for entry in entries:
+        key = cache.get_cache_key(entry["query"], entry["scope"])
+        if key in seen:
+            continue  # 정확히 같은 질문은 L1에서 처리되므로 분포에서 제외
+        nearest = await cache.nearest(entry["query"], entry["scope"])
+        if nearest:
+            _, similarity, _, answer = nearest
+            if not entry.get("label"):
+                samples["unlabeled"].append(similarity)
+            elif answer == entry["label"]:
+                samples["same_label"].append(similarity)
+            else:
+                samples["different_label"].append(similarity)
+        await cache.save_cache(entry["query"], answer_for(entry), intent=entry["intent"], scope=entry["scope"])
+        seen.add(key)
+    return {name: histogram(values) for name, values in samples.items() if values}
+
+
+def histogram(values: List[float]) -> Dict[str, Any]:
+    counts = {}
+    lower = 0.0
+    for upper in HISTOGRAM_BUCKETS:
+        label = f"{lower:.2f}-{min(upper, 1.0):.2f}"
+        counts[label] = sum(1 for v in values if lower <= v < upper)
+        lower = upper
+    ordered = sorted(values)
+    return {
+        "count": len(values),
+        "min": round(ordered[0], 4),
+        "median": round(ordered[len(ordered) // 2], 4),
+        "max": round(ordered[-1], 4),
+        "buckets": counts,
+    }
+
+
+def summarize(stats: Dict[str, int], llm_latency_ms: float) -> Dict[str, Any]:
+    hits = stats["l1_hits"] + stats["l2_hits"]
+    lookups = stats["lookups"]
+    summary = {
+        **stats,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "llm_calls_saved": hits,
+        "latency_saved_seconds": round(hits * llm_latency_ms / 1000, 1),
+    }
+    if stats["labeled_hits"]:
+        summary["precision"] = round(stats["correct_hits"] / stats["labeled_hits"], 4)
+        summary["wrong_answers"] = stats["labeled_hits"] - stats["correct_hits"]
+    return summary
+
+
+def merge(per_intent: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    total: Dict[str, int] = defaultdict(int)
+    for stats in per_intent.values():
+        for key, value in stats.items():
+            total[key] += value
+    return dict(total)
+
+
+def recommend(results: List[Dict[str, Any]], intents: List[str], min_precision: float) -> Dict[str, Any]:
+    """의도별 권장 임계값: 정밀도 목표를 지키는 임계값 중 히트율이 가장 높은 값"""
+    recommendations = {}
+    for intent in intents:
+        rows = [(r["threshold"], r["by_intent"][intent]) for r in results if intent in r["by_intent"]]
+        labeled = [(t, s) for t, s in rows if "precision" in s]
+        if not labeled:
+            recommendations[intent] = {"threshold": None, "reason": "레이블이 없어 정확도를 계산할 수 없음"}
+            continue
+        safe = [(t, s) for t, s in labeled if s["precision"] >= min_precision]
+        if not safe:
+            recommendations[intent] = {
+                "threshold": None,
+                "reason": f"모든 임계값에서 정밀도 {min_precision} 미만 → 이 의도는 캐시 비권장",
+            }
+            continue
+        threshold, stats = max(safe, key=lambda row: (row[1]["hit_rate"], row[0]))
+        recommendations[intent] = {
+            "threshold": threshold,
+            "hit_rate": stats["hit_rate"],
+            "precision": stats["precision"],
+        }
+    return recommendations
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="답변 캐시 재생 시뮬레이터 / 임계값 튜너")
+    parser.add_argument("--log", default=None, help="질문 로그 JSONL 경로 (기본값: QUERY_LOG_PATH 또는 ./data/query_log.jsonl)")
+    parser.add_argument("--synthetic", type=int, default=0, help="로그 대신 레이블 있는 합성 질문 N개 사용")
+    parser.add_argument("--thresholds", default=None,
+                        help="비교할 임계값 (쉼표 구분, 기본값은 임베딩 종류별 범위)")
+    parser.add_argument("--embeddings", choices=["hashing", "openai"], default="hashing",
+                        help="hashing: 오프라인 상대 비교용 / openai: 운영 임베딩 모델 (권장 임계값 산출용, API 비용 발생)")
+    parser.add_argument("--dimension", type=int, default=256, help="오프라인 임베딩 차원")
+    parser.add_argument("--min-precision", type=float, default=0.98, help="권장 임계값의 최소 정밀도")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500, help="LLM 호출 1회 평균 지연 (절약 시간 추정용)")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본값: benchmark_results/cache_replay_<시각>.json)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        entries = generate_synthetic_log(args.synthetic)
+        source = f"synthetic({args.synthetic})"
+    else:
+        log_path = args.log or str(QueryLogService().path)
+        entries = load_log(log_path)
+        source = log_path
+    if not entries:
+        print(f"❌ 재생할 질문이 없습니다: {source}")
+        return
+
+    production_space = args.embeddings == "openai"
+    if args.thresholds:
+        thresholds = sorted(float(t) for t in args.thresholds.split(",") if t.strip())
+    else:
+        thresholds = OPENAI_THRESHOLDS if production_space else DEFAULT_THRESHOLDS
+    embeddings = create_embeddings(args.embeddings, args.dimension)
+    embedding_name = (
+        f"OpenAIEmbeddings({LLMConfig.EMBEDDING_MODEL})" if production_space
+        else f"HashingEmbeddings(dimension={args.dimension})"
+    )
+    intents = sorted({entry["intent"] for entry in entries})
+
+    print("=" * 60)
+    print(f"💾 답변 캐시 재생 시뮬레이션 ({embedding_name})")
+    print(f"   입력: {source}, 질문 {len(entries)}개, 의도 {intents}")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    distribution = await similarity_distribution(entries, embeddings)
+
+    results = []
+    print(f"\n{'임계값':>6} | {'히트율':>7} | {'L1':>5} | {'L2':>5} | {'절약 호출':>8} | {'정밀도':>7}")
+    print("-" * 60)
+    for index, threshold in enumerate(thresholds):
+        per_intent = await replay_threshold(entries, threshold, embeddings, index)
+        overall = summarize(merge(per_intent), args.llm_latency_ms)
+        results.append({
+            "threshold": threshold,
+            "overall": overall,
+            "by_intent": {intent: summarize(stats, args.llm_latency_ms) for intent, stats in per_intent.items()},
+        })
+        precision = f"{overall['precision']:.2%}" if "precision" in overall else "-"
+        print(f"{threshold:>6.2f} | {overall['hit_rate']:>7.2%} | {overall['l1_hits']:>5} | "
+              f"{overall['l2_hits']:>5} | {overall['llm_calls_saved']:>8} | {precision:>7}")
+
+    recommendations = recommend(results, intents, args.min_precision)
+    if production_space:
+        print("\n🎯 의도별 권장 임계값")
+    else:
+        print("\n🎯 의도별 임계값 비교 (해싱 임베딩 기준 - 운영 설정값 아님, --embeddings openai로 다시 계산)")
+    for intent, rec in recommendations.items():
+        if rec["threshold"] is None:
+            print(f"   {intent}: {rec['reason']}")
+        else:
+            print(f"   {intent}: {rec['threshold']:.2f} (히트율 {rec['hit_rate']:.2%}, 정밀도 {rec['precision']:.2%})")
+
+    report = {
+        "benchmark": "cache_replay",
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "source": source,
+            "queries": len(entries),
+            "thresholds": thresholds,
+            "embedding": embedding_name,
+            "min_precision": args.min_precision,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "similarity_distribution": distribution,
+        "results": results,
+        # 해싱 임베딩 결과는 운영 설정값이 아니므로 다른 키로 저장
+        ("recommended_thresholds" if production_space else "offline_relative_thresholds"): recommendations,
+        "applies_to_production": production_space,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / "benchmark_results" / f"cache_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ 결과 저장: {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,7 +5,7 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.vector_service import VectorService
+from llm_service.services.retrieval_engine import get_vector_service
 import asyncio
 
 async def check_chromadb():
@@ -13,7 +13,7 @@ async def check_chromadb():
     print("📊 ChromaDB 데이터 확인")
     print("=" * 60)
     
-    vector_service = VectorService()
+    vector_service = get_vector_service()
     
     # ChromaDB에서 직접 데이터 가져오기
     try:
@@ -0,0 +1,95 @@
+# 답변 캐시 설정 파일 (TTL / 용량 / 정리 주기)
+import os
+from typing import Dict
+
+
+class CacheConfig:
+    """시맨틱 답변 캐시(answer_cache) 설정 클래스"""
+
+    # 의도별 TTL (초) - 시간에 민감한 답변일수록 짧게
+    INTENT_TTL_SECONDS = {
+        "place": 60 * 60 * 24,          # 장소 정보 (영업시간/휴관 등 변동): 1일
+        "schedule": 60 * 60,            # 일정 관련: 1시간
+        "medical": 60 * 60 * 24 * 3,    # 일반 의료 안내: 3일
+        "general": 60 * 60 * 24 * 7,    # 일반 육아 상담: 7일
+    }
+    DEFAULT_TTL_SECONDS = 60 * 60 * 24
+
+    # 답변을 사용자 간에 공유(캐시/요청 병합)해도 되는 의도
+    # (장소는 위치별, 일정은 개인 정보가 답변에 섞이므로 제외.
+    #  의료는 증상/긴급도에 따라 답이 달라져야 하므로 다른 사용자의 답변을 재사용하지 않음)
+    CACHEABLE_INTENTS = {"general"}
+
+    # 최대 항목 수 (초과 시 정책에 따라 제거)
+    MAX_ENTRIES = 5000
+    EVICTION_POLICY = "lru"  # "lru": 마지막 사용 시각 / "lfu": 히트 수
+
+    # 백그라운드 정리 주기와 한 번에 지우는 개수
+    EVICTION_INTERVAL_SECONDS = 600
+    EVICTION_BATCH_SIZE = 500
+
+    # 캐시 예열: 자주 묻는 질문 상위 N개를 미리 답변해 둠 (주기 0이면 시작 시 자동 실행 안 함)
+    WARM_TOP_N = 50
+    WARM_CONCURRENCY = 4
+    WARM_MIN_COUNT = 3                      # 최소 이만큼 반복된 질문만 예열
+    WARM_LOOKBACK_DAYS = 7                  # 최근 며칠 로그만 집계
+    WARM_INTERVAL_SECONDS = 60 * 60 * 6
+    WARM_EMBEDDING_BATCH_SIZE = 100
+
+    # 장소 검색 키워드 캐시 (QueryTransformer): 정규화한 질문 → 키워드, 메모리 LRU + 디스크 JSON
+    KEYWORD_CACHE_PATH = os.getenv("QUERY_KEYWORD_CACHE_PATH", "./data/query_keyword_cache.json")
+    KEYWORD_CACHE_MAX_ENTRIES = 2000
+    KEYWORD_CACHE_TTL_SECONDS = 60 * 60 * 24 * 30       # 변환 성공: 30일
+    KEYWORD_NEGATIVE_TTL_SECONDS = 60 * 60 * 24          # 키워드 없음(빈 응답): 1일
+    KEYWORD_FAILURE_TTL_SECONDS = 60 * 5                 # 호출 실패: 5분 (장애 중 반복 호출 방지)
+    KEYWORD_CACHE_SAVE_DELAY_SECONDS = 2.0               # 디스크 저장 디바운스 (이 안의 변경은 한 번에 저장)
+
+    # 커뮤니티 이름/설명 캐시 (RealCommunityMatchingService): (지역, 유형, 자녀 나이대) → 이름 + 설명
+    COMMUNITY_PROFILE_CACHE_PATH = os.getenv(
+        "COMMUNITY_PROFILE_CACHE_PATH", "./data/community_profile_cache.json"
+    )
+    COMMUNITY_PROFILE_CACHE_MAX_ENTRIES = 500
+    COMMUNITY_PROFILE_TTL_SECONDS = 60 * 60 * 24 * 30
+    COMMUNITY_PROFILE_BATCH_SIZE = 10                   # 한 번의 LLM 호출로 만드는 최대 커뮤니티 수
+
+    # 통합 채팅(process_message) 캐시 유사도 기준
+    SIMILARITY_THRESHOLD = 0.92
+
+    # 공유(캐시) 대상은 대화를 새로 시작하는 독립된 질문만:
+    # 최근 이 시간 안에 이 사용자의 대화가 있으면 이어지는 질문일 수 있으므로 공유하지 않음
+    SHAREABLE_IDLE_SECONDS = 60 * 30
+    # 질문으로 끝나는 메시지만 독립된 질문으로 봄 (끝의 공백/문장부호 제거 후 비교)
+    QUESTION_ENDINGS = ("?", "나요", "까요", "가요", "는지", "을지", "니까", "인지")
+
+    # 이 표현이 있으면 개인 상황/이전 대화에 기대는 질문으로 보고 캐시하지 않음
+    PERSONAL_MARKERS = [
+        "우리 애", "우리 아이", "우리 딸", "우리 아들", "제 아이", "저희", "내 아이",
+        "아까", "방금", "지난번", "그럼", "그거", "그건",
+    ]
+
+    # 자녀 나이대 구간 (캐시 범위 구분용): (최대 나이, 이름)
+    AGE_BANDS = [(2, "0-2세"), (5, "3-5세"), (9, "6-9세"), (200, "10세이상")]
+
+    @classmethod
+    def get_age_band(cls, age: int) -> str:
+        for max_age, band in cls.AGE_BANDS:
+            if age <= max_age:
+                return band
+        return cls.AGE_BANDS[-1][1]
+
+    @classmethod
+    def get_ttl(cls, intent: str) -> int:
+        return cls.INTENT_TTL_SECONDS.get(intent, cls.DEFAULT_TTL_SECONDS)
+
+    @classmethod
+    def is_cacheable(cls, intent: str) -> bool:
+        return intent in cls.CACHEABLE_INTENTS
+
+    @classmethod
+    def is_standalone_question(cls, message: str) -> bool:
+        text = message.strip().rstrip(".!~ ")
+        return text.endswith(cls.QUESTION_ENDINGS)
+
+    @classmethod
+    def get_intent_ttls(cls) -> Dict[str, int]:
+        return cls.INTENT_TTL_SECONDS
@@ -0,0 +1,25 @@
+# 통합 채팅 단계 실행 설정 파일 (단계별 타임아웃)
+import os
+from typing import Dict
+
+
+class ChatPipelineConfig:
+    """UnifiedChatService.process_message 단계 그래프 설정 클래스"""
+
+    # 단계별 타임아웃 (초) - 초과하면 해당 단계 결과 없이 계속 진행
+    STAGE_TIMEOUT_SECONDS = {
+        "analysis": float(os.getenv("CHAT_STAGE_ANALYSIS_TIMEOUT", "6")),   # 의도/일정/장소 키워드 분석 (LLM)
+        "places": float(os.getenv("CHAT_STAGE_PLACES_TIMEOUT", "5")),       # 네이버 장소 검색
+        "rag": float(os.getenv("CHAT_STAGE_RAG_TIMEOUT", "5")),             # 하이브리드 검색
+        "cache": float(os.getenv("CHAT_STAGE_CACHE_TIMEOUT", "2")),         # 답변 캐시 조회
+        "memory": float(os.getenv("CHAT_STAGE_MEMORY_TIMEOUT", "3")),       # 최근 대화 + 관련 과거 대화
+    }
+    DEFAULT_STAGE_TIMEOUT_SECONDS = 5.0
+
+    @classmethod
+    def get_timeout(cls, stage: str) -> float:
+        return cls.STAGE_TIMEOUT_SECONDS.get(stage, cls.DEFAULT_STAGE_TIMEOUT_SECONDS)
+
+    @classmethod
+    def get_stage_timeouts(cls) -> Dict[str, float]:
+        return cls.STAGE_TIMEOUT_SECONDS
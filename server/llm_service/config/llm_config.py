@@ -0,0 +1,76 @@
+# LLM 호출 설정 파일 (동시 실행 제한 / 연결 풀 / 타임아웃 / 재시도·차단)
+import os
+from typing import Any, Dict
+
+
+class LLMConfig:
+    """공용 LLM 게이트웨이(services/llm_gateway.py) 설정 클래스"""
+
+    # OpenAI 호환 API 주소 (비우면 api.openai.com)
+    # 로컬 스텁 서버(openai_stub_server.py)로 부하/지연을 측정할 때: LLM_BASE_URL=http://localhost:8099/v1
+    BASE_URL = os.getenv("LLM_BASE_URL") or None
+
+    # 프로세스 전체 동시 LLM 호출 수 (OpenAI rate limit 보호)
+    MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+    # 모델별 동시 호출 수 (목록에 없으면 DEFAULT_MODEL_CONCURRENCY)
+    MODEL_CONCURRENCY = {
+        "gpt-4o-mini": 16,
+        "gpt-3.5-turbo": 8,
+        "gpt-4-vision-preview": 2,
+        "text-embedding-3-small": 16,
+    }
+    DEFAULT_MODEL_CONCURRENCY = 8
+
+    # 공유 HTTP 연결 풀
+    MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+    MAX_KEEPALIVE_CONNECTIONS = 32
+    TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+    # 임베딩 마이크로 배치 (services/embedding_batcher.py): 최대 대기 시간 또는 최대 개수에 먼저 도달하면 전송
+    EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+    EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+
+    # 지연시간 지표: 호출 종류별로 최근 N개 표본 유지
+    LATENCY_SAMPLE_SIZE = 500
+
+    # 호출 안정화 (services/resilience.py): 재시도 / 서킷 브레이커 / 헤지 요청
+    # 호출 위치(caller)별로 RESILIENCE_POLICIES의 값이 기본값을 덮어씀
+    RESILIENCE_DEFAULT = {
+        "max_retries": 2,               # 429 / 5xx / 연결 오류 재시도 횟수
+        "backoff_base_ms": 500,         # 지수 백오프 시작값 (full jitter)
+        "backoff_max_ms": 8000,
+        "breaker_window": 20,           # 최근 N번 시도로 오류율 계산
+        "breaker_min_calls": 10,        # 이보다 적게 호출됐으면 열지 않음
+        "breaker_error_rate": 0.5,      # 오류율이 이 이상이면 차단 (빠른 실패)
+        "breaker_reset_seconds": 30,    # 차단 후 이만큼 지나면 시험 호출 1번 허용
+        "hedge": False,                 # p95를 넘기면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+        "hedge_min_samples": 20,        # p95 계산에 필요한 최소 표본 수
+    }
+    RESILIENCE_POLICIES = {
+        # 사용자가 기다리는 답변 생성: 재시도는 한 번만 (오래 기다리게 하지 않음)
+        "openai_service.chat": {"max_retries": 1},
+        "openai_service.chat_stream": {"max_retries": 1},
+        # 응급 판단은 실패하면 안 되므로 더 재시도
+        "openai_service.emergency": {"max_retries": 3},
+        "openai_service.image_emergency": {"max_retries": 3},
+        # 짧은 분석 호출: 규칙 기반 폴백이 있으므로 재시도 대신 헤지
+        "message_analyzer": {"max_retries": 1, "hedge": True},
+        "query_transformer": {"max_retries": 1, "hedge": True},
+        "schedule_parser": {"max_retries": 1, "hedge": True},
+        # 배치 임베딩은 여러 요청이 함께 기다리므로 충분히 재시도
+        "embedding_batcher": {"max_retries": 3},
+    }
+
+    @classmethod
+    def get_resilience_policy(cls, caller: str) -> Dict[str, Any]:
+        return {**cls.RESILIENCE_DEFAULT, **cls.RESILIENCE_POLICIES.get(caller, {})}
+
+    @classmethod
+    def get_model_concurrency(cls, model: str) -> int:
+        return cls.MODEL_CONCURRENCY.get(model, cls.DEFAULT_MODEL_CONCURRENCY)
+
+    @classmethod
+    def get_model_limits(cls) -> Dict[str, int]:
+        return cls.MODEL_CONCURRENCY
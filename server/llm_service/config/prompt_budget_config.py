@@ -0,0 +1,40 @@
+# 프롬프트 토큰 예산 설정 파일 (섹션별 예산 / 줄이는 순서)
+import os
+from typing import Dict, List
+
+
+class PromptBudgetConfig:
+    """PromptAssembler 토큰 예산 설정 클래스"""
+
+    # 한 요청에서 답변 생성 모델에 보내는 입력 토큰 상한 (사용자 메시지 포함)
+    TOTAL_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+
+    # 섹션별 상한 - 각 섹션은 먼저 자기 예산 안으로 줄임
+    # (의도별 정적 시스템 프롬프트는 프롬프트 캐시를 위해 줄이지 않고 전체 예산에서만 차감)
+    SECTION_BUDGETS = {
+        "rag": 600,         # 하이브리드 검색 참고 문서
+        "places": 600,      # 네이버 장소 검색 결과
+        "memory": 300,      # 관련 과거 대화
+        "history": 500,     # 최근 대화 메시지
+    }
+
+    # 합계가 전체 예산을 넘으면 우선순위가 낮은 섹션부터 줄임
+    TRIM_ORDER = ["history", "memory", "rag", "places"]
+
+    # 남은 예산이 이보다 작으면 항목을 잘라 붙이지 않고 뺌
+    MIN_ITEM_TOKENS = 40
+
+    # tiktoken 인코딩을 고를 모델 (tiktoken이 없으면 오프라인 근사치 사용)
+    TOKENIZER_MODEL = "gpt-4o-mini"
+
+    @classmethod
+    def get_section_budget(cls, section: str) -> int:
+        return cls.SECTION_BUDGETS.get(section, cls.TOTAL_BUDGET)
+
+    @classmethod
+    def get_trim_order(cls) -> List[str]:
+        return cls.TRIM_ORDER
+
+    @classmethod
+    def get_section_budgets(cls) -> Dict[str, int]:
+        return cls.SECTION_BUDGETS
@@ -15,6 +15,9 @@ db = firestore.client()
 async def get_all_schedules_from_firestore() -> List[Dict]:
     """
     Firestore의 모든 사용자로부터 모든 자녀의 모든 일정을 가져옵니다.
+
+    사용자/자녀/일정을 중첩 순회하므로 DB 전체를 N+1번 왕복합니다.
+    벡터 인덱스 동기화에는 services/schedule_sync_service.py의 증분 동기화를 사용하세요.
     """
     all_schedules = []
     users_ref = db.collection("users")
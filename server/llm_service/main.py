@@ -6,6 +6,10 @@ from dotenv import load_dotenv
 import logging
 
 from .routers import chat, schedule, location_community, group_purchase
+from .services.retrieval_engine import retrieval_engine
+from .services.llm_gateway import llm_gateway
+from .services.cache_service import cache_service
+from .services.embedding_batcher import EmbeddingBatcher, bind_event_loop
 
 # 환경 변수 로드
 load_dotenv()
@@ -46,6 +50,40 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "함께키즈 위치기반 커뮤니티"}
+
+
+@app.get("/health/retrieval")
+async def retrieval_health():
+    """공용 검색 엔진 인스턴스/메모리 리포트 (중복 VectorService 감지)"""
+    return retrieval_engine.report()
+
+
+@app.get("/health/llm")
+async def llm_health():
+    """공용 LLM 게이트웨이 동시 호출 수 / 호출 위치별 지연시간 지표"""
+    return llm_gateway.get_metrics()
+
+
+@app.get("/health/embeddings")
+async def embedding_health():
+    """모델별 임베딩 마이크로 배치 지표 (요청 수 / API 호출 수 / 호출당 요청 수)"""
+    return {"batchers": EmbeddingBatcher.all_stats()}
+
+
+@app.on_event("startup")
+async def startup_event():
+    bind_event_loop()  # executor 스레드의 검색 질의 임베딩을 이 루프의 배치로 모음
+    retrieval_engine.startup()
+    cache_service.start_evictor()
+    chat.cache_warmer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await chat.cache_warmer.stop()
+    await cache_service.stop_evictor()
+    retrieval_engine.shutdown()
+    await llm_gateway.close()
     
 # 전역 예외 처리
 @app.exception_handler(Exception)
@@ -26,7 +26,9 @@ import time
 import json
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Set, Tuple
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from dotenv import load_dotenv
 
 # .env 파일 로드
@@ -43,13 +45,20 @@ for env_path in env_paths:
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.vector_service import VectorService
+from llm_service.services.vector_service import VectorService
+from llm_service.services.retrieval_engine import get_vector_service
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+def get_doc_id(result: Dict) -> str:
+    """문서 ID 추출 (metadata에서 가져오거나 텍스트 해시 사용 - 일관된 해시)"""
+    text = result['text']
+    return (result.get('metadata') or {}).get('id', f"doc_{int(hashlib.md5(text.encode()).hexdigest(), 16) % 1000000}")
+
+
 class SearchAccuracyMeasurer:
     """검색 정확도 측정 클래스"""
     
@@ -252,11 +261,6 @@ class SearchAccuracyMeasurer:
         
         # Ground Truth가 있으면 Precision/Recall 계산
         if ground_truth:
-            # 문서 ID 추출 (metadata에서 가져오거나 텍스트 해시 사용 - 일관된 해시)
-            def get_doc_id(result):
-                text = result['text']
-                return result.get('metadata', {}).get('id', f"doc_{int(hashlib.md5(text.encode()).hexdigest(), 16) % 1000000}")
-            
             vector_ids = [get_doc_id(r) for r in vector_results]
             hybrid_ids = [get_doc_id(r) for r in hybrid_results]
             
@@ -396,6 +400,270 @@ class SearchAccuracyMeasurer:
         return stats
 
 
+# 한 번에 비교할 검색 설정 (이름 → VectorService 검색 파라미터)
+DEFAULT_RETRIEVER_CONFIGS: Dict[str, Dict] = {
+    "vector": {"mode": "vector"},
+    "bm25": {"mode": "bm25"},
+    "hybrid": {"mode": "hybrid", "vector_k": 10, "bm25_k": 10, "rrf_k": 60},
+    "hybrid_wide": {"mode": "hybrid", "vector_k": 20, "bm25_k": 20, "rrf_k": 60},
+}
+
+
+class RetrievalEvaluationHarness:
+    """병렬 + 디스크 캐시 기반 오프라인 검색 평가 하네스
+    
+    - 쿼리 임베딩은 배치 1회 호출로 미리 계산해서 모든 검색 설정이 재사용
+    - (쿼리, 검색 설정, 인덱스 버전)별 결과 문서 ID를 디스크에 캐시
+      → 인덱스가 바뀌지 않았다면 재실행 시 검색 자체를 건너뜀
+    - 여러 검색 설정의 Precision@K / Recall@K / MRR을 한 번에 계산
+    - 지연시간은 품질 평가와 분리해서 캐시 없이 순차로 측정 (임베딩 시간과 검색 시간 분리)
+    """
+    
+    def __init__(
+        self,
+        vector_service: VectorService,
+        configs: Optional[Dict[str, Dict]] = None,
+        cache_dir: Optional[Path] = None,
+        max_workers: int = 8,
+    ):
+        self.vector_service = vector_service
+        self.configs = configs or DEFAULT_RETRIEVER_CONFIGS
+        self.cache_dir = cache_dir or Path(__file__).parent / ".eval_cache"
+        self.max_workers = max_workers
+        self.metrics = SearchAccuracyMeasurer(vector_service)
+    
+    # ---------- 디스크 캐시 ----------
+    
+    def _cache_path(self) -> Path:
+        return self.cache_dir / f"retrieval_{self.vector_service.index_version}.json"
+    
+    def _load_cache(self) -> Dict[str, List[str]]:
+        path = self._cache_path()
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"평가 캐시 로드 실패 (무시): {e}")
+            return {}
+    
+    def _save_cache(self, cache: Dict[str, List[str]]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._cache_path(), 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+    
+    @staticmethod
+    def _cache_key(query: str, config_name: str, config: Dict, top_k: int) -> str:
+        raw = json.dumps([query, config_name, config, top_k], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()
+    
+    # ---------- 검색 실행 ----------
+    
+    def _embed_queries(self, queries: List[str]) -> Dict[str, List[float]]:
+        """쿼리 임베딩을 배치 1회 호출로 계산"""
+        if not queries:
+            return {}
+        embeddings = self.vector_service.embeddings.embed_documents(queries)
+        return dict(zip(queries, embeddings))
+    
+    def _build_retriever(self, config: Dict) -> Callable[[str, int, Optional[List[float]]], List[Dict]]:
+        """검색 설정을 (query, top_k, query_embedding) → 결과 리스트 함수로 변환"""
+        vs = self.vector_service
+        mode = config["mode"]
+        if mode == "vector":
+            return lambda q, k, emb: [
+                {"text": t, "metadata": m} for t, m, _ in vs._vector_search(q, k, emb)
+            ]
+        if mode == "bm25":
+            return lambda q, k, emb: [
+                {"text": t, "metadata": m} for t, m, _ in vs._bm25_search(q, k)
+            ]
+        if mode == "hybrid":
+            return lambda q, k, emb: vs._hybrid_search(
+                q, k,
+                vector_k=config.get("vector_k", 10),
+                bm25_k=config.get("bm25_k", 10),
+                rrf_k=config.get("rrf_k", 60),
+                query_embedding=emb,
+            )
+        raise ValueError(f"지원하지 않는 검색 모드: {mode}")
+    
+    async def _run_retrievals(
+        self, queries: List[str], top_k: int
+    ) -> Dict[str, Dict[str, Optional[List[str]]]]:
+        """캐시에 없는 (쿼리, 설정) 조합만 스레드 풀에서 병렬 실행
+        
+        Returns:
+            {config_name: {query: [doc_id, ...] | None}} - 검색에 실패한 조합은 None (캐시하지 않음)
+        """
+        cache = self._load_cache()
+        pending: List[Tuple[str, str, str]] = []  # (cache_key, config_name, query)
+        for config_name, config in self.configs.items():
+            for query in queries:
+                key = self._cache_key(query, config_name, config, top_k)
+                if key not in cache:
+                    pending.append((key, config_name, query))
+        
+        cached_count = len(queries) * len(self.configs) - len(pending)
+        print(f"   캐시 적중: {cached_count}개, 새로 검색: {len(pending)}개 (인덱스 버전 {self.vector_service.index_version})")
+        
+        if pending:
+            needs_embedding = sorted({
+                query for _, name, query in pending if self.configs[name]["mode"] != "bm25"
+            })
+            query_embeddings = self._embed_queries(needs_embedding)
+            retrievers = {name: self._build_retriever(cfg) for name, cfg in self.configs.items()}
+            
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    loop.run_in_executor(
+                        executor,
+                        retrievers[name],
+                        query,
+                        top_k,
+                        query_embeddings.get(query),
+                    )
+                    for _, name, query in pending
+                ]
+                results = await asyncio.gather(*futures, return_exceptions=True)
+            
+            for (key, name, query), result in zip(pending, results):
+                if isinstance(result, Exception):
+                    logger.error(f"[{name}] '{query}' 검색 실패: {result}")
+                    continue
+                cache[key] = [get_doc_id(r) for r in result]
+            self._save_cache(cache)
+        
+        retrieved: Dict[str, Dict[str, Optional[List[str]]]] = {}
+        for config_name, config in self.configs.items():
+            retrieved[config_name] = {
+                query: cache.get(self._cache_key(query, config_name, config, top_k))
+                for query in queries
+            }
+        return retrieved
+    
+    # ---------- 품질 / 지연시간 ----------
+    
+    async def evaluate_quality(
+        self,
+        test_queries: List[Tuple[str, Set[str]]],
+        top_k: int = 5,
+        k_values: Tuple[int, ...] = (1, 3, 5),
+    ) -> Dict[str, Dict[str, float]]:
+        """모든 검색 설정의 Precision@K / Recall@K / MRR을 한 번에 계산
+        
+        검색에 실패한 쿼리는 빈 결과(0점)로 세지 않고 failed_queries로 따로 집계해 지표에서 제외합니다.
+        """
+        queries = [query for query, _ in test_queries]
+        retrieved = await self._run_retrievals(queries, top_k)
+        
+        report: Dict[str, Dict[str, float]] = {}
+        for config_name, per_query in retrieved.items():
+            sums: Dict[str, float] = {}
+            evaluated = 0
+            failed = 0
+            for query, relevant in test_queries:
+                if not relevant:
+                    continue
+                doc_ids = per_query.get(query)
+                if doc_ids is None:
+                    failed += 1
+                    continue
+                evaluated += 1
+                for k in k_values:
+                    if k > top_k:
+                        continue
+                    sums[f'precision@{k}'] = sums.get(f'precision@{k}', 0.0) + self.metrics.calculate_precision_at_k(doc_ids, relevant, k)
+                    sums[f'recall@{k}'] = sums.get(f'recall@{k}', 0.0) + self.metrics.calculate_recall_at_k(doc_ids, relevant, k)
+                sums['mrr'] = sums.get('mrr', 0.0) + self.metrics.calculate_mrr(doc_ids, relevant)
+            report[config_name] = {
+                metric: value / evaluated for metric, value in sums.items()
+            } if evaluated else {}
+            report[config_name]['evaluated_queries'] = evaluated
+            report[config_name]['failed_queries'] = failed
+        return report
+    
+    def measure_latency(
+        self, queries: List[str], top_k: int = 5, repeats: int = 1
+    ) -> Dict[str, Dict[str, float]]:
+        """검색 설정별 지연시간 (캐시 미사용, 순차 실행)
+        
+        임베딩 API 시간(네트워크)과 로컬 검색 시간을 분리해서 보고합니다.
+        """
+        if not queries:
+            return {}
+        embed_samples = []
+        query_embeddings = {}
+        for query in queries:
+            start = time.perf_counter()
+            query_embeddings[query] = self.vector_service.embeddings.embed_query(query)
+            embed_samples.append((time.perf_counter() - start) * 1000)
+        
+        report = {"embedding": self._summarize_ms(embed_samples)}
+        for config_name, config in self.configs.items():
+            retriever = self._build_retriever(config)
+            retriever(queries[0], top_k, query_embeddings[queries[0]])  # 워밍업
+            samples = []
+            for _ in range(repeats):
+                for query in queries:
+                    start = time.perf_counter()
+                    retriever(query, top_k, query_embeddings[query])
+                    samples.append((time.perf_counter() - start) * 1000)
+            report[config_name] = self._summarize_ms(samples)
+        return report
+    
+    @staticmethod
+    def _summarize_ms(samples: List[float]) -> Dict[str, float]:
+        if len(samples) < 2:
+            value = samples[0] if samples else 0.0
+            return {"p50_ms": value, "p95_ms": value, "mean_ms": value}
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        return {
+            "p50_ms": round(cuts[49], 3),
+            "p95_ms": round(cuts[94], 3),
+            "mean_ms": round(statistics.fmean(samples), 3),
+        }
+    
+    async def run(
+        self, test_queries: List[Tuple[str, Set[str]]], top_k: int = 5, measure_latency: bool = True
+    ) -> Dict:
+        """품질 평가 + (선택) 지연시간 측정"""
+        start = time.perf_counter()
+        quality = await self.evaluate_quality(test_queries, top_k)
+        quality_seconds = time.perf_counter() - start
+        
+        result = {
+            "index_version": self.vector_service.index_version,
+            "total_queries": len(test_queries),
+            "top_k": top_k,
+            "quality": quality,
+            "quality_eval_seconds": round(quality_seconds, 3),
+        }
+        if measure_latency:
+            result["latency"] = self.measure_latency([q for q, _ in test_queries], top_k)
+        return result
+
+
+def print_harness_report(report: Dict):
+    """하네스 결과 출력 (설정별 품질 표 + 지연시간 표)"""
+    print(f"\n🎯 검색 품질 (인덱스 {report['index_version']}, {report['total_queries']}개 쿼리, "
+          f"평가 {report['quality_eval_seconds']:.2f}초)")
+    count_fields = ('evaluated_queries', 'failed_queries')
+    metric_names = sorted({m for q in report['quality'].values() for m in q if m not in count_fields})
+    print(f"   {'설정':<14}" + "".join(f"{m:>14}" for m in metric_names))
+    for config_name, metrics in report['quality'].items():
+        print(f"   {config_name:<14}" + "".join(f"{metrics.get(m, 0.0):>14.3f}" for m in metric_names))
+        if metrics.get('failed_queries'):
+            print(f"   {'':<14}⚠️  검색 실패 {metrics['failed_queries']}개 쿼리 제외")
+    
+    if 'latency' in report:
+        print(f"\n⏱️  지연시간 (캐시 없이 순차 측정, ms)")
+        for name, stats in report['latency'].items():
+            print(f"   {name:<14} p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  mean {stats['mean_ms']:>8.2f}")
+
+
 async def main():
     """메인 함수"""
     print("=" * 60)
@@ -406,7 +674,7 @@ async def main():
     # VectorService 초기화
     print("\n1️⃣ VectorService 초기화 중...")
     try:
-        vector_service = VectorService()
+        vector_service = get_vector_service()
         print("✅ 초기화 완료")
     except Exception as e:
         print(f"❌ 초기화 실패: {e}")
@@ -417,7 +685,7 @@ async def main():
     # 측정 모드 선택
     print("\n2️⃣ 측정 모드 선택:")
     print("1. 자동 측정 (순위 개선도 + 결과 다양성)")
-    print("2. Ground Truth 기반 측정 (Precision/Recall/MRR)")
+    print("2. Ground Truth 기반 측정 (여러 검색 설정 Precision/Recall/MRR 병렬 + 캐시)")
     print("3. 사용자 정의 테스트 쿼리")
     
     mode = input("\n선택 (1, 2, 또는 3, 기본값: 1): ").strip() or "1"
@@ -464,8 +732,20 @@ async def main():
                 for query, doc_ids in ground_truth_data.items()
             ]
             
-            print(f"\n📝 {len(test_queries)}개 쿼리로 Precision/Recall/MRR 측정 시작...")
-            stats = await measurer.measure_batch(test_queries, top_k=5)
+            print(f"\n📝 {len(test_queries)}개 쿼리 × {len(DEFAULT_RETRIEVER_CONFIGS)}개 검색 설정 병렬 평가 시작...")
+            harness = RetrievalEvaluationHarness(vector_service)
+            report = await harness.run(test_queries, top_k=5)
+            print_harness_report(report)
+            
+            save = input("\n결과를 파일로 저장하시겠습니까? (y/n, 기본값: n): ").strip().lower()
+            if save == 'y':
+                from datetime import datetime
+                
+                filename = f"retrieval_eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
+                print(f"✅ 결과 저장: {filename}")
+            return
             
         except json.JSONDecodeError as e:
             print(f"❌ Ground Truth 파일 파싱 실패: {e}")
@@ -0,0 +1,342 @@
+"""
+OpenAI 호환 로컬 스텁 서버 (부하/지연 테스트용)
+
+실제 API 키와 비용 없이 LLM 서비스 전체 파이프라인을 오프라인으로 측정하기 위한 서버입니다.
+벤치마크 수치가 네트워크 편차에 좌우되지 않도록 지연 시간 분포와 오류율을 직접 정합니다.
+
+지원 엔드포인트 (OpenAI API 형식):
+- POST /v1/chat/completions: 일반 / 스트리밍(stream=True, include_usage) / json_object 모드
+- POST /v1/embeddings: 입력 텍스트별로 항상 같은 해싱 임베딩 (문자열 / 토큰 배열 입력)
+- POST /v1/completions: langchain OpenAI(RAGService)용 단순 완성
+- GET  /v1/models
+- GET  /stub/stats: 엔드포인트별 요청 수 / 주입한 오류 수
+
+응답 내용:
+- 기본값: 마지막 사용자 메시지를 담은 템플릿 답변 (--template)
+- json_object 모드: 프롬프트의 "- 필드명:" 목록을 읽어 모든 필드가 null인 JSON
+  (각 서비스는 규칙 기반 폴백으로 이어짐)
+- --responses 파일: [{"match": "정규식", "content": "템플릿"}] 중 처음 일치하는 규칙 사용
+  템플릿에는 {message}, {model} 자리표시자를 쓸 수 있습니다.
+
+프롬프트 캐시 흉내: 이전에 본 첫 메시지(정적 시스템 프롬프트)와 같으면
+usage.prompt_tokens_details.cached_tokens에 그 토큰 수(1024 이상, 128 단위)를 채웁니다.
+
+사용법:
+    cd server/llm_service
+    python openai_stub_server.py --port 8099 --latency-ms 600 --latency-dist lognormal --error-rate 0.02
+
+    # 다른 터미널에서 서비스가 스텁을 보도록 지정
+    export LLM_BASE_URL=http://localhost:8099/v1
+    export OPENAI_API_KEY=stub
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llm_service.utils.offline_embeddings import HashingEmbeddings
+
+DEFAULT_TEMPLATE = "[스텁 응답] '{message}'에 대한 답변입니다. 아이와 함께 가까운 공원이나 도서관을 방문해 보세요."
+
+# json_object 모드에서 필드 목록을 찾는 패턴 ("- intent: ..." / "- time: ...")
+JSON_FIELD_RE = re.compile(r"^\s*-\s*([A-Za-z_][A-Za-z0-9_]*)\s*:", re.MULTILINE)
+
+ERROR_TYPES = {
+    429: ("rate_limit_exceeded", "Rate limit reached (stub)"),
+    500: ("server_error", "The server had an error (stub)"),
+    502: ("server_error", "Bad gateway (stub)"),
+    503: ("server_error", "The engine is currently overloaded (stub)"),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """conversation_memory_service.estimate_tokens와 같은 근사치 (2자당 1토큰)"""
+    return len(text) // 2 + 1 if text else 0
+
+
+def fill_template(template: str, values: Dict[str, str]) -> str:
+    """{message} / {model} 자리표시자 치환 (JSON 템플릿의 중괄호는 그대로 둠)"""
+    for key, value in values.items():
+        template = template.replace("{" + key + "}", value)
+    return template
+
+
+class StubBehavior:
+    """지연 시간 분포 / 오류 주입 / 응답 내용 설정"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.latency_ms = args.latency_ms
+        self.latency_dist = args.latency_dist
+        self.jitter = args.jitter
+        self.token_delay_ms = args.token_delay_ms
+        self.embedding_latency_ms = args.embedding_latency_ms
+        self.error_rate = args.error_rate
+        self.error_codes = [int(code) for code in args.error_codes.split(",") if code]
+        self.template = args.template
+        self.rules = self._load_rules(args.responses)
+        self.embedder = HashingEmbeddings(dimension=args.embedding_dim)
+        self.random = random.Random(args.seed)
+        self.seen_prefixes = set()
+        self.stats = Counter()
+
+    @staticmethod
+    def _load_rules(path: Optional[str]) -> List[Dict[str, Any]]:
+        if not path:
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+        return [{"match": re.compile(rule["match"]), "content": rule["content"]} for rule in rules]
+
+    def sample_latency(self, base_ms: float) -> float:
+        """설정한 분포에서 지연 시간(초) 추출 - base_ms는 중앙값"""
+        if base_ms <= 0:
+            return 0.0
+        if self.latency_dist == "uniform":
+            ms = self.random.uniform(base_ms * (1 - self.jitter), base_ms * (1 + self.jitter))
+        elif self.latency_dist == "normal":
+            ms = self.random.gauss(base_ms, base_ms * self.jitter)
+        elif self.latency_dist == "lognormal":
+            # 중앙값 base_ms, 오른쪽 꼬리가 긴 실제 API와 비슷한 분포
+            ms = base_ms * self.random.lognormvariate(0, self.jitter)
+        else:  # fixed
+            ms = base_ms
+        return max(ms, 0.0) / 1000
+
+    def maybe_error(self) -> Optional[JSONResponse]:
+        """오류율에 따라 OpenAI 형식 오류 응답"""
+        if not self.error_codes or self.random.random() >= self.error_rate:
+            return None
+        status = self.random.choice(self.error_codes)
+        error_type, message = ERROR_TYPES.get(status, ("server_error", f"HTTP {status} (stub)"))
+        self.stats[f"error_{status}"] += 1
+        headers = {"retry-after": "1"} if status == 429 else None
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": message, "type": error_type, "code": error_type}},
+            headers=headers,
+        )
+
+    def render_content(self, body: Dict[str, Any]) -> str:
+        """요청에 맞는 답변 내용 (규칙 → json_object → 템플릿)"""
+        messages = body.get("messages") or []
+        message = next(
+            (m.get("content") for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+        if not isinstance(message, str):  # 이미지 입력 등 (content 배열)
+            message = " ".join(part.get("text", "") for part in message if isinstance(part, dict))
+        values = {"message": message[:200], "model": body.get("model", "")}
+
+        for rule in self.rules:
+            if rule["match"].search(message):
+                return fill_template(rule["content"], values)
+
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            prompt = "\n".join(str(m.get("content", "")) for m in messages)
+            fields = list(dict.fromkeys(JSON_FIELD_RE.findall(prompt)))
+            return json.dumps({field: None for field in fields}, ensure_ascii=False)
+
+        return fill_template(self.template, values)
+
+    def usage(self, messages: List[Dict[str, Any]], completion: str) -> Dict[str, Any]:
+        """토큰 사용량 (정적 첫 메시지 반복 시 cached_tokens 흉내)"""
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) + 4 for m in messages)
+        cached_tokens = 0
+        if messages:
+            first = str(messages[0].get("content", ""))
+            prefix = hashlib.sha256(first.encode("utf-8")).hexdigest()
+            first_tokens = estimate_tokens(first)
+            if prefix in self.seen_prefixes and first_tokens >= 1024:
+                cached_tokens = first_tokens // 128 * 128
+            self.seen_prefixes.add(prefix)
+        completion_tokens = estimate_tokens(completion)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+
+def create_app(behavior: StubBehavior) -> FastAPI:
+    app = FastAPI(title="OpenAI 호환 스텁 서버")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        behavior.stats["chat"] += 1
+        await asyncio.sleep(behavior.sample_latency(behavior.latency_ms))
+        error = behavior.maybe_error()
+        if error is not None:
+            return error
+
+        model = body.get("model", "stub")
+        content = behavior.render_content(body)
+        usage = behavior.usage(body.get("messages") or [], content)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        behavior.stats["chat_stream"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        async def event_stream():
+            yield chunk({"role": "assistant", "content": ""})
+            # 약 2자 = 1토큰 기준으로 4자씩 보냄
+            for start in range(0, len(content), 4):
+                await asyncio.sleep(behavior.sample_latency(behavior.token_delay_ms))
+                yield chunk({"content": content[start:start + 4]})
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                data = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(data)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    @app.post("/v1/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        behavior.stats["completions"] += 1
+        await asyncio.sleep(behavior.sample_latency(behavior.latency_ms))
+        error = behavior.maybe_error()
+        if error is not None:
+            return error
+
+        prompts = body.get("prompt") or [""]
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        choices = []
+        for index, prompt in enumerate(prompts):
+            text = behavior.render_content({"messages": [{"role": "user", "content": str(prompt)[-200:]}]})
+            choices.append({"index": index, "text": text, "finish_reason": "stop", "logprobs": None})
+        return {
+            "id": f"cmpl-{uuid.uuid4().hex[:24]}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": choices,
+            "usage": behavior.usage([{"content": str(p)} for p in prompts], ""),
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        behavior.stats["embeddings"] += 1
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        behavior.stats["embedding_inputs"] += len(inputs)
+        await asyncio.sleep(behavior.sample_latency(behavior.embedding_latency_ms))
+        error = behavior.maybe_error()
+        if error is not None:
+            return error
+
+        # langchain OpenAIEmbeddings는 토큰 배열을 보냄 → 문자열로 바꿔 같은 입력이면 같은 벡터
+        texts = [item if isinstance(item, str) else " ".join(map(str, item)) for item in inputs]
+        vectors = behavior.embedder.embed_documents(texts)
+        prompt_tokens = sum(estimate_tokens(text) for text in texts)
+        return {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": index, "embedding": vector}
+                for index, vector in enumerate(vectors)
+            ],
+            "model": body.get("model", "stub"),
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        }
+
+    @app.get("/v1/models")
+    async def models():
+        return {
+            "object": "list",
+            "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "stub"}
+                for model in ("gpt-4o-mini", "gpt-3.5-turbo", "text-embedding-3-small", "text-embedding-ada-002")
+            ],
+        }
+
+    @app.get("/stub/stats")
+    async def stats():
+        return dict(behavior.stats)
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenAI 호환 로컬 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=800, help="채팅 응답 지연 중앙값 (첫 토큰까지)")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "normal", "lognormal"], default="lognormal",
+                        help="지연 시간 분포")
+    parser.add_argument("--jitter", type=float, default=0.4,
+                        help="분포 폭 (uniform: ±비율, normal: 표준편차 비율, lognormal: sigma)")
+    parser.add_argument("--token-delay-ms", type=float, default=15, help="스트리밍 조각 사이 지연")
+    parser.add_argument("--embedding-latency-ms", type=float, default=120, help="임베딩 응답 지연 중앙값")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="오류 응답 비율 (0~1)")
+    parser.add_argument("--error-codes", default="429,500,503", help="주입할 오류 상태 코드 (쉼표 구분)")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE, help="기본 답변 템플릿 ({message}, {model})")
+    parser.add_argument("--responses", default=None, help='규칙 파일: [{"match": "정규식", "content": "템플릿"}]')
+    parser.add_argument("--embedding-dim", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--seed", type=int, default=None, help="지연/오류 난수 시드")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    app = create_app(StubBehavior(args))
+    print(f"🧪 OpenAI 스텁 서버: http://{args.host}:{args.port}/v1 "
+          f"(지연 {args.latency_ms}ms {args.latency_dist}, 오류율 {args.error_rate})")
+    print(f"   export LLM_BASE_URL=http://{args.host}:{args.port}/v1 OPENAI_API_KEY=stub")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,7 +29,7 @@ for env_path in env_paths:
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.vector_service import VectorService
+from llm_service.services.retrieval_engine import get_vector_service
 import logging
 
 logging.basicConfig(level=logging.WARNING)  # 로그 최소화
@@ -126,7 +126,7 @@ async def prepare_ground_truth():
     # VectorService 초기화
     print("\n1️⃣ VectorService 초기화 중...")
     try:
-        vector_service = VectorService()
+        vector_service = get_vector_service()
         print("✅ 초기화 완료")
     except Exception as e:
         print(f"❌ 초기화 실패: {e}")
@@ -1,23 +1,40 @@
 
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from llm_service.models.chat_models import ChatRequest, ChatResponse, ConversationHistoryResponse, EmotionAnalysisRequest, EmotionAnalysisResponse
 from llm_service.services.unified_chat_service import UnifiedChatService
 from llm_service.services.emotion_service import emotion_service
-from llm_service.services.cache_service import CacheService
-from llm_service.services.openai_service import OpenAIService
+from llm_service.services.cache_service import cache_service, GLOBAL_SCOPE
+from llm_service.services.query_log_service import query_log_service
+from llm_service.services.openai_service import OpenAIService, ChatGenerationError, FALLBACK_RESPONSE
+from llm_service.services.single_flight import SingleFlight
+from llm_service.services.cache_warmer import CacheWarmer
+from llm_service.routers.feedback import feedback_service
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 unified_chat_service = UnifiedChatService()
-cache_service = CacheService()
 openai_service = OpenAIService()
+chat_flight = SingleFlight("chat")
+cache_warmer = CacheWarmer(unified_chat_service, openai_service, feedback_service=feedback_service)
 
 
 @router.post("/chat")
 async def chat(request: ChatRequest):
     query = request.message
-    
+
+    # 같은 질문이 동시에 들어오면 먼저 온 요청의 결과를 함께 사용 (LLM 호출/캐시 쓰기 1회)
+    result, shared = await chat_flight.do(
+        cache_service.get_cache_key(query), lambda: _answer_query(query)
+    )
+    return {**result, "coalesced": shared}
+
+
+async def _answer_query(query: str) -> dict:
     # 1. 캐시 확인
-    cached = cache_service.search_similar_cache(query, threshold=0.90)
+    cached = await cache_service.search_similar_cache(query, threshold=0.90)
+    intent = unified_chat_service.classify_intent_and_urgency(query)["intent"]
+    query_log_service.log(query, intent, GLOBAL_SCOPE, cached)
     
     if cached:
         # 캐시 히트! 바로 리턴 (비용 $0)
@@ -25,21 +42,59 @@ async def chat(request: ChatRequest):
             "answer": cached["answer"],
             "cached": True,
             "similarity": cached["similarity"],
-            "original_query": cached["original_query"]
+            "original_query": cached["original_query"],
+            "cache_tier": cached["tier"]
         }
     
     # 2. 캐시 미스 → LLM 호출
-    answer = await openai_service.chat(
-        messages=[{"role": "user", "content": query}]
-    )
+    try:
+        answer = await openai_service.chat(
+            messages=[{"role": "user", "content": query}]
+        )
+    except ChatGenerationError:
+        # 생성 실패 시 사과 문구만 돌려주고 캐시에는 저장하지 않음
+        return {
+            "answer": FALLBACK_RESPONSE,
+            "cached": False
+        }
     
-    # 3. 새 답변을 캐시에 저장
-    cache_service.save_cache(query, answer)
+    # 3. 새 답변을 캐시에 저장 (의도별 TTL 적용, 응답은 저장 완료를 기다리지 않음)
+    cache_service.save_cache_background(query, answer, intent=intent)
     
     return {
         "answer": answer,
         "cached": False
     }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """답변 캐시 계층별(L1 메모리 / L2 시맨틱) 히트 통계"""
+    return cache_service.get_stats()
+
+
+@router.post("/cache/warm")
+async def warm_cache():
+    """자주 묻는 질문 상위 N개를 미리 답변해 캐시에 채우기 (수동 실행)"""
+    return await cache_warmer.run_once()
+
+
+@router.get("/cache/warm/status")
+async def get_cache_warm_status():
+    """마지막 캐시 예열 결과"""
+    return cache_warmer.last_result or {"message": "아직 예열을 실행하지 않았습니다."}
+
+
+@router.get("/analysis/stats")
+async def get_analysis_stats():
+    """메시지 분석 규칙/LLM 처리 비율 (규칙 우선 cascade)"""
+    return unified_chat_service.message_analyzer.get_stats()
+
+
+@router.get("/single-flight/stats")
+async def get_single_flight_stats():
+    """동시 동일 요청 병합(single-flight) 지표"""
+    return SingleFlight.all_metrics()
     
     
 @router.post("/unified")
@@ -69,6 +124,29 @@ async def unified_chat_endpoint(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"채팅 처리 중 오류가 발생했습니다: {str(e)}")
 
 
+@router.post("/unified/stream")
+async def unified_chat_stream_endpoint(request: ChatRequest):
+    """통합 채팅 스트리밍 엔드포인트 (SSE) - 토큰이 생성되는 대로 전달"""
+    print(f"=== 통합 채팅 스트리밍 요청: {request.user_id} ===")
+
+    async def event_stream():
+        async for event, data in unified_chat_service.process_message_stream(
+            user_id=request.user_id,
+            message=request.message,
+            user_context=request.user_context or {}
+        ):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # 프록시(nginx) 버퍼링 방지
+        },
+    )
+
+
 @router.post("/", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     try:
@@ -150,6 +228,7 @@ async def clear_chat_history_for_backend(user_id: str):
     """Backend에서 호출하는 채팅 히스토리 삭제"""
     try:
         unified_chat_service.session_manager.clear_conversation_history(user_id)
+        unified_chat_service.memory_service.forget(user_id)
         return {"message": f"{user_id}의 채팅 히스토리가 삭제되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"채팅 히스토리 삭제 중 오류가 발생했습니다: {str(e)}")
@@ -173,6 +252,7 @@ async def clear_conversation_history(user_id: str):
     """사용자의 대화 기록 삭제"""
     try:
         unified_chat_service.session_manager.clear_conversation_history(user_id)
+        unified_chat_service.memory_service.forget(user_id)
         return {"message": f"{user_id}의 대화 기록이 삭제되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"대화 기록 삭제 중 오류가 발생했습니다: {str(e)}")
@@ -1,14 +1,16 @@
 
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pydantic import BaseModel
-from llm_service.services.vector_service import VectorService
+from llm_service.services.retrieval_engine import get_vector_service
 from llm_service.services.rsvp_service import rsvp_service
+from llm_service.services.schedule_sync_service import schedule_sync_service
 
 router = APIRouter(prefix="/schedule", tags=["schedule"])
 
-# VectorService 인스턴스 (나중에 의존성 주입으로 개선 가능)
-vector_service = VectorService()
+# 프로세스 공용 VectorService (UnifiedChatService와 같은 인스턴스)
+vector_service = get_vector_service()
 
 
 class RSVPRequest(BaseModel):
@@ -18,6 +20,15 @@ class RSVPRequest(BaseModel):
     response: str  # "attending", "not_attending", "maybe"
 
 
+class LongDocumentRequest(BaseModel):
+    """긴 문서(공지/가정통신문/가이드) 저장 요청 모델"""
+    text: str
+    user_id: Optional[str] = None
+    title: Optional[str] = None
+    doc_type: str = "notice"
+    parent_id: Optional[str] = None  # 같은 ID로 다시 보내면 기존 청크를 교체
+
+
 @router.post("/")
 async def add_schedule(user_id: str, schedule_text: str):
     """스케줄 정보 추가"""
@@ -38,6 +49,46 @@ async def search_schedules(query: str):
         raise HTTPException(status_code=500, detail=f"스케줄 검색 중 오류가 발생했습니다: {str(e)}")
 
 
+@router.post("/document")
+async def add_long_document(request: LongDocumentRequest):
+    """긴 문서를 겹치는 청크로 나눠 저장 (검색 시 문서 단위로 묶여서 반환)"""
+    metadata = {"type": request.doc_type, "created_at": datetime.now().isoformat()}
+    if request.user_id:
+        metadata["user_id"] = request.user_id
+    if request.title:
+        metadata["title"] = request.title
+    try:
+        return await vector_service.add_long_document(
+            request.text, metadata, parent_id=request.parent_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"문서 저장 중 오류가 발생했습니다: {str(e)}")
+
+
+@router.post("/sync")
+async def sync_schedules(full: bool = False):
+    """
+    Firestore 일정 → 벡터 인덱스 증분 동기화
+    
+    - full: True면 체크포인트를 초기화하고 처음부터 다시 동기화
+    """
+    if full:
+        schedule_sync_service.reset_checkpoint()
+    result = await schedule_sync_service.sync_incremental()
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=f"일정 동기화 중 오류가 발생했습니다: {result.get('message')}")
+    return result
+
+
+@router.post("/sync/reconcile")
+async def reconcile_deleted_schedules():
+    """Firestore에서 삭제된 일정을 벡터 인덱스에서도 제거"""
+    result = await schedule_sync_service.reconcile_deleted()
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=f"삭제 일정 정리 중 오류가 발생했습니다: {result.get('message')}")
+    return result
+
+
 @router.post("/rsvp")
 async def submit_rsvp(request: RSVPRequest):
     """
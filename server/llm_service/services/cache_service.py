@@ -1,65 +1,491 @@
-import datetime
+from datetime import datetime
+import asyncio
+import functools
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 import chromadb
 from chromadb.config import Settings
-from openai import OpenAI
 import hashlib
 
+from .llm_gateway import llm_gateway
+from .embedding_batcher import get_embedding_batcher
+from ..config.cache_config import CacheConfig
+
+logger = logging.getLogger(__name__)
+
+# 범위 구분 없이 공유되는 캐시 (/chat/chat)
+GLOBAL_SCOPE = "global"
+
 
 class CacheService:
-    def __init__(self):
-        self.client = chromadb.PersistentClient(path="./data/chroma_cache")
+    """
+    2단계 답변 캐시
+
+    - L1: 프로세스 메모리 LRU (정규화한 질문 해시로 정확히 같은 질문만, 네트워크 호출 없음)
+    - L2: ChromaDB 시맨틱 캐시 (임베딩 API + 벡터 검색으로 비슷한 질문까지)
+
+    L2 항목은 의도별 TTL(expires_at)과 사용 기록(hit_count, last_access)을 메타데이터로 가지며,
+    백그라운드 정리 작업이 만료 항목을 지우고 최대 항목 수를 LRU/LFU로 유지합니다.
+
+    조회/저장 API는 비동기입니다. 임베딩은 공용 LLM 게이트웨이로, 동기 방식인 Chroma 호출은
+    executor에서 실행해 이벤트 루프를 막지 않습니다.
+
+    client / embeddings / collection_name을 넘기면 다른 저장소와 임베딩으로 동작합니다.
+    (cache_replay_simulator.py에서 메모리 Chroma + 오프라인 임베딩으로 재생할 때 사용)
+    """
+
+    def __init__(
+        self,
+        l1_max_entries: int = 1024,
+        max_entries: int = CacheConfig.MAX_ENTRIES,
+        eviction_policy: str = CacheConfig.EVICTION_POLICY,
+        client=None,
+        embeddings=None,
+        collection_name: str = "answer_cache",
+    ):
+        self.client = client or chromadb.PersistentClient(path="./data/chroma_cache")
         self.cache_collection = self.client.get_or_create_collection(
-            name="answer_cache", metadata={"hnsw:space": "cosine"}
+            name=collection_name, metadata={"hnsw:space": "cosine"}
         )
-        self.openai = OpenAI()
+        # LangChain Embeddings 호환 객체 (없으면 OpenAI 임베딩 API 사용)
+        self.embeddings = embeddings
+
+        # L1: cache_key → 캐시 결과 (최근 사용 순서 유지)
+        self.l1_max_entries = l1_max_entries
+        self._l1: "OrderedDict[str, dict]" = OrderedDict()
+        self._l1_lock = threading.Lock()
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0}
+
+        # L2 정리 설정
+        self.max_entries = max_entries
+        self.eviction_policy = eviction_policy
+        self.eviction_stats = {"runs": 0, "expired": 0, "evicted": 0, "migrated": 0, "last_run": None}
+        self._legacy_migrated = False  # 예전 형식 항목 보정은 프로세스마다 한 번만
+        # L1/L2 히트의 사용 기록은 요청 경로에서 쓰지 않고 모아 두었다가 정리 시 한 번에 기록
+        self._pending_touches: Dict[str, Dict[str, float]] = {}
+        self._evictor_task: Optional[asyncio.Task] = None
+        # 진행 중인 백그라운드 저장 작업 (GC로 취소되지 않도록 참조 유지)
+        self._background_tasks: set = set()
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """대소문자/공백/끝 문장부호 차이만 있는 질문을 같은 질문으로 취급"""
+        normalized = " ".join(query.lower().split())
+        return re.sub(r"[\s?.!~]+$", "", normalized)
+
+    def get_cache_key(self, query: str, scope: str = GLOBAL_SCOPE) -> str:
+        """질문을 해시값으로 변환 (정확히 같은 질문 판별, 범위가 다르면 다른 키)"""
+        normalized = self.normalize_query(query)
+        if scope != GLOBAL_SCOPE:
+            normalized = f"{scope}|{normalized}"
+        return hashlib.md5(normalized.encode()).hexdigest()
 
-    def get_cache_key(self, query: str) -> str:
-        """질문을 해시값으로 변환 (정확히 같은 질문 판별)"""
-        return hashlib.md5(query.encode()).hexdigest()
+    # ========== L1 (메모리 LRU) ==========
 
-    def search_similar_cache(self, query: str, threshold: float = 0.90) -> dict | None:
-        """유사한 캐시된 답변 검색"""
+    def _l1_get(self, cache_key: str) -> dict | None:
+        with self._l1_lock:
+            entry = self._l1.get(cache_key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._l1[cache_key]
+                return None
+            self._l1.move_to_end(cache_key)
+        # L1에서 응답해도 L2 사용 기록(LRU/LFU 기준)은 갱신
+        self._record_touch(entry["cache_id"], time.time())
+        return entry
 
-        # 1. 질문을 벡터로 변환
-        embedding = (
-            self.openai.embeddings.create(model="text-embedding-3-small", input=query)
-            .data[0]
-            .embedding
+    def _l1_put(self, cache_key: str, entry: dict):
+        with self._l1_lock:
+            self._l1[cache_key] = entry
+            self._l1.move_to_end(cache_key)
+            while len(self._l1) > self.l1_max_entries:
+                self._l1.popitem(last=False)  # 가장 오래 안 쓴 항목 제거
+
+    def _l1_discard(self, cache_ids: List[str]):
+        """L2에서 지워진 항목을 가리키는 L1 항목 제거"""
+        removed = set(cache_ids)
+        with self._l1_lock:
+            for key in [k for k, entry in self._l1.items() if entry["cache_id"] in removed]:
+                del self._l1[key]
+            for cache_id in removed:
+                self._pending_touches.pop(cache_id, None)
+
+    def clear_l1(self):
+        with self._l1_lock:
+            self._l1.clear()
+
+    # ========== 조회 / 저장 ==========
+
+    async def _run_in_executor(self, func, *args, **kwargs):
+        """동기 Chroma 호출을 기본 executor(스레드 풀)에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def _embed(self, query: str) -> List[float]:
+        if self.embeddings is not None:
+            return await self._run_in_executor(self.embeddings.embed_query, query)
+        # 동시에 들어온 다른 조회와 묶어서 한 번에 호출
+        return await get_embedding_batcher("text-embedding-3-small").embed(query)
+
+    async def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """여러 질문을 임베딩 API 한 번으로 변환"""
+        if self.embeddings is not None:
+            return await self._run_in_executor(self.embeddings.embed_documents, texts)
+        return await llm_gateway.embeddings("cache_service", "text-embedding-3-small", texts)
+
+    async def nearest(self, query: str, scope: str = GLOBAL_SCOPE):
+        """
+        같은 범위에서 가장 가까운 L2 항목 (임계값 적용 전)
+
+        Returns:
+            (cache_id, similarity, metadata, answer) 또는 비어 있으면 None
+        """
+        embedding = await self._embed(query)
+        results = await self._run_in_executor(
+            self.cache_collection.query,
+            query_embeddings=[embedding],
+            n_results=1,
+            where={"scope": scope},
+        )
+        if not results["distances"][0]:
+            return None
+        similarity = 1 - results["distances"][0][0]  # cosine distance → similarity
+        return (
+            results["ids"][0][0],
+            similarity,
+            results["metadatas"][0][0],
+            results["documents"][0][0],
         )
 
-        # 2. ChromaDB에서 유사 질문 검색
-        results = self.cache_collection.query(query_embeddings=[embedding], n_results=1)
+    async def search_similar_cache(
+        self, query: str, threshold: float = 0.90, scope: str = GLOBAL_SCOPE
+    ) -> dict | None:
+        """
+        유사한 캐시된 답변 검색 (L1 → L2 순서)
+
+        scope: 캐시 범위 (예: "general|강남구|3-5세"). 같은 범위에 저장된 답변만 반환합니다.
+        """
+
+        # 0. L1: 정확히 같은 질문이면 임베딩 호출 없이 바로 반환
+        cache_key = self.get_cache_key(query, scope)
+        entry = self._l1_get(cache_key)
+        if entry is not None:
+            self.stats["l1_hits"] += 1
+            return {**entry, "similarity": 1.0, "tier": "l1"}
+
+        # 1~2. 질문을 벡터로 변환해 같은 범위에서 가장 가까운 캐시 항목 검색
+        nearest = await self.nearest(query, scope)
 
-        # 3. 유사도 체크
-        if results["distances"][0]:
-            similarity = 1 - results["distances"][0][0]  # cosine distance → similarity
+        # 3. 유사도 / 만료 체크
+        if nearest:
+            cache_id, similarity, metadata, answer = nearest
+            now = time.time()
 
-            if similarity >= threshold:
-                return {
+            if similarity >= threshold and metadata.get("expires_at", now + 1) > now:
+                self.stats["l2_hits"] += 1
+                self._record_touch(cache_id, now)
+                entry = {
                     "cached": True,
-                    "answer": results["documents"][0][0],
-                    "similarity": similarity,
-                    "original_query": results["metadatas"][0][0]["query"],
+                    "answer": answer,
+                    "original_query": metadata["query"],
+                    "cache_id": cache_id,
+                    "expires_at": metadata.get("expires_at", now + CacheConfig.DEFAULT_TTL_SECONDS),
                 }
+                # 다음에 같은 질문이 오면 L1에서 바로 응답
+                self._l1_put(cache_key, entry)
+                return {**entry, "similarity": similarity, "tier": "l2"}
 
+        self.stats["misses"] += 1
         return None
 
-    def save_cache(self, query: str, answer: str):
-        """새 답변을 캐시에 저장"""
+    def _record_touch(self, cache_id: str, now: float):
+        """L2 히트 수 / 마지막 사용 시각 갱신 예약 (정리 작업 때 한 번에 기록)"""
+        with self._l1_lock:
+            touch = self._pending_touches.setdefault(cache_id, {"hits": 0, "last_access": 0.0})
+            touch["hits"] += 1
+            touch["last_access"] = now
 
-        # 1. 질문을 벡터로 변환
-        embedding = (
-            self.openai.embeddings.create(model="text-embedding-3-small", input=query)
-            .data[0]
-            .embedding
+    async def save_cache(
+        self,
+        query: str,
+        answer: str,
+        intent: str = "general",
+        ttl_seconds: Optional[int] = None,
+        scope: str = GLOBAL_SCOPE,
+    ):
+        """새 답변을 캐시에 저장 (TTL은 지정하지 않으면 의도별 기본값)"""
+        await self.save_cache_many([{
+            "query": query,
+            "answer": answer,
+            "intent": intent,
+            "ttl_seconds": ttl_seconds,
+            "scope": scope,
+        }])
+
+    async def save_cache_many(self, items: List[Dict[str, Any]], batch_size: int = 100) -> int:
+        """
+        여러 답변을 일괄 저장 (캐시 예열용)
+
+        items: [{"query", "answer", "intent"(선택), "scope"(선택), "ttl_seconds"(선택)}]
+        batch_size개씩 임베딩 API 한 번 + ChromaDB upsert 한 번으로 저장하고 L1에도 넣습니다.
+        """
+        saved = 0
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            embeddings = await self._embed_many([item["query"] for item in batch])
+            now = time.time()
+            ids, metadatas, l1_entries = [], [], []
+            for item in batch:
+                intent = item.get("intent", "general")
+                scope = item.get("scope", GLOBAL_SCOPE)
+                cache_key = self.get_cache_key(item["query"], scope)
+                expires_at = now + (item.get("ttl_seconds") or CacheConfig.get_ttl(intent))
+                ids.append(cache_key)
+                metadatas.append({
+                    "query": item["query"],
+                    "timestamp": datetime.now().isoformat(),
+                    "intent": intent,
+                    "scope": scope,
+                    "expires_at": expires_at,
+                    "hit_count": 0,
+                    "last_access": now,
+                })
+                l1_entries.append((cache_key, {
+                    "cached": True,
+                    "answer": item["answer"],
+                    "original_query": item["query"],
+                    "cache_id": cache_key,
+                    "expires_at": expires_at,
+                }))
+            await self._run_in_executor(
+                self.cache_collection.upsert,
+                ids=ids,
+                embeddings=embeddings,
+                documents=[item["answer"] for item in batch],
+                metadatas=metadatas,
+            )
+            for cache_key, entry in l1_entries:
+                self._l1_put(cache_key, entry)
+            saved += len(batch)
+        return saved
+
+    async def fresh_keys(self, cache_keys: List[str], valid_until: float) -> set:
+        """valid_until 이후에도 만료되지 않는 L2 항목의 키"""
+        existing = await self._run_in_executor(
+            self.cache_collection.get, ids=cache_keys, include=["metadatas"]
         )
+        return {
+            cache_id
+            for cache_id, metadata in zip(existing["ids"], existing["metadatas"])
+            if metadata.get("expires_at", 0) > valid_until
+        }
+
+    def save_cache_background(
+        self,
+        query: str,
+        answer: str,
+        intent: str = "general",
+        ttl_seconds: Optional[int] = None,
+        scope: str = GLOBAL_SCOPE,
+    ) -> asyncio.Task:
+        """
+        캐시 저장을 백그라운드 작업으로 예약하고 바로 반환 (fire-and-forget)
+
+        응답은 캐시 저장(임베딩 + upsert)을 기다리지 않고 먼저 나가며,
+        저장 실패는 로그만 남기고 요청에는 영향을 주지 않습니다.
+        """
+        task = asyncio.create_task(self.save_cache(query, answer, intent, ttl_seconds, scope))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_done)
+        return task
 
-        # 2. ChromaDB에 저장
-        cache_key = self.get_cache_key(query)
+    def _on_background_done(self, task: asyncio.Task):
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"답변 캐시 저장 실패: {task.exception()}")
 
-        self.cache_collection.upsert(
-            ids=[cache_key],
-            embeddings=[embedding],
-            documents=[answer],
-            metadatas=[{"query": query, "timestamp": datetime.now().isoformat()}],
+    async def drain_background(self):
+        """진행 중인 캐시 저장 작업이 끝날 때까지 대기 (앱 종료 시)"""
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    # ========== 정리 (TTL 만료 / 용량 제한) ==========
+
+    def _delete_entries(self, cache_ids: List[str]):
+        batch_size = CacheConfig.EVICTION_BATCH_SIZE
+        for i in range(0, len(cache_ids), batch_size):
+            self.cache_collection.delete(ids=cache_ids[i:i + batch_size])
+        self._l1_discard(cache_ids)
+
+    def flush_touches(self):
+        """L1에서 모아 둔 사용 기록을 L2 메타데이터에 일괄 반영"""
+        with self._l1_lock:
+            pending, self._pending_touches = self._pending_touches, {}
+        if not pending:
+            return
+        ids = list(pending)
+        existing = self.cache_collection.get(ids=ids, include=["metadatas"])
+        if not existing["ids"]:
+            return
+        self.cache_collection.update(
+            ids=existing["ids"],
+            metadatas=[
+                {
+                    **metadata,
+                    "hit_count": int(metadata.get("hit_count", 0)) + int(pending[cache_id]["hits"]),
+                    "last_access": max(metadata.get("last_access", 0), pending[cache_id]["last_access"]),
+                }
+                for cache_id, metadata in zip(existing["ids"], existing["metadatas"])
+            ],
         )
+
+    def migrate_legacy_entries(self, now: Optional[float] = None) -> int:
+        """
+        예전 형식 항목에 scope / expires_at 채우기
+
+        범위 구분 전에 저장된 항목은 scope가 없어 어떤 조회(where scope)에도 걸리지 않고,
+        TTL 도입 전 항목은 expires_at도 없어 만료 정리에서도 빠진 채 용량만 차지합니다.
+        범위 구분 전에는 /chat/chat의 공용 캐시만 있었으므로 GLOBAL_SCOPE로 보고
+        (캐시 키도 GLOBAL_SCOPE 규칙과 같음) 지금부터 기본 TTL을 줍니다.
+        """
+        now = now or time.time()
+        migrated = 0
+        offset = 0
+        while True:
+            page = self.cache_collection.get(
+                include=["metadatas"], limit=CacheConfig.EVICTION_BATCH_SIZE, offset=offset
+            )
+            if not page["ids"]:
+                break
+            ids, metadatas = [], []
+            for cache_id, metadata in zip(page["ids"], page["metadatas"]):
+                metadata = metadata or {}
+                if "scope" in metadata and "expires_at" in metadata:
+                    continue
+                ids.append(cache_id)
+                metadatas.append({
+                    **metadata,
+                    "scope": metadata.get("scope", GLOBAL_SCOPE),
+                    "expires_at": metadata.get("expires_at", now + CacheConfig.DEFAULT_TTL_SECONDS),
+                })
+            if ids:
+                self.cache_collection.update(ids=ids, metadatas=metadatas)
+                migrated += len(ids)
+            offset += len(page["ids"])
+        if migrated:
+            logger.info(f"🧹 답변 캐시 예전 형식 항목 {migrated}개에 scope/expires_at 보정")
+        return migrated
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """TTL이 지난 항목을 배치 단위로 삭제"""
+        now = now or time.time()
+        removed = 0
+        while True:
+            batch = self.cache_collection.get(
+                where={"expires_at": {"$lt": now}},
+                limit=CacheConfig.EVICTION_BATCH_SIZE,
+                include=[],
+            )
+            if not batch["ids"]:
+                break
+            self._delete_entries(batch["ids"])
+            removed += len(batch["ids"])
+        return removed
+
+    def enforce_max_entries(self) -> int:
+        """최대 항목 수를 넘으면 정책(LRU/LFU)에 따라 사용 빈도가 낮은 항목부터 삭제"""
+        excess = self.cache_collection.count() - self.max_entries
+        if excess <= 0:
+            return 0
+
+        candidates = []
+        offset = 0
+        while True:
+            page = self.cache_collection.get(
+                include=["metadatas"], limit=CacheConfig.EVICTION_BATCH_SIZE, offset=offset
+            )
+            if not page["ids"]:
+                break
+            for cache_id, metadata in zip(page["ids"], page["metadatas"]):
+                # 예전 형식(사용 기록 없음) 항목은 가장 먼저 제거
+                last_access = float(metadata.get("last_access", 0))
+                if self.eviction_policy == "lfu":
+                    rank = (int(metadata.get("hit_count", 0)), last_access)
+                else:
+                    rank = (last_access,)
+                candidates.append((rank, cache_id))
+            offset += len(page["ids"])
+
+        victims = [cache_id for _, cache_id in heapq.nsmallest(excess, candidates)]
+        self._delete_entries(victims)
+        return len(victims)
+
+    def run_eviction(self) -> dict:
+        """(처음 한 번) 예전 형식 보정 → 사용 기록 반영 → 만료 삭제 → 용량 제한"""
+        if not self._legacy_migrated:
+            self.eviction_stats["migrated"] += self.migrate_legacy_entries()
+            self._legacy_migrated = True
+        self.flush_touches()
+        expired = self.evict_expired()
+        evicted = self.enforce_max_entries()
+        self.eviction_stats["runs"] += 1
+        self.eviction_stats["expired"] += expired
+        self.eviction_stats["evicted"] += evicted
+        self.eviction_stats["last_run"] = datetime.now().isoformat()
+        if expired or evicted:
+            logger.info(f"🧹 답변 캐시 정리: 만료 {expired}개, 용량 초과 {evicted}개 삭제")
+        return {"expired": expired, "evicted": evicted}
+
+    async def _eviction_loop(self, interval_seconds: int):
+        while True:
+            try:
+                # Chroma 호출은 동기 방식이라 이벤트 루프를 막지 않도록 스레드에서 실행
+                await asyncio.to_thread(self.run_eviction)
+            except Exception as e:
+                logger.warning(f"답변 캐시 정리 실패: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def start_evictor(self, interval_seconds: int = CacheConfig.EVICTION_INTERVAL_SECONDS):
+        """백그라운드 정리 작업 시작 (앱 startup에서 호출)"""
+        if self._evictor_task and not self._evictor_task.done():
+            return
+        self._evictor_task = asyncio.create_task(self._eviction_loop(interval_seconds))
+
+    async def stop_evictor(self):
+        """백그라운드 정리 작업 종료 (앱 shutdown에서 호출)"""
+        await self.drain_background()
+        if not self._evictor_task:
+            return
+        self._evictor_task.cancel()
+        try:
+            await self._evictor_task
+        except asyncio.CancelledError:
+            pass
+        self._evictor_task = None
+
+    def get_stats(self) -> dict:
+        """계층별 히트 통계"""
+        lookups = sum(self.stats.values())
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return {
+            **self.stats,
+            "lookups": lookups,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "l1_hit_rate": round(self.stats["l1_hits"] / lookups, 4) if lookups else 0.0,
+            "l1_entries": len(self._l1),
+            "l1_max_entries": self.l1_max_entries,
+            "l2_entries": self.cache_collection.count(),
+            "l2_max_entries": self.max_entries,
+            "eviction_policy": self.eviction_policy,
+            "eviction": self.eviction_stats,
+        }
+
+
+# 전역 인스턴스
+cache_service = CacheService()
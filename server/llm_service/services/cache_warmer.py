@@ -0,0 +1,179 @@
+"""
+답변 캐시 예열(pre-warming)
+
+배포 직후나 정리 작업 뒤에는 답변 캐시가 비어 있어, 자주 묻는 질문도 처음 몇 명은
+LLM 응답을 그대로 기다려야 합니다. 이 작업은 질문 로그(query_log_service)와
+채팅 응답 피드백에서 자주 나온 질문 상위 N개를 골라 미리 답변을 만들어 캐시에 넣습니다.
+
+1. 집계: 최근 로그의 질문을 (캐시 범위, 정규화한 질문) 단위로 세고, 좋은 평가를 받은 질문에 가중치
+2. 생략: 이미 캐시에 있고 다음 예열 전까지 만료되지 않는 질문은 건너뜀
+3. 생성: 동시 실행 수를 제한(Semaphore)해서 답변 생성
+4. 저장: CacheService.save_cache_many로 임베딩을 배치 단위로 한 번에 만들어 저장
+
+refresh 주기(CacheConfig.WARM_INTERVAL_SECONDS)마다 반복하며, 0이면 수동 실행만 합니다.
+질문 로그는 기본으로 꺼져 있으므로(QUERY_LOG_ENABLED) 끈 상태에서는 피드백 질문만 집계합니다.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .cache_service import cache_service as default_cache_service, GLOBAL_SCOPE
+from .query_log_service import query_log_service as default_query_log
+from ..config.cache_config import CacheConfig
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """자주 묻는 질문 답변을 미리 캐시에 채우는 배치 작업"""
+
+    def __init__(
+        self,
+        chat_service,
+        openai_service,
+        cache_service=None,
+        query_log=None,
+        feedback_service=None,
+        top_n: int = CacheConfig.WARM_TOP_N,
+        concurrency: int = CacheConfig.WARM_CONCURRENCY,
+        min_count: int = CacheConfig.WARM_MIN_COUNT,
+        lookback_days: int = CacheConfig.WARM_LOOKBACK_DAYS,
+    ):
+        self.chat_service = chat_service          # 범위가 있는 질문 (통합 채팅 답변 생성)
+        self.openai_service = openai_service      # 전역 범위 질문 (/chat/chat과 같은 방식)
+        self.cache_service = cache_service or default_cache_service
+        self.query_log = query_log or default_query_log
+        self.feedback_service = feedback_service
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.min_count = min_count
+        self.lookback_days = lookback_days
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    # ========== 1. 집계 ==========
+
+    def top_questions(self) -> List[Dict[str, Any]]:
+        """최근 로그 + 피드백에서 자주 나온 질문 상위 N개"""
+        cutoff = (datetime.now() - timedelta(days=self.lookback_days)).isoformat()
+        counts: Counter = Counter()
+        samples: Dict[tuple, Dict[str, Any]] = {}
+
+        def add(query: str, intent: str, scope: str, weight: int):
+            key = (scope, self.cache_service.normalize_query(query))
+            counts[key] += weight
+            samples.setdefault(key, {"query": query, "intent": intent, "scope": scope})
+
+        for entry in self.query_log.iter_entries():
+            if not entry.get("query") or not entry.get("scope"):
+                continue
+            if entry.get("ts", "") < cutoff:
+                continue
+            add(entry["query"], entry.get("intent", "general"), entry["scope"], 1)
+
+        if self.feedback_service is not None:
+            for feedback in self.feedback_service.feedback_data:
+                context = feedback.get("context") or {}
+                query = context.get("query") or context.get("message")
+                if feedback.get("feedback_type") != "chat_response" or not query:
+                    continue
+                if feedback.get("rating", 3) <= 2:
+                    continue  # 나쁜 평가를 받은 질문은 가중치를 주지 않음
+                weight = 2 if feedback.get("rating", 3) >= 4 else 1
+                add(query, context.get("intent", "general"), context.get("cache_scope", GLOBAL_SCOPE), weight)
+
+        return [
+            {**samples[key], "count": count}
+            for key, count in counts.most_common(self.top_n)
+            if count >= self.min_count
+        ]
+
+    # ========== 2. 생략 ==========
+
+    async def _filter_fresh(self, questions: List[Dict[str, Any]], fresh_until: float) -> List[Dict[str, Any]]:
+        """fresh_until 이후까지 유효한 캐시 항목이 있는 질문 제외"""
+        ids = [self.cache_service.get_cache_key(q["query"], q["scope"]) for q in questions]
+        fresh = await self.cache_service.fresh_keys(ids, fresh_until)
+        return [q for q, cache_id in zip(questions, ids) if cache_id not in fresh]
+
+    # ========== 3. 생성 ==========
+
+    async def _generate(self, question: Dict[str, Any], semaphore: asyncio.Semaphore) -> Optional[str]:
+        """답변 생성 (실패하면 None - 사과 문구가 캐시에 들어가지 않도록 예외로 실패를 구분)"""
+        async with semaphore:
+            try:
+                if question["scope"] == GLOBAL_SCOPE:
+                    return await self.openai_service.generate_chat_response(
+                        [{"role": "user", "content": question["query"]}], fallback=False
+                    )
+                answer, _ = await self.chat_service.generate_response(
+                    question["query"], question["intent"]
+                )
+                return answer
+            except Exception as e:
+                logger.warning(f"캐시 예열 답변 생성 실패 ({question['query'][:30]}): {e}")
+                return None
+
+    # ========== 실행 ==========
+
+    async def run_once(self, interval_seconds: int = CacheConfig.WARM_INTERVAL_SECONDS) -> Dict[str, Any]:
+        """예열 한 번 실행"""
+        async with self._lock:
+            start = time.perf_counter()
+            candidates = self.top_questions()
+            targets = candidates
+            if candidates:
+                targets = await self._filter_fresh(candidates, time.time() + interval_seconds)
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+            answers = await asyncio.gather(*(self._generate(q, semaphore) for q in targets))
+            items = [
+                {"query": q["query"], "answer": answer, "intent": q["intent"], "scope": q["scope"]}
+                for q, answer in zip(targets, answers)
+                if answer is not None
+            ]
+            saved = await self.cache_service.save_cache_many(
+                items, batch_size=CacheConfig.WARM_EMBEDDING_BATCH_SIZE
+            ) if items else 0
+
+            self.last_result = {
+                "candidates": len(candidates),
+                "skipped_fresh": len(candidates) - len(targets),
+                "generated": len(items),
+                "failed": len(targets) - len(items),
+                "saved": saved,
+                "seconds": round(time.perf_counter() - start, 2),
+                "finished_at": datetime.now().isoformat(),
+            }
+            logger.info(f"🔥 답변 캐시 예열 완료: {self.last_result}")
+            return self.last_result
+
+    async def _refresh_loop(self, interval_seconds: int):
+        while True:
+            try:
+                await self.run_once(interval_seconds)
+            except Exception as e:
+                logger.warning(f"답변 캐시 예열 실패: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def start(self, interval_seconds: int = CacheConfig.WARM_INTERVAL_SECONDS):
+        """주기적 예열 시작 (앱 startup에서 호출, 주기 0이면 시작하지 않음)"""
+        if interval_seconds <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._refresh_loop(interval_seconds))
+
+    async def stop(self):
+        """주기적 예열 종료 (앱 shutdown에서 호출)"""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
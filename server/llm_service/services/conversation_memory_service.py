@@ -0,0 +1,189 @@
+"""
+장기 대화 메모리 서비스
+
+사용자별 과거 대화(질문 + 답변 한 쌍)를 벡터 DB에 색인해 두고,
+매 요청마다 최근 1~2턴 + 현재 질문과 가장 관련 있는 과거 대화 몇 개만
+토큰 예산 안에서 골라 프롬프트에 붙입니다.
+
+기존 방식(최근 10개 메시지 전체 전송)과 달리 대화가 아무리 길어져도
+프롬프트 크기가 일정하게 유지되고, 10개 이전의 대화도 다시 찾아낼 수 있습니다.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from langchain_community.vectorstores import Chroma
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 근사치 계산 (오프라인)
+
+    한국어는 대략 1.5~2자당 1토큰이므로 보수적으로 2자당 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    return len(text) // 2 + 1
+
+
+class ConversationMemoryService:
+    """사용자별 장기 대화 메모리 (기존 VectorService 임베딩/저장소 재사용)"""
+
+    def __init__(
+        self,
+        vector_service,
+        collection_name: str = "conversation_memory",
+        recent_turns: int = 2,
+        relevant_k: int = 3,
+        token_budget: int = 800,
+        max_distance: float = 1.0,
+        max_stored_answer_chars: int = 400,
+    ):
+        self.vector_service = vector_service
+        # RAG 문서 컬렉션과 섞이지 않도록 같은 DB 안의 별도 컬렉션 사용
+        # (BM25 인덱스/하이브리드 검색 결과에 대화 기록이 끼어들지 않음)
+        self.memory_store = Chroma(
+            collection_name=collection_name,
+            persist_directory=vector_service.persist_directory,
+            embedding_function=vector_service.embeddings,
+        )
+        self.recent_turns = recent_turns
+        self.relevant_k = relevant_k
+        self.token_budget = token_budget
+        self.max_distance = max_distance  # 이보다 먼 과거 대화는 관련 없음으로 판단
+        self.max_stored_answer_chars = max_stored_answer_chars
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """토큰 예산에 맞춰 텍스트 자르기"""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        max_chars = max(max_tokens * 2 - 3, 0)
+        return text[:max_chars] + "..."
+
+    async def remember_exchange(
+        self, user_id: str, user_message: str, assistant_message: str
+    ):
+        """질문/답변 한 쌍을 사용자 메모리에 색인"""
+        if not user_message:
+            return
+        try:
+            answer = assistant_message or ""
+            if len(answer) > self.max_stored_answer_chars:
+                answer = answer[: self.max_stored_answer_chars] + "..."
+
+            memory_text = f"사용자: {user_message}\n어시스턴트: {answer}"
+            metadata = {
+                "user_id": user_id,
+                "type": "conversation",
+                "user_message": user_message,
+                "created_at": datetime.now().isoformat(),
+            }
+            # 동기 임베딩 API 호출 + Chroma 쓰기는 스레드 풀에서 실행 (이벤트 루프 막힘 방지)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None,
+                lambda: self.memory_store.add_texts([memory_text], metadatas=[metadata]),
+            )
+        except Exception as e:
+            logger.warning(f"대화 메모리 저장 실패 (계속 진행): {e}")
+
+    async def search_relevant_exchanges(
+        self, user_id: str, query: str, exclude_messages: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """현재 질문과 관련 있는 과거 대화 검색 (해당 사용자 대화만)"""
+        exclude = set(exclude_messages or [])
+        try:
+            # 동기 Chroma 검색은 스레드 풀에서 실행 (다른 단계와 동시 진행)
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                None,
+                lambda: self.memory_store.similarity_search_with_score(
+                    query,
+                    k=self.relevant_k + len(exclude),
+                    filter={"user_id": user_id},
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"대화 메모리 검색 실패: {e}")
+            return []
+
+        exchanges = []
+        for doc, distance in results:
+            # 최근 턴으로 이미 포함될 대화는 중복 제외
+            if doc.metadata.get("user_message") in exclude:
+                continue
+            if float(distance) > self.max_distance:
+                continue
+            exchanges.append(
+                {
+                    "text": doc.page_content,
+                    "created_at": doc.metadata.get("created_at", ""),
+                    "distance": float(distance),
+                }
+            )
+            if len(exchanges) >= self.relevant_k:
+                break
+        return exchanges
+
+    async def build_context(
+        self, user_id: str, message: str, history: List[Dict]
+    ) -> Dict[str, Any]:
+        """
+        토큰 예산 안에서 프롬프트에 붙일 대화 컨텍스트 구성
+
+        Args:
+            history: SessionManager의 최근 메시지 목록 (시간순)
+
+        Returns:
+            {
+                "recent_messages": 최근 1~2턴 메시지 (API 메시지 형식),
+                "relevant_text": 관련 과거 대화 텍스트 (시스템 프롬프트용),
+                "tokens": 사용한 토큰 수 근사치
+            }
+        """
+        remaining = self.token_budget
+
+        # 1. 최근 턴 (가장 최근 것부터 예산 차감, 긴 답변은 잘라냄)
+        recent = history[-self.recent_turns * 2:] if self.recent_turns > 0 else []
+        per_message_budget = max(self.token_budget // max(len(recent) * 2, 1), 1)
+        recent_messages = []
+        for msg in reversed(recent):
+            content = self._truncate(msg.get("content", ""), per_message_budget)
+            cost = estimate_tokens(content)
+            if cost > remaining:
+                break
+            remaining -= cost
+            recent_messages.insert(0, {"role": msg["role"], "content": content})
+
+        # 2. 관련 과거 대화 (남은 예산 안에서 관련도 순으로)
+        recent_user_messages = [
+            m.get("content") for m in recent if m.get("role") == "user"
+        ]
+        relevant_parts = []
+        if remaining > 0:
+            exchanges = await self.search_relevant_exchanges(
+                user_id, message, exclude_messages=recent_user_messages
+            )
+            for exchange in exchanges:
+                cost = estimate_tokens(exchange["text"])
+                if cost > remaining:
+                    continue
+                remaining -= cost
+                relevant_parts.append(exchange["text"])
+
+        return {
+            "recent_messages": recent_messages,
+            "relevant_text": "\n\n".join(relevant_parts),
+            "tokens": self.token_budget - remaining,
+        }
+
+    def forget(self, user_id: str):
+        """사용자 대화 메모리 전체 삭제"""
+        try:
+            self.memory_store._collection.delete(where={"user_id": user_id})
+        except Exception as e:
+            logger.warning(f"대화 메모리 삭제 실패: {e}")
@@ -0,0 +1,197 @@
+"""
+임베딩 마이크로 배치
+
+부하가 몰리면 OpenAIService.generate_single_embedding, CacheService 조회, VectorService 검색이
+요청마다 입력 1개짜리 임베딩 API를 따로 호출해서 요청 수와 꼬리 지연(p95)이 함께 늘어났습니다.
+
+EmbeddingBatcher는 몇 ms 동안(또는 N개가 모일 때까지) 들어온 임베딩 요청을 모아
+한 번의 배치 API 호출로 보내고, 결과를 기다리던 요청(future)에 나눠 줍니다.
+- 같은 배치 안의 같은 텍스트는 한 번만 임베딩
+- 배치 호출이 실패하면 그 배치를 기다리던 요청 모두에 같은 예외 전달
+- 모델별로 하나씩 (같은 벡터 공간끼리만 묶음)
+
+LangChain Embeddings를 받는 곳(VectorService의 Chroma 등)은 BatchedEmbeddings 어댑터를 씁니다.
+동기 embed_query가 executor 스레드에서 호출되면 이벤트 루프의 배치로 넘기고,
+이벤트 루프 스레드에서 직접 호출되면(막힘 방지) 감싼 임베딩으로 바로 계산합니다.
+
+사용법:
+    from .embedding_batcher import get_embedding_batcher
+    vector = await get_embedding_batcher("text-embedding-3-small").embed(text)
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from .llm_gateway import llm_gateway
+from ..config.llm_config import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """짧은 시간 동안 모인 임베딩 요청을 한 번의 API 호출로 묶는 배치기"""
+
+    # 모델 → 인스턴스 (지표 일괄 조회용)
+    _registry: Dict[str, "EmbeddingBatcher"] = {}
+
+    def __init__(
+        self,
+        model: str = LLMConfig.EMBEDDING_MODEL,
+        max_batch_size: int = LLMConfig.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms: float = LLMConfig.EMBEDDING_BATCH_MAX_WAIT_MS,
+        llm=None,
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.llm = llm or llm_gateway
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # 배치가 실행되는 이벤트 루프
+        self._pending: List[tuple] = []  # (텍스트, future)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.metrics = {
+            "requests": 0,      # embed() 요청 수 (입력 개수)
+            "api_calls": 0,     # 실제 임베딩 API 호출 수
+            "deduplicated": 0,  # 배치 안에서 중복이라 다시 보내지 않은 입력 수
+            "errors": 0,        # 실패한 배치 호출 수
+            "max_batch": 0,     # 한 번에 보낸 최대 입력 수
+        }
+        EmbeddingBatcher._registry[model] = self
+
+    async def embed(self, text: str) -> List[float]:
+        """텍스트 하나 임베딩 (다른 요청과 묶여서 호출됨)"""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # 다른 루프(테스트/스크립트의 asyncio.run 등)에서 쓰면 그 루프로 옮김
+            self.loop = loop
+            self._pending = []
+            self._flush_handle = None
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.metrics["requests"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """여러 텍스트 임베딩 (입력 순서 유지, 동시에 들어온 다른 요청과 함께 묶임)"""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def _flush(self):
+        """모인 요청을 배치 호출 작업으로 넘김"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[tuple]):
+        """배치 API 호출 후 결과를 각 요청의 future에 전달"""
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self.metrics["api_calls"] += 1
+        self.metrics["deduplicated"] += len(batch) - len(unique_texts)
+        self.metrics["max_batch"] = max(self.metrics["max_batch"], len(unique_texts))
+        try:
+            vectors = await self.llm.embeddings("embedding_batcher", self.model, unique_texts)
+        except Exception as e:
+            self.metrics["errors"] += 1
+            logger.error(f"임베딩 배치 호출 실패 ({self.model}, {len(unique_texts)}개): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, vectors))
+        for text, future in batch:
+            if not future.done():  # 요청이 취소된 경우
+                future.set_result(by_text[text])
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = self.metrics["requests"]
+        return {
+            "model": self.model,
+            **self.metrics,
+            "pending": len(self._pending),
+            "requests_per_call": (
+                round(requests / self.metrics["api_calls"], 2) if self.metrics["api_calls"] else 0.0
+            ),
+        }
+
+    @classmethod
+    def all_stats(cls) -> List[Dict[str, Any]]:
+        return [batcher.get_stats() for batcher in cls._registry.values()]
+
+
+_registry_lock = threading.Lock()
+
+# 앱 이벤트 루프 (executor 스레드의 동기 embed_query를 넘길 곳, 앱 시작 시 bind_event_loop로 지정)
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def bind_event_loop(loop: Optional[asyncio.AbstractEventLoop] = None):
+    """동기 어댑터가 배치를 넘길 이벤트 루프 지정 (앱 startup에서 호출)"""
+    global _event_loop
+    _event_loop = loop or asyncio.get_running_loop()
+
+
+def get_embedding_batcher(model: str = LLMConfig.EMBEDDING_MODEL) -> EmbeddingBatcher:
+    """모델별 공용 배치기 (없으면 생성)"""
+    batcher = EmbeddingBatcher._registry.get(model)
+    if batcher is None:
+        with _registry_lock:
+            batcher = EmbeddingBatcher._registry.get(model) or EmbeddingBatcher(model)
+    return batcher
+
+
+class BatchedEmbeddings:
+    """
+    LangChain Embeddings 호환 어댑터 (Chroma embedding_function 등)
+
+    embed_query는 배치기로 묶고, 이미 여러 개를 한 번에 보내는 embed_documents(색인)는
+    감싼 임베딩을 그대로 사용합니다. 감싼 임베딩의 model과 같은 모델로 배치해야
+    기존 색인과 같은 벡터 공간이 유지됩니다.
+    """
+
+    def __init__(self, embeddings, batcher: Optional[EmbeddingBatcher] = None, timeout: float = 30.0):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", LLMConfig.EMBEDDING_MODEL)
+        self.batcher = batcher or get_embedding_batcher(self.model)
+        self.timeout = timeout
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        loop = _event_loop or self.batcher.loop
+        if loop is None or loop.is_closed() or not loop.is_running() or self._in_loop_thread(loop):
+            # 배치 루프가 없거나 루프 스레드 자체에서 호출됨 → 기다리면 교착되므로 직접 계산
+            return self.embeddings.embed_query(text)
+        future = asyncio.run_coroutine_threadsafe(self.batcher.embed(text), loop)
+        return future.result(timeout=self.timeout)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.batcher.embed_many(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.batcher.embed(text)
+
+    @staticmethod
+    def _in_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def __getattr__(self, name):
+        # 그 밖의 속성(model, dimensions 등)은 감싼 임베딩 것을 사용
+        return getattr(self.embeddings, name)
@@ -5,7 +5,7 @@ from typing import Dict, Optional
 from datetime import datetime
 from .prompt_service import prompt_service_instance
 from ..config.emotion_config import EmotionConfig
-from openai import AsyncOpenAI
+from .llm_gateway import llm_gateway
 import os
 from dotenv import load_dotenv
 
@@ -34,7 +34,7 @@ class EmotionAnalysisService:
             else None
         )
         self.prompt_service = prompt_service_instance
-        self.openai_client = AsyncOpenAI() if os.getenv("OPENAI_API_KEY") else None
+        self.llm = llm_gateway if llm_gateway.available else None  # 공유 LLM 게이트웨이
         
         # 설정에서 로드 (하드코딩 제거)
         self.emotion_models = EmotionConfig.get_emotion_models()
@@ -116,7 +116,7 @@ class EmotionAnalysisService:
         quick_result = await self.analyze_emotion_quick(text)
 
         # 2단계: 확신도가 낮거나 LLM 요청시 정밀 분석
-        if use_llm and self.openai_client and quick_result.get("confidence", 0) < 0.8:
+        if use_llm and self.llm and quick_result.get("confidence", 0) < 0.8:
             llm_result = await self._llm_emotion_analysis(text, quick_result)
             return {**quick_result, "llm_enhancement": llm_result}
 
@@ -134,12 +134,15 @@ class EmotionAnalysisService:
                 {"role": "user", "content": f"분석할 텍스트: {text}"},
             ]
 
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4o-mini", messages=messages, temperature=0.3
+            detailed_analysis = await self.llm.chat(
+                caller="emotion_service",
+                model="gpt-4o-mini",
+                messages=messages,
+                temperature=0.3,
             )
 
             return {
-                "detailed_analysis": response.choices[0].message.content,
+                "detailed_analysis": detailed_analysis,
                 "method": "llm_enhanced",
             }
 
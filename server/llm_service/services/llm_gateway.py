@@ -0,0 +1,257 @@
+"""
+공용 비동기 LLM 게이트웨이
+
+서비스마다 OpenAI 클라이언트를 따로 만들고, 일부는 동기 클라이언트를 async 함수 안에서
+호출해서 LLM 응답을 기다리는 몇 초 동안 uvicorn 워커 전체가 멈췄습니다.
+
+모든 OpenAI 호출은 이 모듈을 거칩니다.
+- 연결 풀을 공유하는 AsyncOpenAI 클라이언트 하나 (프로세스당 1개, 첫 호출 시 생성)
+- 전역 Semaphore + 모델별 Semaphore로 동시 호출 수 제한
+- 호출 위치(caller)별 지연시간/대기시간/오류 지표
+- 호출 위치별 입력 토큰 / 프롬프트 캐시 적중 토큰(cached_tokens) 집계
+- 재시도 / 서킷 브레이커 / 헤지 요청 (services/resilience.py, 호출 위치별 정책)
+
+사용법:
+    from .llm_gateway import llm_gateway
+    content = await llm_gateway.chat(
+        caller="query_transformer", model="gpt-4o-mini", messages=messages, max_tokens=20
+    )
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+
+from .resilience import resilience
+from ..config.llm_config import LLMConfig
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGateway:
+    """공유 AsyncOpenAI 클라이언트 + 동시 실행 제한 + 호출 지표"""
+
+    def __init__(self, max_concurrency: int = LLMConfig.MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._client: Optional[AsyncOpenAI] = None
+        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+        self._model_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._in_flight = 0
+
+    @property
+    def available(self) -> bool:
+        """API 키가 설정되어 LLM을 호출할 수 있는지"""
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=LLMConfig.BASE_URL,  # 로컬 스텁 서버 등 (없으면 기본 주소)
+                timeout=LLMConfig.TIMEOUT_SECONDS,
+                max_retries=0,  # 재시도는 resilience 정책으로 (SDK 내장 재시도와 겹치지 않도록)
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=LLMConfig.MAX_CONNECTIONS,
+                        max_keepalive_connections=LLMConfig.MAX_KEEPALIVE_CONNECTIONS,
+                    ),
+                    timeout=LLMConfig.TIMEOUT_SECONDS,
+                ),
+            )
+        return self._client
+
+    def _model_semaphore(self, model: str) -> asyncio.Semaphore:
+        if model not in self._model_semaphores:
+            self._model_semaphores[model] = asyncio.Semaphore(
+                LLMConfig.get_model_concurrency(model)
+            )
+        return self._model_semaphores[model]
+
+    def _metric(self, caller: str, model: str) -> Dict[str, Any]:
+        key = f"{caller}:{model}"
+        if key not in self._metrics:
+            self._metrics[key] = {
+                "caller": caller,
+                "model": model,
+                "calls": 0,
+                "errors": 0,
+                "latency_ms": deque(maxlen=LLMConfig.LATENCY_SAMPLE_SIZE),
+                "wait_ms": deque(maxlen=LLMConfig.LATENCY_SAMPLE_SIZE),
+                "prompt_tokens": 0,
+                "cached_tokens": 0,
+            }
+        return self._metrics[key]
+
+    @asynccontextmanager
+    async def _slot(self, caller: str, model: str):
+        """모델 → 전역 순서로 자리를 잡고, 대기/실행 시간을 기록
+
+        모델 자리부터 잡아야 한 모델에 몰린 요청이 전역 자리를 쥔 채 기다리면서
+        다른 모델 호출까지 막는 일이 없습니다.
+        """
+        metric = self._metric(caller, model)
+        queued = time.perf_counter()
+        async with self._model_semaphore(model), self._global_semaphore:
+            started = time.perf_counter()
+            metric["wait_ms"].append((started - queued) * 1000)
+            metric["calls"] += 1
+            self._in_flight += 1
+            try:
+                yield
+            except Exception:
+                metric["errors"] += 1
+                raise
+            finally:
+                self._in_flight -= 1
+                metric["latency_ms"].append((time.perf_counter() - started) * 1000)
+
+    def _record_usage(self, caller: str, model: str, usage: Any):
+        """API가 알려준 입력 토큰 / 프롬프트 캐시 적중 토큰 기록"""
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        if isinstance(details, dict):
+            cached_tokens = details.get("cached_tokens") or 0
+        else:
+            cached_tokens = getattr(details, "cached_tokens", 0) or 0
+
+        metric = self._metric(caller, model)
+        metric["prompt_tokens"] += prompt_tokens
+        metric["cached_tokens"] += cached_tokens
+        logger.info(f"💾 프롬프트 캐시 {caller}:{model} - 입력 {prompt_tokens} 토큰 중 {cached_tokens} 토큰 적중")
+
+    def _hedge_delay_ms(self, caller: str, model: str) -> Optional[float]:
+        """헤지 요청 기준 지연: 해당 호출 위치의 최근 p95 (표본이 부족하면 None)"""
+        policy = LLMConfig.get_resilience_policy(caller)
+        if not policy["hedge"]:
+            return None
+        samples = sorted(self._metric(caller, model)["latency_ms"])
+        if len(samples) < policy["hedge_min_samples"]:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    async def chat_completion(self, caller: str, model: str, messages: List[Dict[str, Any]], **kwargs):
+        """chat.completions.create 원본 응답 반환 (재시도/차단/헤지 적용)"""
+
+        async def attempt():
+            async with self._slot(caller, model):
+                return await self.client.chat.completions.create(
+                    model=model, messages=messages, **kwargs
+                )
+
+        response = await resilience.execute(
+            caller, attempt, hedge_delay_ms=self._hedge_delay_ms(caller, model)
+        )
+        self._record_usage(caller, model, getattr(response, "usage", None))
+        return response
+
+    async def chat(self, caller: str, model: str, messages: List[Dict[str, Any]], **kwargs) -> str:
+        """첫 번째 선택지의 응답 텍스트 반환"""
+        response = await self.chat_completion(caller, model, messages, **kwargs)
+        return response.choices[0].message.content
+
+    async def chat_stream(
+        self, caller: str, model: str, messages: List[Dict[str, Any]], **kwargs
+    ) -> AsyncIterator[str]:
+        """stream=True 응답을 토큰 조각 단위로 전달 (스트림이 끝날 때까지 동시 실행 슬롯 유지)"""
+        # 마지막 청크로 토큰 사용량(캐시 적중 포함)을 받음
+        kwargs.setdefault("stream_options", {"include_usage": True})
+
+        async def attempt():
+            # 연결 시도마다 자리를 잡고, 실패하면 바로 놓아서 재시도 대기 중에는 자리를 쥐지 않음
+            stack = AsyncExitStack()
+            await stack.enter_async_context(self._slot(caller, model))
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=model, messages=messages, stream=True, **kwargs
+                )
+            except BaseException:
+                await stack.__aexit__(*sys.exc_info())
+                raise
+            return stream, stack
+
+        # 스트림 연결까지만 재시도 (토큰을 보내기 시작한 뒤에는 재시도하지 않음)
+        stream, stack = await resilience.execute(caller, attempt)
+        async with stack:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self._record_usage(caller, model, chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+    async def embeddings(self, caller: str, model: str, texts: List[str]) -> List[List[float]]:
+        """여러 텍스트 임베딩 (입력 순서 유지)"""
+
+        async def attempt():
+            async with self._slot(caller, model):
+                return await self.client.embeddings.create(model=model, input=texts)
+
+        response = await resilience.execute(caller, attempt)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """호출 위치/모델별 지연시간(p50/p95), 대기시간, 프롬프트 캐시 적중 지표"""
+
+        def summarize(samples) -> Dict[str, float]:
+            values = sorted(samples)
+            if not values:
+                return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+            return {
+                "p50": round(statistics.median(values), 1),
+                "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+                "max": round(values[-1], 1),
+            }
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "model_limits": {
+                model: LLMConfig.get_model_concurrency(model) for model in self._model_semaphores
+            },
+            "calls": [
+                {
+                    "caller": metric["caller"],
+                    "model": metric["model"],
+                    "calls": metric["calls"],
+                    "errors": metric["errors"],
+                    "latency_ms": summarize(metric["latency_ms"]),
+                    "wait_ms": summarize(metric["wait_ms"]),
+                    "prompt_tokens": metric["prompt_tokens"],
+                    "cached_tokens": metric["cached_tokens"],
+                    "cache_hit_ratio": (
+                        round(metric["cached_tokens"] / metric["prompt_tokens"], 4)
+                        if metric["prompt_tokens"] else 0.0
+                    ),
+                }
+                for metric in self._metrics.values()
+            ],
+            "resilience": resilience.get_metrics(),
+        }
+
+    async def close(self):
+        """연결 풀 정리 (앱 shutdown에서 호출)"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# 전역 인스턴스
+llm_gateway = LLMGateway()
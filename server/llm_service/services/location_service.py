@@ -3,6 +3,7 @@
 GPS 위치추적, 거리계산, 실제 지역 기반 커뮤니티 매칭
 """
 
+import asyncio
 import requests
 import math
 import json
@@ -315,7 +316,11 @@ class LocationService:
                 "sort": "random"  # 거리순 정렬은 좌표 없이는 어려움
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            # requests는 동기 호출이므로 스레드 풀에서 실행 (다른 단계와 동시 진행)
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: requests.get(url, headers=headers, params=params)
+            )
             
             if response.status_code == 200:
                 data = response.json()
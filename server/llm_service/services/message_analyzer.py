@@ -0,0 +1,188 @@
+"""
+메시지 분석 서비스 (한 번의 구조화 LLM 호출)
+
+장소를 찾는 채팅 한 턴에서 ScheduleParser.parse_with_ai(일정 추출)와
+QueryTransformer.transform_query(검색 키워드 변환)가 각각 긴 프롬프트로 LLM을 호출하고,
+마지막에 답변 생성 호출까지 모두 세 번 호출하던 것을 분석 호출 하나로 합칩니다.
+
+한 번의 JSON 응답으로 다음을 함께 받습니다.
+- intent / urgency: classify_intent_and_urgency에 전달
+- schedule: 일정 처리 (parse_with_ai와 같은 형식)
+- place_keyword: 네이버 장소 검색 키워드 (transform_query와 같은 규칙)
+
+규칙 우선 단계(cascade):
+1. ScheduleParser 시간 문법 + 장소 키워드 규칙으로 먼저 분석 (LLM 호출 없음)
+2. 시간/참석 요청 표현이 없거나 규칙 confidence가 충분하면 규칙 결과 사용 ("안녕하세요" 등)
+3. 일정이 애매한 경우에만 분석 LLM 호출
+4. 일정은 확실한데 장소 질문의 검색 키워드만 못 찾았으면 QueryTransformer로 변환
+   (정규화한 질문 기준으로 캐시되므로 반복되는 장소 질문은 LLM 호출 없음)
+
+LLM을 쓸 수 없거나 호출/파싱에 실패하면 규칙 결과를 사용합니다.
+"""
+
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .llm_gateway import llm_gateway
+from .schedule_parser import ScheduleParser
+from .query_transformer import QueryTransformer
+from ..config.keyword_config import KeywordConfig
+
+logger = logging.getLogger(__name__)
+
+URGENCY_LEVELS = ("low", "medium", "high")
+
+ANALYZER_SYSTEM_PROMPT = (
+    "당신은 공동육아 채팅 메시지를 분석하는 전문가입니다. "
+    "의도, 긴급도, 일정 정보, 장소 검색 키워드를 추출해 JSON 형식으로만 응답하세요."
+)
+
+ANALYZER_PROMPT = """메시지: {message}
+현재 시각: {now}
+
+JSON 필드:
+- intent: {intents} 중 하나
+- urgency: low / medium / high (아이 건강 이상·응급은 high)
+- time: ISO 형식 시간 (오늘/내일/주말/저녁/오전/오후 등 상대 표현 포함) 또는 null
+- location: 모임 장소명 (설명 제외) 또는 null
+- activity: 활동 내용 또는 null
+- participants_needed: 함께할 사람을 찾는 표현(모임, 만나요, 함께, 나와주세요 등)이 있으면 true
+- rsvp_required: 참석 여부를 묻는 표현(누구, 가실분, 참석 가능 등)이 있으면 true
+- place_keyword: 장소를 찾는 질문이면 지도 검색용 핵심 키워드 1~3단어 (예: "5살 아이와 가기 좋은 공원" → "공원"), 아니면 null
+"""
+
+
+class MessageAnalyzer:
+    """의도 / 긴급도 / 일정 / 장소 키워드를 한 번의 LLM 호출로 추출하는 서비스"""
+
+    def __init__(
+        self,
+        schedule_parser: Optional[ScheduleParser] = None,
+        query_transformer: Optional[QueryTransformer] = None,
+        model: str = "gpt-4o-mini",
+    ):
+        self.llm = llm_gateway if llm_gateway.available else None
+        self.schedule_parser = schedule_parser or ScheduleParser()
+        self.query_transformer = query_transformer or QueryTransformer()
+        self.model = model
+        self.intents = list(KeywordConfig.get_intent_keywords().keys())
+        # 긴 단어 우선 ("키즈카페"가 "카페"보다 먼저 매칭되도록)
+        self.place_words = sorted(
+            {word for words in KeywordConfig.get_place_keywords().values() for word in words},
+            key=len,
+            reverse=True,
+        )
+        self.stats = {"rules": 0, "llm": 0, "keyword_transform": 0}
+
+    async def analyze(self, message: str, intent_hint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        메시지 분석 (규칙 우선, 애매한 메시지만 LLM)
+
+        Args:
+            intent_hint: 키워드 기반 의도 (장소 질문이면 검색 키워드가 필요한지 판단)
+
+        Returns:
+            {
+                "intent": "place",            # 알 수 없으면 None (키워드 분류 사용)
+                "urgency": "low",             # 알 수 없으면 None
+                "schedule": {...},            # parse_with_ai와 같은 형식
+                "place_keyword": "공원",       # 장소 질문이 아니면 None
+                "source": "llm" | "rules"
+            }
+        """
+        rules = self.analyze_basic(message)
+        if not self.llm or not self.needs_llm(rules, intent_hint):
+            self.stats["rules"] += 1
+            return rules
+
+        if not self.schedule_parser.needs_llm(rules["schedule"]):
+            # 일정은 규칙으로 충분하고 장소 검색 키워드만 필요 → 캐시되는 키워드 변환
+            self.stats["keyword_transform"] += 1
+            rules["place_keyword"] = await self.query_transformer.transform_query(message)
+            return rules
+
+        self.stats["llm"] += 1
+        try:
+            response = await self.llm.chat_completion(
+                caller="message_analyzer",
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": ANALYZER_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": ANALYZER_PROMPT.format(
+                            message=message,
+                            now=datetime.now().strftime("%Y-%m-%dT%H:%M"),
+                            intents=" / ".join(self.intents),
+                        ),
+                    },
+                ],
+                temperature=0.1,
+                max_tokens=250,
+                response_format={"type": "json_object"},  # JSON 형식 강제
+            )
+            return self._from_llm(json.loads(response.choices[0].message.content), message)
+
+        except Exception as e:
+            logger.error(f"메시지 분석 실패 (규칙 기반으로 폴백): {e}")
+            return rules
+
+    def analyze_basic(self, message: str) -> Dict[str, Any]:
+        """규칙 기반 분석 (의도/긴급도는 키워드 분류에 맡김)"""
+        return {
+            "intent": None,
+            "urgency": None,
+            "schedule": self.schedule_parser.extract_schedule_info(message),
+            "place_keyword": next((word for word in self.place_words if word in message), None),
+            "source": "rules",
+        }
+
+    def needs_llm(self, rules: Dict[str, Any], intent_hint: Optional[str] = None) -> bool:
+        """규칙 분석만으로 부족한 메시지인지 (애매한 일정 / 키워드 없는 장소 질문)"""
+        if self.schedule_parser.needs_llm(rules["schedule"]):
+            return True
+        return intent_hint == "place" and not rules["place_keyword"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """규칙으로 끝난 메시지 / LLM까지 간 메시지 수 + 키워드 캐시 히트율"""
+        total = sum(self.stats.values())
+        return {
+            **self.stats,
+            "total": total,
+            "llm_ratio": round(self.stats["llm"] / total, 4) if total else 0.0,
+            "keyword_cache": self.query_transformer.get_stats(),
+        }
+
+    def _from_llm(self, data: Dict[str, Any], message: str) -> Dict[str, Any]:
+        """LLM JSON 응답 검증 후 내부 형식으로 변환 (잘못된 값은 None)"""
+        intent = data.get("intent")
+        urgency = data.get("urgency")
+
+        schedule = self.schedule_parser.finalize_ai_result(
+            {
+                "time": data.get("time"),
+                "location": data.get("location"),
+                "activity": data.get("activity"),
+                "participants_needed": bool(data.get("participants_needed")),
+                "rsvp_required": bool(data.get("rsvp_required")),
+            },
+            message,
+        )
+
+        place_keyword = data.get("place_keyword")
+        if place_keyword and place_keyword != "null":
+            # transform_query와 같은 후처리: 특수문자 제거, 20자 제한
+            place_keyword = re.sub(r"[^가-힣\w\s]", "", str(place_keyword)).strip()[:20]
+        else:
+            place_keyword = None
+
+        return {
+            "intent": intent if intent in self.intents else None,
+            "urgency": urgency if urgency in URGENCY_LEVELS else None,
+            "schedule": schedule,
+            "place_keyword": place_keyword or None,
+            "source": "llm",
+        }
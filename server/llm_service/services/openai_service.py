@@ -1,11 +1,18 @@
 import os
-from typing import List, Dict, Any
-from openai import OpenAI
+from typing import List, Dict, Any, AsyncIterator
 from dotenv import load_dotenv
 from .prompt_service import PromptService
+from .llm_gateway import llm_gateway
+from .embedding_batcher import get_embedding_batcher
 
 load_dotenv()
-client = OpenAI()
+
+# 응답 생성에 실패했을 때 사용자에게 보여 주는 문구 (캐시에 저장하면 안 됨)
+FALLBACK_RESPONSE = "죄송합니다. 응답을 생성하는 중 오류가 발생했습니다."
+
+
+class ChatGenerationError(Exception):
+    """채팅 응답 생성 실패 (사과 문구 대신 호출한 쪽에서 처리, 예: 캐시 저장 생략)"""
 
 
 class OpenAIService:
@@ -14,35 +21,65 @@ class OpenAIService:
         if not api_key:
             raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
 
-        self.client = OpenAI(api_key=api_key)
+        self.llm = llm_gateway  # 공유 비동기 클라이언트 + 동시 실행 제한
         self.chat_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.embedding_model = os.getenv(
             "OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"
         )
         self.prompt_service = PromptService()
 
-    async def generate_chat_response(self, messages: List[Dict[str, str]]) -> str:
-        """채팅 응답 생성"""
+    async def generate_chat_response(
+        self, messages: List[Dict[str, str]], fallback: bool = True
+    ) -> str:
+        """
+        채팅 응답 생성
+
+        Args:
+            fallback: True면 실패 시 사과 문구(FALLBACK_RESPONSE) 반환,
+                      False면 ChatGenerationError 발생 (결과를 캐시/공유하는 호출용)
+        """
         try:
-            response = self.client.chat.completions.create(
+            return await self.llm.chat(
+                caller="openai_service.chat",
                 model=self.chat_model,
                 messages=messages,
                 temperature=0.7,
                 max_tokens=1000,
             )
-            return response.choices[0].message.content
 
         except Exception as e:
             print(f"OpenAI 채팅 응답 생성 오류: {e}")
-            return "죄송합니다. 응답을 생성하는 중 오류가 발생했습니다."
+            if not fallback:
+                raise ChatGenerationError(str(e)) from e
+            return FALLBACK_RESPONSE
+
+    async def stream_chat_response(
+        self, messages: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        """채팅 응답을 토큰 조각 단위로 스트리밍 (SSE 응답에서 사용)"""
+        async for delta in self.llm.chat_stream(
+            caller="openai_service.chat_stream",
+            model=self.chat_model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1000,
+        ):
+            yield delta
+
+    async def chat(self, messages: List[Dict[str, str]]) -> str:
+        """
+        단순 채팅 응답 생성 (/chat/chat, 캐시 예열에서 사용)
+
+        답변을 캐시에 저장하는 호출이므로 실패 시 사과 문구 대신 ChatGenerationError를 발생시킵니다.
+        """
+        return await self.generate_chat_response(messages, fallback=False)
 
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """텍스트 임베딩 생성"""
         try:
-            response = self.client.embeddings.create(
-                model=self.embedding_model, input=texts
+            return await self.llm.embeddings(
+                "openai_service.embeddings", self.embedding_model, texts
             )
-            return [data.embedding for data in response.data]
 
         except Exception as e:
             print(f"OpenAI 임베딩 생성 오류: {e}")
@@ -51,10 +88,8 @@ class OpenAIService:
     async def generate_single_embedding(self, text: str) -> List[float]:
         """단일 텍스트 임베딩 생성"""
         try:
-            response = self.client.embeddings.create(
-                model=self.embedding_model, input=[text]
-            )
-            return response.data[0].embedding
+            # 동시에 들어온 단건 요청들과 묶어서 한 번에 호출
+            return await get_embedding_batcher(self.embedding_model).embed(text)
 
         except Exception as e:
             print(f"OpenAI 단일 임베딩 생성 오류: {e}")
@@ -69,13 +104,13 @@ class OpenAIService:
             )
             emergency_prompt = emergency_prompt_template.format(situation=message)
 
-            response = self.client.chat.completions.create(
+            return await self.llm.chat(
+                caller="openai_service.emergency",
                 model=self.chat_model,
                 messages=[{"role": "user", "content": emergency_prompt}],
                 temperature=0.3,  # 응급 상황이므로 창의성보다 정확성 중시
                 max_tokens=500,
             )
-            return response.choices[0].message.content
 
         except Exception as e:
             print(f"응급 상황 판단 오류: {e}")
@@ -89,7 +124,8 @@ class OpenAIService:
             # 이미지를 base64로 인코딩
             base64_image = base64.b64encode(image_data).decode()
 
-            response = self.client.chat.completions.create(
+            return await self.llm.chat(
+                caller="openai_service.image_emergency",
                 model="gpt-4-vision-preview",
                 messages=[
                     {
@@ -111,7 +147,6 @@ class OpenAIService:
                 temperature=0.3,
                 max_tokens=400,
             )
-            return response.choices[0].message.content
 
         except Exception as e:
             print(f"응급 이미지 분석 오류: {e}")
@@ -0,0 +1,258 @@
+"""
+토큰 예산 기반 프롬프트 조합기
+
+PromptService.get_system_prompt는 의도 카테고리의 모든 프롬프트와 RAG 검색 결과를 그대로 붙이고,
+여기에 네이버 장소 정보와 대화 기록까지 더해지므로 요청마다 입력 크기(지연 시간/비용)가 제각각이었습니다.
+
+PromptAssembler는 프롬프트를 섹션으로 나눠 토큰을 세고 섹션별 예산 안에서 조합합니다.
+- system: PromptService가 미리 조합한 의도별 정적 프롬프트 (줄이지 않음, 항상 맨 앞)
+- rag: 검색 순위가 낮은 문서부터 제외
+- places: 뒤쪽 장소부터 제외
+- memory: 관련도가 낮은 과거 대화부터 제외
+- history: 오래된 메시지부터 제외
+
+1. 각 섹션을 PromptBudgetConfig.SECTION_BUDGETS 안으로 줄이고
+2. 합계가 TOTAL_BUDGET을 넘으면 TRIM_ORDER(우선순위 낮은 섹션부터) 순서로 더 줄입니다.
+마지막으로 남는 항목은 통째로 빼는 대신 남은 예산만큼 잘라서 붙입니다.
+
+메시지 순서는 [정적 시스템 프롬프트] + [대화 기록] + [참고 정보] + [사용자 메시지]입니다.
+요청마다 바뀌는 참고 정보를 뒤쪽 별도 메시지로 분리해 접두부가 바이트 단위로 같게 유지되므로
+OpenAI 프롬프트 캐시(cached_tokens)가 적용됩니다.
+
+토큰 수는 tiktoken이 설치되어 있으면 실제 인코딩으로, 없으면 오프라인 근사치로 계산합니다.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .conversation_memory_service import estimate_tokens
+from ..config.prompt_budget_config import PromptBudgetConfig
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성: 없으면 오프라인 근사치 사용
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# 채팅 메시지 하나당 역할/구분자 토큰 (OpenAI 채팅 형식 기준 근사치)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+PLACES_GUIDE = "\n위 실제 장소 정보를 참고하여 구체적이고 정확한 추천을 해주세요."
+
+
+class TokenCounter:
+    """tiktoken 인코딩 또는 오프라인 근사치로 토큰 수 계산"""
+
+    def __init__(self, model: str = PromptBudgetConfig.TOKENIZER_MODEL):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self.encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # 인코딩 파일을 내려받지 못하는 환경 (오프라인 등)
+                logger.warning(f"tiktoken 인코딩 로드 실패 (근사치 사용): {e}")
+                self.encoding = None
+        self.name = "tiktoken" if self.encoding is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return estimate_tokens(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """토큰 예산에 맞춰 텍스트 앞부분만 남기기"""
+        if self.count(text) <= max_tokens:
+            return text
+        if max_tokens <= 1:
+            return ""
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text)[: max_tokens - 1]) + "..."
+        # estimate_tokens 기준 (2자당 1토큰)
+        return text[: max(max_tokens * 2 - 5, 0)] + "..."
+
+
+class PromptAssembler:
+    """섹션별 토큰 예산 안에서 LLM 메시지 목록을 조합하는 서비스"""
+
+    def __init__(self, prompt_service, counter: Optional[TokenCounter] = None):
+        self.prompt_service = prompt_service
+        self.counter = counter or TokenCounter()
+        self.total_budget = PromptBudgetConfig.TOTAL_BUDGET
+        self.section_budgets = PromptBudgetConfig.get_section_budgets()
+        self.trim_order = PromptBudgetConfig.get_trim_order()
+        self.min_item_tokens = PromptBudgetConfig.MIN_ITEM_TOKENS
+        self._static_tokens: Dict[str, int] = {}  # 정적 시스템 프롬프트별 토큰 수 (한 번만 계산)
+
+    def assemble(
+        self,
+        message: str,
+        intent: str,
+        context_info: Optional[List[Dict[str, Any]]] = None,
+        real_places_info: str = "",
+        relevant_text: str = "",
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """
+        예산 안에서 메시지 목록 조합
+
+        Returns:
+            (메시지 목록, 토큰 내역)
+            토큰 내역: {"system": 812, "rag": 240, "places": 0, "memory": 95, "history": 180,
+                       "message": 21, "overhead": 16, "total": 1364, "budget": 3000,
+                       "trimmed": {"rag": 2}, "tokenizer": "tiktoken" | "estimate"}
+        """
+        history = conversation_history or []
+
+        # 의도별 정적 시스템 프롬프트: 줄이지 않고 항상 같은 바이트열로 맨 앞에 둠
+        static_prompt = self.prompt_service.get_static_prompt(intent)
+        if static_prompt not in self._static_tokens:
+            self._static_tokens[static_prompt] = self.counter.count(static_prompt)
+
+        # 섹션별 항목 (앞쪽일수록 중요, history는 최신 메시지가 중요하므로 뒤집어서 보관)
+        sections = {
+            "rag": self._rag_items(context_info),
+            "places": self._split_blocks(real_places_info),
+            "memory": self._split_blocks(relevant_text),
+            "history": [m.get("content", "") for m in reversed(history)],
+        }
+
+        # 1. 섹션별 예산
+        fitted = {
+            name: self._fit(items, self.section_budgets.get(name, self.total_budget))
+            for name, items in sections.items()
+        }
+        tokens = {"system": self._static_tokens[static_prompt]}
+        tokens.update({name: self._cost(items) for name, items in fitted.items()})
+
+        # 2. 전체 예산 (우선순위 낮은 섹션부터)
+        message_tokens = self.counter.count(message)
+        overflow = (
+            sum(tokens.values()) + message_tokens + self._overhead(fitted) - self.total_budget
+        )
+        for name in self.trim_order:
+            if overflow <= 0:
+                break
+            fitted[name] = self._fit(fitted[name], max(tokens[name] - overflow, 0))
+            new_cost = self._cost(fitted[name])
+            overflow -= tokens[name] - new_cost
+            tokens[name] = new_cost
+        overhead = self._overhead(fitted)
+
+        messages = self._build(static_prompt, message, fitted, history)
+
+        breakdown = {
+            **tokens,
+            "message": message_tokens,
+            "overhead": overhead,
+            "total": sum(tokens.values()) + message_tokens + overhead,
+            "budget": self.total_budget,
+            "trimmed": {
+                name: count
+                for name in sections
+                if (count := self._trimmed_count(sections[name], fitted[name]))
+            },
+            "tokenizer": self.counter.name,
+        }
+        logger.info(f"🧮 프롬프트 토큰 내역 ({intent}): {breakdown}")
+        return messages, breakdown
+
+    def _fit(self, items: List[str], budget: int) -> List[str]:
+        """
+        앞쪽 항목부터 예산 안에 들어가는 만큼 남기기
+
+        예산이 부족한 첫 항목은 남은 예산이 충분하면 잘라서 붙이고, 이후 항목은 뺍니다.
+        """
+        kept = []
+        remaining = budget
+        for item in items:
+            cost = self.counter.count(item)
+            if cost <= remaining:
+                kept.append(item)
+                remaining -= cost
+                continue
+            if remaining >= self.min_item_tokens:
+                kept.append(self.counter.truncate(item, remaining))
+            break
+        return kept
+
+    @staticmethod
+    def _overhead(fitted: Dict[str, List[str]]) -> int:
+        """정적 시스템 프롬프트 + 대화 기록 + 참고 정보 + 사용자 메시지의 메시지 구분 토큰"""
+        has_context = any(fitted[name] for name in ("rag", "places", "memory"))
+        return MESSAGE_OVERHEAD_TOKENS * (len(fitted["history"]) + 2 + int(has_context))
+
+    def _cost(self, items: List[str]) -> int:
+        return sum(self.counter.count(item) for item in items)
+
+    @staticmethod
+    def _trimmed_count(items: List[str], kept: List[str]) -> int:
+        """빠지거나 잘린 항목 수"""
+        truncated = 1 if kept and kept[-1] != items[len(kept) - 1] else 0
+        return len(items) - len(kept) + truncated
+
+    def _build(
+        self,
+        static_prompt: str,
+        message: str,
+        fitted: Dict[str, List[str]],
+        history: List[Dict[str, str]],
+    ) -> List[Dict[str, str]]:
+        """
+        정적 시스템 프롬프트 → 대화 기록 → 참고 정보 → 사용자 메시지 순서로 구성
+
+        요청마다 바뀌는 참고 정보(RAG/장소/과거 대화)는 사용자 메시지 바로 앞의 별도 메시지로 두어
+        앞쪽 접두부(정적 프롬프트 + 대화 기록)가 OpenAI 프롬프트 캐시에 그대로 걸리도록 합니다.
+        """
+        context_parts = []
+
+        # 실시간 참고 정보(RAG 검색 결과)
+        if fitted["rag"]:
+            context_parts.append("### 추가 참고 정보:\n" + "\n".join(fitted["rag"]))
+
+        # 실제 장소 정보
+        if fitted["places"]:
+            context_parts.append("\n\n".join(fitted["places"]) + "\n" + PLACES_GUIDE)
+
+        # 관련 과거 대화
+        if fitted["memory"]:
+            context_parts.append("### 이전 대화 중 관련 내용:\n" + "\n\n".join(fitted["memory"]))
+
+        # 대화 기록은 최신 메시지부터 남겼으므로 원래 순서(시간순)로 되돌림
+        kept_history = [
+            {"role": msg["role"], "content": text}
+            for msg, text in zip(reversed(history), fitted["history"])
+        ][::-1]
+
+        context_messages = (
+            [{"role": "system", "content": "\n\n".join(context_parts)}] if context_parts else []
+        )
+        return (
+            [{"role": "system", "content": static_prompt}]
+            + kept_history
+            + context_messages
+            + [{"role": "user", "content": message}]
+        )
+
+    def _rag_items(self, context_info: Optional[List[Dict[str, Any]]]) -> List[str]:
+        """검색 결과 문서 → 순위 순 항목 (문자열로 받은 경우 문단 단위)"""
+        if not context_info:
+            return []
+        if isinstance(context_info, str):
+            return self._split_blocks(context_info)
+        return [
+            self.prompt_service.format_context_info([doc])
+            for doc in context_info
+        ]
+
+    @staticmethod
+    def _split_blocks(text: str) -> List[str]:
+        """빈 줄로 구분된 블록 목록 (장소 하나 / 과거 대화 한 쌍)"""
+        if not text:
+            return []
+        return [block.strip() for block in text.strip().split("\n\n") if block.strip()]
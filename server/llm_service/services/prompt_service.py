@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 from ..prompts.utils.prompt_loader import prompt_manager
 
 class PromptService:
@@ -6,36 +6,77 @@ class PromptService:
         # [업그레이드] PromptManager 인스턴스를 사용하여 모든 프롬프트를 관리합니다.
         # 이제 새로운 프롬프트 파일을 추가해도 이 코드를 수정할 필요가 없습니다.
         self.manager = prompt_manager
+        # 의도별 시스템 프롬프트는 로드 시점에 한 번만 조합해 두고 그대로 재사용합니다.
+        # (매 요청 같은 바이트열이어야 OpenAI 프롬프트 캐시가 접두부를 재사용할 수 있음)
+        self.compiled_prompts: Dict[str, str] = {}
+        self.compile_prompts()
 
-    def get_system_prompt(self, intent: str = "general", context_info: Optional[str] = None) -> Dict[str, str]:
+    def compile_prompts(self):
+        """로드된 모든 의도 + general의 정적 시스템 프롬프트 조합 (프롬프트를 다시 로드한 뒤 호출)"""
+        intents = [intent for intent in self.manager.prompts if intent != "base"]
+        self.compiled_prompts = {
+            intent: "".join(self.get_prompt_sections(intent))
+            for intent in ["general", *intents]
+        }
+
+    def get_static_prompt(self, intent: str = "general") -> str:
+        """의도별 정적 시스템 프롬프트 (요청마다 바이트 단위로 동일)"""
+        if intent not in self.compiled_prompts:
+            self.compiled_prompts[intent] = "".join(self.get_prompt_sections(intent))
+        return self.compiled_prompts[intent]
+
+    def get_system_prompt(self, intent: str = "general", context_info: Optional[Any] = None) -> Dict[str, str]:
         """
         주어진 의도(intent)에 따라 최종 시스템 프롬프트를 생성합니다.
         """
-        # 1. AI의 기본 정체성(base) 프롬프트를 가져옵니다.
-        base_prompt = self.manager.get_prompt('base', 'system')
-        style_prompt = self.manager.get_prompt('base', 'style')
-        safety_prompt = self.manager.get_prompt('base', 'safety')
-
-        final_prompt = f"{base_prompt}\n\n{style_prompt}\n\n{safety_prompt}"
-
-        # 2. 대화의 의도(intent)에 맞는 전문 프롬프트를 동적으로 찾아 추가합니다.
-        # 예: intent가 'schedule'이면 'schedule' 카테고리의 모든 프롬프트를 추가합니다.
-        specific_prompts = self.manager.prompts.get(intent)
-        if specific_prompts:
-            final_prompt += f"\n\n### '{intent}' 작업에 대한 특별 지침:\n"
-            for key, prompt_text in specific_prompts.items():
-                final_prompt += f"\n--- {key.upper()} ---\n{prompt_text}"
+        # 1~2. 기본 정체성(base) 프롬프트 + 의도별 전문 프롬프트 (미리 조합된 것 사용)
+        final_prompt = self.get_static_prompt(intent)
 
         # 3. 실시간 참고 정보(RAG 검색 결과 등)가 있다면 추가합니다.
         if context_info:
             final_prompt += "\n\n### 추가 참고 정보:\n"
-            final_prompt += context_info
+            final_prompt += self.format_context_info(context_info)
             
         return {
             "role": "system",
             "content": final_prompt
         }
 
+    def get_prompt_sections(self, intent: str = "general") -> List[str]:
+        """
+        시스템 프롬프트 조각 목록 (compile_prompts에서 이어 붙여 사용)
+
+        첫 조각은 AI의 기본 정체성/스타일/안전 지침이고, 나머지는 의도별 전문 프롬프트입니다.
+        """
+        # 1. AI의 기본 정체성(base) 프롬프트를 가져옵니다.
+        base_prompt = self.manager.get_prompt('base', 'system')
+        style_prompt = self.manager.get_prompt('base', 'style')
+        safety_prompt = self.manager.get_prompt('base', 'safety')
+
+        sections = [f"{base_prompt}\n\n{style_prompt}\n\n{safety_prompt}"]
+
+        # 2. 대화의 의도(intent)에 맞는 전문 프롬프트를 동적으로 찾아 추가합니다.
+        # 예: intent가 'schedule'이면 'schedule' 카테고리의 모든 프롬프트를 추가합니다.
+        specific_prompts = self.manager.prompts.get(intent) or {}
+        header = f"\n\n### '{intent}' 작업에 대한 특별 지침:\n"
+        for key, prompt_text in specific_prompts.items():
+            if not prompt_text:
+                continue
+            sections.append(f"{header}\n--- {key.upper()} ---\n{prompt_text}")
+            header = ""
+
+        return sections
+
+    @staticmethod
+    def format_context_info(context_info: Any) -> str:
+        """RAG 검색 결과(문서 목록) 또는 문자열을 프롬프트용 텍스트로 변환"""
+        if isinstance(context_info, str):
+            return context_info
+        return "\n".join(
+            f"- {doc['text']}" if isinstance(doc, dict) else f"- {doc}"
+            for doc in context_info
+        )
+
     def get_prompt_for_intent(self, intent: str, context_info: Optional[str] = None) -> Dict[str, str]:
         """get_system_prompt의 별칭으로, 일관된 인터페이스를 제공합니다."""
         return self.get_system_prompt(intent, context_info)
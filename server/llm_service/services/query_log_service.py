@@ -0,0 +1,125 @@
+"""
+질문 로그 (JSONL)
+
+캐시를 거치는 질문을 한 줄에 하나씩 기록합니다.
+cache_replay_simulator.py가 이 로그를 재생해 유사도 임계값을 조정하는 데 사용합니다.
+
+사용자 식별 정보는 남기지 않고 질문 / 의도 / 캐시 범위 / 캐시 결과만 기록합니다.
+다만 질문 원문에는 아이 이름이나 건강 정보가 들어 있을 수 있으므로 기본값은 꺼짐이며,
+임계값 튜닝이나 캐시 예열에 쓸 때만 QUERY_LOG_ENABLED=true로 켭니다.
+켜더라도 전화번호 / 이메일 / 주민등록번호 형태는 가려서 저장합니다.
+
+파일 쓰기는 요청 경로(이벤트 루프)에서 하지 않고 모아 두었다가 스레드에서 한 번에 기록합니다.
+
+한 줄 형식:
+    {"ts": "...", "query": "...", "intent": "general", "scope": "general|any|3-5세",
+     "cache_tier": "l2", "similarity": 0.93}
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 저장 전에 가리는 개인정보 패턴 → 대체 문자열
+REDACTION_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "[이메일]"),
+    (re.compile(r"\d{6}\s*-\s*[1-4]\d{6}"), "[주민번호]"),
+    (re.compile(r"01[016789][-\s.]?\d{3,4}[-\s.]?\d{4}"), "[전화번호]"),
+]
+
+
+def redact(text: str) -> str:
+    """전화번호 / 이메일 / 주민등록번호 가리기"""
+    for pattern, replacement in REDACTION_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class QueryLogService:
+    """질문 로그 JSONL 기록/읽기"""
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None):
+        self.path = Path(path or os.getenv("QUERY_LOG_PATH", "./data/query_log.jsonl"))
+        if enabled is None:
+            enabled = os.getenv("QUERY_LOG_ENABLED", "false").lower() == "true"
+        self.enabled = enabled
+        self._lock = threading.Lock()        # 버퍼 보호 (요청 경로에서는 짧게만 잡음)
+        self._write_lock = threading.Lock()  # 파일 쓰기는 한 번에 하나씩 (줄 순서 유지)
+        self._buffer: List[str] = []  # 아직 파일에 쓰지 않은 줄
+        self._flush_scheduled = False
+
+    def log(
+        self,
+        query: str,
+        intent: str,
+        scope: str,
+        cached: Optional[Dict[str, Any]] = None,
+    ):
+        """질문 한 건 기록 (cached: search_similar_cache 결과, 미스면 None)"""
+        if not self.enabled:
+            return
+        entry = {
+            "ts": datetime.now().isoformat(),
+            "query": redact(query),
+            "intent": intent,
+            "scope": scope,
+            "cache_tier": cached["tier"] if cached else None,
+            "similarity": round(cached["similarity"], 4) if cached else None,
+        }
+        with self._lock:
+            self._buffer.append(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖(스크립트 등)에서는 바로 기록
+            self.flush()
+            return
+        loop.run_in_executor(None, self.flush)
+
+    def flush(self):
+        """모아 둔 줄을 파일에 기록 (스레드에서 실행, 기록 중에 들어온 줄까지 이어서 기록)"""
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    lines, self._buffer = self._buffer, []
+                    if not lines:
+                        self._flush_scheduled = False
+                        return
+                try:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.writelines(lines)
+                except OSError as e:
+                    # 로그 실패가 채팅 응답에 영향을 주지 않도록 경고만 남김
+                    logger.warning(f"질문 로그 기록 실패: {e}")
+
+    def iter_entries(self, path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """기록된 질문을 순서대로 읽기 (깨진 줄은 건너뜀)"""
+        log_path = Path(path) if path else self.path
+        if not log_path.exists():
+            return
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+# 전역 인스턴스
+query_log_service = QueryLogService()
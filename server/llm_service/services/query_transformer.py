@@ -3,12 +3,31 @@
 
 네비게이션 API에 전달하기 전에 자연어 쿼리에서 핵심 키워드만 추출합니다.
 예: "5살 아이와 가기 좋은 공원 추천해주세요" → "공원"
+
+장소 질문은 종류가 적고 반복되므로("근처 키즈카페 추천", "아이랑 갈만한 공원")
+변환 결과를 정규화한 질문 기준으로 메모리 LRU + 디스크(JSON)에 저장해 두고
+같은 질문은 LLM 호출(300~800ms) 없이 바로 반환합니다.
+
+- TTL: 변환 성공 30일, 키워드 없음 1일, 호출 실패 5분 (CacheConfig.KEYWORD_*)
+- 부정 캐시: 키워드를 못 찾았거나 호출에 실패한 질문도 기록해 같은 질문으로 반복 호출하지 않음
+- 재시작 후에도 유지되도록 디스크에 저장 (임시 파일 → 교체)
+  새 결과마다 파일 전체를 쓰지 않고 KEYWORD_CACHE_SAVE_DELAY_SECONDS 동안 모아서
+  스레드에서 한 번에 쓰며, 프로세스 종료 시 남은 변경을 기록합니다.
 """
 
-import re
-from typing import Optional
-from openai import AsyncOpenAI
+import asyncio
+import atexit
+import json
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .llm_gateway import llm_gateway
+from .single_flight import SingleFlight
+from ..config.cache_config import CacheConfig
 import logging
 from dotenv import load_dotenv
 
@@ -18,15 +37,144 @@ logger = logging.getLogger(__name__)
 
 
 class QueryTransformer:
-    """자연어 쿼리를 검색 키워드로 변환하는 서비스"""
+    """자연어 쿼리를 검색 키워드로 변환하는 서비스 (변환 결과 캐시)"""
     
-    def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if api_key:
-            self.openai_client = AsyncOpenAI(api_key=api_key)
+    def __init__(
+        self,
+        cache_path: Optional[str] = CacheConfig.KEYWORD_CACHE_PATH,
+        max_entries: int = CacheConfig.KEYWORD_CACHE_MAX_ENTRIES,
+    ):
+        if llm_gateway.available:
+            self.llm = llm_gateway  # 공유 비동기 클라이언트 + 동시 실행 제한
         else:
-            self.openai_client = None
+            self.llm = None
             logger.warning("OpenAI API 키가 없습니다. 기본 키워드 추출만 사용합니다.")
+
+        # 정규화한 질문 → {"keyword": str | None, "expires_at": float}, keyword None은 부정 캐시
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 파일 쓰기는 한 번에 하나씩
+        self._dirty = False                 # 디스크에 아직 쓰지 않은 변경이 있는지
+        self._save_scheduled = False
+        self.save_delay = CacheConfig.KEYWORD_CACHE_SAVE_DELAY_SECONDS
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "llm_calls": 0, "llm_errors": 0}
+        self.flight = SingleFlight("query_transformer")  # 같은 질문 동시 변환 병합
+        self._load()
+        if self.cache_path:
+            atexit.register(self.flush)
+
+    # ========== 키워드 캐시 ==========
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """CacheService.normalize_query와 같은 규칙 (대소문자/공백/끝 문장부호 무시)"""
+        normalized = " ".join(query.lower().split())
+        return re.sub(r"[\s?.!~]+$", "", normalized)
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key: str, keyword: Optional[str], ttl_seconds: int):
+        with self._lock:
+            self._cache[key] = {"keyword": keyword, "expires_at": time.time() + ttl_seconds}
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)  # 가장 오래 안 쓴 항목 제거
+            self._dirty = True
+        self._schedule_save()
+
+    def _schedule_save(self):
+        """디스크 저장 예약 (save_delay 안의 변경은 한 번에, 이벤트 루프 밖 스레드에서 기록)"""
+        if not self.cache_path:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖(스크립트 등)에서는 바로 기록
+            self.flush()
+            return
+        with self._lock:
+            if self._save_scheduled:
+                return
+            self._save_scheduled = True
+        loop.call_later(self.save_delay, self._start_save, loop)
+
+    def _start_save(self, loop: asyncio.AbstractEventLoop):
+        with self._lock:
+            self._save_scheduled = False
+        loop.run_in_executor(None, self.flush)
+
+    def flush(self):
+        """아직 쓰지 않은 변경이 있으면 디스크에 기록 (종료 시 atexit에서도 호출)"""
+        if self._dirty:
+            self._save()
+
+    def _load(self):
+        """디스크 캐시 읽기 (만료 항목 제외, 저장된 순서 = 사용 순서)"""
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"키워드 캐시 파일을 읽지 못했습니다 (빈 캐시로 시작): {e}")
+            return
+        now = time.time()
+        for key, entry in entries.items():
+            if entry.get("expires_at", 0) > now:
+                self._cache[key] = entry
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _save(self):
+        """디스크 캐시 쓰기 (중간에 실패해도 기존 파일이 깨지지 않도록 임시 파일 후 교체)"""
+        if not self.cache_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                snapshot = dict(self._cache)
+                self._dirty = False
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.cache_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                # 저장 실패가 장소 검색에 영향을 주지 않도록 경고만 남김
+                logger.warning(f"키워드 캐시 저장 실패: {e}")
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._dirty = True
+        self._schedule_save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """키워드 캐시 히트율 리포트"""
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        with self._lock:
+            entries = len(self._cache)
+            negative = sum(1 for entry in self._cache.values() if entry["keyword"] is None)
+        return {
+            **self.stats,
+            "lookups": lookups,
+            "hit_ratio": round((self.stats["hits"] + self.stats["negative_hits"]) / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "negative_entries": negative,
+            "max_entries": self.max_entries,
+            "path": str(self.cache_path) if self.cache_path else None,
+        }
     
     def extract_keyword_basic(self, query: str) -> str:
         """
@@ -57,7 +205,7 @@ class QueryTransformer:
     
     async def transform_query(self, natural_language_query: str) -> str:
         """
-        자연어 쿼리를 검색 키워드로 변환
+        자연어 쿼리를 검색 키워드로 변환 (캐시 우선)
         
         Args:
             natural_language_query: "5살 아이와 가기 좋은 공원 추천해주세요"
@@ -65,11 +213,43 @@ class QueryTransformer:
         Returns:
             "공원" (또는 "어린이 공원" 등 핵심 키워드만)
         """
-        if not self.openai_client:
+        if not self.llm:
             return self.extract_keyword_basic(natural_language_query)
-        
+
+        key = self.normalize_query(natural_language_query)
+        entry = self._cache_get(key)
+        if entry is not None:
+            if entry["keyword"] is None:
+                # 부정 캐시: 최근에 키워드를 못 찾은 질문은 LLM 없이 기본 추출
+                self.stats["negative_hits"] += 1
+                return self.extract_keyword_basic(natural_language_query)
+            self.stats["hits"] += 1
+            return entry["keyword"]
+
+        self.stats["misses"] += 1
+        keyword, _ = await self.flight.do(key, lambda: self._transform_and_cache(key, natural_language_query))
+        return keyword or self.extract_keyword_basic(natural_language_query)
+
+    async def _transform_and_cache(self, key: str, natural_language_query: str) -> Optional[str]:
+        """LLM으로 변환하고 결과(키워드 없음/실패 포함)를 캐시에 기록"""
+        self.stats["llm_calls"] += 1
         try:
-            prompt = f"""
+            keyword = await self._transform_with_llm(natural_language_query)
+        except Exception as e:
+            logger.error(f"쿼리 변환 실패: {e}")
+            self.stats["llm_errors"] += 1
+            self._cache_put(key, None, CacheConfig.KEYWORD_FAILURE_TTL_SECONDS)
+            return None
+
+        if keyword:
+            self._cache_put(key, keyword, CacheConfig.KEYWORD_CACHE_TTL_SECONDS)
+        else:
+            self._cache_put(key, None, CacheConfig.KEYWORD_NEGATIVE_TTL_SECONDS)
+        return keyword or None
+
+    async def _transform_with_llm(self, natural_language_query: str) -> str:
+        """LLM 키워드 변환 (빈 문자열이면 키워드 없음)"""
+        prompt = f"""
 다음 자연어 쿼리에서 네비게이션 검색에 사용할 핵심 키워드만 추출해주세요.
 
 쿼리: {natural_language_query}
@@ -86,34 +266,30 @@ class QueryTransformer:
 
 핵심 키워드만 반환하세요 (설명 없이):
 """
-            
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 자연어 쿼리에서 검색 키워드를 추출하는 전문가입니다. 핵심 키워드만 간결하게 반환하세요."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # 일관된 결과를 위해 낮은 temperature
-                max_tokens=20
-            )
-            
-            keyword = response.choices[0].message.content.strip()
-            
-            # 불필요한 설명 제거
-            keyword = re.sub(r'[^가-힣\w\s]', '', keyword)  # 특수문자 제거
-            keyword = keyword.strip()
-            
-            # 너무 길면 자르기
-            if len(keyword) > 20:
-                keyword = keyword[:20]
-            
-            logger.info(f"🔍 쿼리 변환: '{natural_language_query}' → '{keyword}'")
-            return keyword if keyword else self.extract_keyword_basic(natural_language_query)
-            
-        except Exception as e:
-            logger.error(f"쿼리 변환 실패: {e}")
-            return self.extract_keyword_basic(natural_language_query)
-
+        
+        response = await self.llm.chat_completion(
+            caller="query_transformer",
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "당신은 자연어 쿼리에서 검색 키워드를 추출하는 전문가입니다. 핵심 키워드만 간결하게 반환하세요."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,  # 일관된 결과를 위해 낮은 temperature
+            max_tokens=20
+        )
+        
+        keyword = response.choices[0].message.content.strip()
+        
+        # 불필요한 설명 제거
+        keyword = re.sub(r'[^가-힣\w\s]', '', keyword)  # 특수문자 제거
+        keyword = keyword.strip()
+        
+        # 너무 길면 자르기
+        if len(keyword) > 20:
+            keyword = keyword[:20]
+        
+        logger.info(f"🔍 쿼리 변환: '{natural_language_query}' → '{keyword}'")
+        return keyword
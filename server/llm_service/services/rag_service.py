@@ -1,16 +1,15 @@
 from langchain_openai import OpenAI
 from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+from .retrieval_engine import get_vector_service
+from ..config.llm_config import LLMConfig
 
 
 class RAGService:
-    def __init__(self, persist_directory: str = "./chroma_db"):
-        self.embeddings = OpenAIEmbeddings()
-        self.vector_store = Chroma(
-            persist_directory=persist_directory, embedding_function=self.embeddings
-        )
-        self.llm = OpenAI(model="gpt-4o-mini")
+    def __init__(self, vector_service=None):
+        # 별도 Chroma/임베딩을 만들지 않고 공용 검색 엔진의 저장소를 재사용
+        self.vector_service = vector_service or get_vector_service()
+        self.vector_store = self.vector_service.vector_store
+        self.llm = OpenAI(model="gpt-4o-mini", base_url=LLMConfig.BASE_URL)
         self.qa_chain = RetrievalQA.from_chain_type(
             llm=self.llm, chain_type="stuff", retriever=self.vector_store.as_retriever()
         )
@@ -3,35 +3,75 @@
 GPS 위치추적 기반으로 진짜 공동육아 플랫폼 구현
 """
 
+import asyncio
 import json
-from typing import Dict, List, Optional, Tuple
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
-from openai import OpenAI
 import os
 import sys
 from dotenv import load_dotenv
-from .vector_service import VectorService
+from .retrieval_engine import get_vector_service
+from .llm_gateway import llm_gateway
 from .location_service import location_service
 from .prompt_service import PromptService
 from .feedback_learning_service import FeedbackLearningService
 from .dynamic_prompt_selector import DynamicPromptSelector
+from ..config.cache_config import CacheConfig
 
 # 환경변수 로드
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+COMMUNITY_PROFILE_SYSTEM_PROMPT = (
+    "당신은 공동육아 플랫폼의 커뮤니티 소개를 만드는 전문가입니다. JSON 형식으로만 응답하세요."
+)
+
+# 이름과 설명을 한 번에, 여러 커뮤니티를 한 번에 생성 (커뮤니티마다 id로 구분)
+COMMUNITY_PROFILE_PROMPT = """아래 공동육아 커뮤니티마다 이름(name)과 설명(description)을 만들어주세요.
+
+{communities}
+
+이름 규칙:
+- 지역의 특성을 반영하고 부모들이 쉽게 이해할 수 있는 이름
+- 구체적인 동네명이나 아파트명은 제외, 15자 이내
+- 예시: "도봉구 품앗이", "노원구 놀이터 모임", "의정부 워킹맘"
+
+설명 규칙:
+- 실제 지역 기반임을 강조하고 자녀 나이대에 맞는 공동육아의 구체적 활동 포함
+- 부모들이 참여하고 싶어할 만한 내용, 100자 이내
+
+JSON 형식: {{"communities": [{{"id": "1", "name": "...", "description": "..."}}]}}
+"""
+
 class RealCommunityMatchingService:
     def __init__(self):
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
             raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
         
-        self.openai_client = OpenAI(api_key=api_key)
+        self.llm = llm_gateway  # 공유 비동기 클라이언트 (동기 클라이언트를 await하던 문제 수정)
+        self.vector_service = get_vector_service()  # 프로세스 공용 검색 엔진
         self.prompt_service = PromptService()
         self.feedback_service = FeedbackLearningService()
         self.prompt_selector = DynamicPromptSelector()
+
+        # 커뮤니티 이름/설명 캐시: "지역|유형|나이대" → {"profile": {...}, "expires_at": float}
+        self.profile_cache_path = (
+            Path(CacheConfig.COMMUNITY_PROFILE_CACHE_PATH) if CacheConfig.COMMUNITY_PROFILE_CACHE_PATH else None
+        )
+        self._profile_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._profile_lock = threading.Lock()
+        self._profile_save_lock = threading.Lock()  # 동시에 끝난 배치의 파일 저장이 겹치지 않도록
+        self._profile_inflight: Dict[str, asyncio.Future] = {}  # 생성 중인 조합 (동시 요청 병합)
+        self.profile_stats = {"hits": 0, "misses": 0, "coalesced": 0, "llm_calls": 0}
+        self._load_profile_cache()
         
         # 위치 기반 커뮤니티 유형
         self.community_types = {
@@ -79,6 +119,50 @@ class RealCommunityMatchingService:
         Returns:
             생성된 커뮤니티 정보
         """
+        communities = await self.create_location_based_communities(
+            [{"user_location": user_location, "community_type": community_type, "user_profile": user_profile}]
+        )
+        return communities[0]
+
+    async def create_location_based_communities(self, requests: List[Dict]) -> List[Optional[Dict]]:
+        """
+        여러 커뮤니티를 한 번에 생성 (일괄 등록/시드 데이터용)
+
+        이름과 설명은 (지역, 유형, 자녀 나이대)별로 캐시되고, 캐시에 없는 것만
+        COMMUNITY_PROFILE_BATCH_SIZE개씩 묶어 한 번의 LLM 호출로 만듭니다.
+
+        Args:
+            requests: [{"user_location": {...}, "community_type": str, "user_profile": {...}}, ...]
+
+        Returns:
+            요청 순서대로 생성된 커뮤니티 정보 (지원하지 않는 유형/지역이면 None)
+        """
+        valid = []
+        for index, request in enumerate(requests):
+            area_name = self._resolve_area(request["user_location"], request["community_type"])
+            if area_name:
+                valid.append((index, area_name))
+
+        profiles = await self.generate_community_profiles([
+            (
+                area_name,
+                requests[index]["community_type"],
+                requests[index]["user_profile"].get("child_ages", []),
+            )
+            for index, area_name in valid
+        ])
+
+        communities: List[Optional[Dict]] = [None] * len(requests)
+        for (index, area_name), profile in zip(valid, profiles):
+            request = requests[index]
+            communities[index] = self._build_community(
+                request["user_location"], request["community_type"], request["user_profile"],
+                area_name, profile
+            )
+        return communities
+
+    def _resolve_area(self, user_location: Dict, community_type: str) -> Optional[str]:
+        """유형/지원 지역 확인 후 지역 이름 반환 (지원하지 않으면 None)"""
         if community_type not in self.community_types:
             logger.error(f"지원하지 않는 커뮤니티 유형: {community_type}")
             return None
@@ -91,20 +175,20 @@ class RealCommunityMatchingService:
         if not is_supported:
             logger.warning(f"지원하지 않는 지역: {user_location['address']}")
             return None
-        
+        return area_name
+
+    def _build_community(
+        self, user_location: Dict, community_type: str, user_profile: Dict,
+        area_name: str, profile: Dict[str, str]
+    ) -> Dict:
         community_info = self.community_types[community_type]
         
         # 위치 기반 커뮤니티 ID 생성
         community_id = f"{area_name}_{community_type}_{int(user_location['latitude']*10000)}_{int(user_location['longitude']*10000)}"
         
-        # 커뮤니티 이름 동적 생성
-        community_name = await self._generate_location_based_name(
-            user_location, community_info, area_name
-        )
-        
         community = {
             "community_id": community_id,
-            "name": community_name,
+            "name": profile["name"],
             "type": community_type,
             "location": {
                 "latitude": user_location["latitude"],
@@ -112,9 +196,7 @@ class RealCommunityMatchingService:
                 "address": user_location["address"],
                 "area": area_name
             },
-            "description": await self._generate_community_description(
-                user_location, community_info, user_profile
-            ),
+            "description": profile["description"],
             "target_ages": user_profile.get("child_ages", []),
             "focus_areas": community_info["keywords"],
             "max_distance_minutes": community_info["max_distance_minutes"],
@@ -130,67 +212,207 @@ class RealCommunityMatchingService:
         }
         
         return community
-    
-    async def _generate_location_based_name(self, location: Dict, community_info: Dict, area_name: str) -> str:
+
+    # ========== 커뮤니티 이름/설명 생성 (캐시 + 일괄 생성) ==========
+
+    @staticmethod
+    def age_band(child_ages: List[Any]) -> str:
+        """자녀 나이 목록 → 나이대 구간 ("3세", "36개월" 등 문자열도 처리)"""
+        bands = set()
+        for age in child_ages or []:
+            text = str(age)
+            match = re.search(r"\d+", text)
+            if not match:
+                continue
+            years = int(match.group()) // 12 if "개월" in text else int(match.group())
+            bands.add(CacheConfig.get_age_band(years))
+        return "+".join(sorted(bands)) if bands else "any"
+
+    def profile_key(self, area_name: str, community_type: str, child_ages: List[Any]) -> str:
+        return f"{area_name}|{community_type}|{self.age_band(child_ages)}"
+
+    async def generate_community_profiles(
+        self, specs: List[Tuple[str, str, List[Any]]]
+    ) -> List[Dict[str, str]]:
         """
-        위치 기반 커뮤니티 이름 동적 생성
+        (지역, 유형, 자녀 나이) 목록 → 이름/설명 목록 (입력 순서 유지)
+
+        같은 (지역, 유형, 나이대)는 한 번만 생성하고, 캐시에 없는 것만 묶어서 LLM을 호출합니다.
+        다른 요청이 이미 만들고 있는 조합은 그 결과를 함께 기다립니다.
         """
-        if not self.openai_client:
-            return f"{area_name} {community_info['name']}"
-        
-        try:
-            # 동적 프롬프트 생성 (기존 시스템 활용)
-            prompt_template = self.prompt_service.manager.get_prompt('community', 'COMMUNITY_NAME_GENERATION')
-            prompt = prompt_template.format(
-                location_address=location['address'],
-                area_name=area_name,
-                community_type=community_info['name']
+        keys = [self.profile_key(*spec) for spec in specs]
+        results: Dict[str, Dict[str, str]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        missing: Dict[str, Tuple[str, str, str]] = {}
+
+        for key, (area_name, community_type, child_ages) in zip(keys, specs):
+            if key in results or key in waiting or key in missing:
+                continue
+            cached = self._profile_cache_get(key)
+            if cached is not None:
+                self.profile_stats["hits"] += 1
+                results[key] = cached
+            elif key in self._profile_inflight:
+                self.profile_stats["coalesced"] += 1
+                waiting[key] = self._profile_inflight[key]
+            else:
+                self.profile_stats["misses"] += 1
+                missing[key] = (area_name, community_type, self.age_band(child_ages))
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in missing}
+            self._profile_inflight.update(futures)
+            try:
+                items = list(missing.items())
+                batch_size = CacheConfig.COMMUNITY_PROFILE_BATCH_SIZE
+                batches = await asyncio.gather(*(
+                    self._generate_profile_batch(items[start:start + batch_size])
+                    for start in range(0, len(items), batch_size)
+                ))
+                for generated in batches:
+                    results.update(generated)
+            finally:
+                for key, future in futures.items():
+                    self._profile_inflight.pop(key, None)
+                    if not future.done():
+                        future.set_result(results.get(key) or self._default_profile(*missing[key][:2]))
+
+        for key, future in waiting.items():
+            results[key] = await future
+
+        return [results[key] for key in keys]
+
+    async def _generate_profile_batch(
+        self, items: List[Tuple[str, Tuple[str, str, str]]]
+    ) -> Dict[str, Dict[str, str]]:
+        """캐시에 없는 커뮤니티들의 이름/설명을 한 번의 구조화 호출로 생성 (실패 시 기본값)"""
+        defaults = {
+            key: self._default_profile(area_name, community_type)
+            for key, (area_name, community_type, _) in items
+        }
+        if not self.llm.available:
+            return defaults
+
+        lines = []
+        for index, (_, (area_name, community_type, age_band)) in enumerate(items, 1):
+            info = self.community_types[community_type]
+            lines.append(
+                f"[{index}] 지역: {area_name} / 유형: {info['name']} ({info['description']}) / "
+                f"자녀 나이대: {age_band if age_band != 'any' else '무관'}"
             )
 
-            response = await self.openai_client.chat.completions.create(
+        self.profile_stats["llm_calls"] += 1
+        try:
+            response = await self.llm.chat_completion(
+                caller="real_community_service",
                 model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=50,
-                temperature=0.7
+                messages=[
+                    {"role": "system", "content": COMMUNITY_PROFILE_SYSTEM_PROMPT},
+                    {"role": "user", "content": COMMUNITY_PROFILE_PROMPT.format(communities="\n".join(lines))},
+                ],
+                max_tokens=120 * len(items) + 50,
+                temperature=0.7,
+                response_format={"type": "json_object"},  # JSON 형식 강제
             )
-            
-            name = response.choices[0].message.content.strip().replace('"', '')
-            return name
-            
+            data = json.loads(response.choices[0].message.content)
         except Exception as e:
-            logger.error(f"커뮤니티 이름 생성 오류: {str(e)}")
-            return f"{area_name} {community_info['name']}"
-    
-    async def _generate_community_description(self, location: Dict, community_info: Dict, user_profile: Dict) -> str:
-        """
-        위치 기반 커뮤니티 설명 동적 생성
-        """
-        if not self.openai_client:
-            return community_info['description']
-        
+            logger.error(f"커뮤니티 이름/설명 생성 오류: {str(e)}")
+            return defaults
+
+        generated = dict(defaults)
+        stored = False
+        entries = data.get("communities") if isinstance(data, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            # 형식이 다르거나 번호가 범위(1~N)를 벗어난 항목은 건너뜀 (기본 이름/설명 유지)
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.get("id"))
+            except (TypeError, ValueError):
+                continue
+            if not 1 <= index <= len(items):
+                continue
+            key = items[index - 1][0]
+            name = str(entry.get("name") or "").strip().replace('"', '')[:30]
+            description = str(entry.get("description") or "").strip().replace('"', '')[:200]
+            if name and description:
+                generated[key] = {"name": name, "description": description}
+                self._profile_cache_put(key, generated[key])
+                stored = True
+        if stored:
+            # 배치마다 한 번만, 이벤트 루프 밖에서 파일 전체 저장
+            await asyncio.to_thread(self._save_profile_cache)
+        return generated
+
+    def _default_profile(self, area_name: str, community_type: str) -> Dict[str, str]:
+        community_info = self.community_types[community_type]
+        return {
+            "name": f"{area_name} {community_info['name']}",
+            "description": community_info["description"],
+        }
+
+    def _profile_cache_get(self, key: str) -> Optional[Dict[str, str]]:
+        with self._profile_lock:
+            entry = self._profile_cache.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._profile_cache[key]
+                return None
+            self._profile_cache.move_to_end(key)
+            return entry["profile"]
+
+    def _profile_cache_put(self, key: str, profile: Dict[str, str]):
+        """메모리 캐시에만 기록 (디스크 저장은 호출한 쪽에서 배치 단위로 _save_profile_cache)"""
+        with self._profile_lock:
+            self._profile_cache[key] = {
+                "profile": profile,
+                "expires_at": time.time() + CacheConfig.COMMUNITY_PROFILE_TTL_SECONDS,
+            }
+            self._profile_cache.move_to_end(key)
+            while len(self._profile_cache) > CacheConfig.COMMUNITY_PROFILE_CACHE_MAX_ENTRIES:
+                self._profile_cache.popitem(last=False)
+
+    def _load_profile_cache(self):
+        """디스크 캐시 읽기 (만료 항목 제외)"""
+        if not self.profile_cache_path or not self.profile_cache_path.exists():
+            return
         try:
-            # 동적 프롬프트 생성 (기존 시스템 활용)
-            prompt_template = self.prompt_service.manager.get_prompt('community', 'COMMUNITY_DESCRIPTION_GENERATION')
-            prompt = prompt_template.format(
-                location_address=location['address'],
-                community_type=community_info['name'],
-                user_interests=user_profile.get('interests', []),
-                child_ages=user_profile.get('child_ages', [])
-            )
+            with open(self.profile_cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"커뮤니티 이름/설명 캐시 파일을 읽지 못했습니다 (빈 캐시로 시작): {e}")
+            return
+        now = time.time()
+        for key, entry in entries.items():
+            if entry.get("expires_at", 0) > now:
+                self._profile_cache[key] = entry
 
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=150,
-                temperature=0.7
-            )
-            
-            description = response.choices[0].message.content.strip().replace('"', '')
-            return description
-            
-        except Exception as e:
-            logger.error(f"커뮤니티 설명 생성 오류: {str(e)}")
-            return community_info['description']
+    def _save_profile_cache(self):
+        """디스크 캐시 쓰기 (임시 파일 후 교체)"""
+        if not self.profile_cache_path:
+            return
+        with self._profile_save_lock:
+            with self._profile_lock:
+                snapshot = dict(self._profile_cache)
+            try:
+                self.profile_cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.profile_cache_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(tmp_path, self.profile_cache_path)
+            except OSError as e:
+                logger.warning(f"커뮤니티 이름/설명 캐시 저장 실패: {e}")
+
+    def get_profile_stats(self) -> Dict[str, Any]:
+        """이름/설명 캐시 히트 / LLM 호출 수"""
+        lookups = self.profile_stats["hits"] + self.profile_stats["misses"] + self.profile_stats["coalesced"]
+        return {
+            **self.profile_stats,
+            "entries": len(self._profile_cache),
+            "hit_ratio": round(self.profile_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
     
     async def find_nearby_communities(self, user_location: Dict, max_distance_minutes: int = 15) -> List[Dict]:
         """
@@ -319,5 +541,32 @@ class RealCommunityMatchingService:
             logger.error(f"커뮤니티 생성 및 추가 오류: {str(e)}")
             return None
 
+    async def create_and_add_communities(self, requests: List[Dict]) -> List[Optional[str]]:
+        """
+        여러 커뮤니티 일괄 생성 및 Vector DB 추가 (시드 데이터 등)
+
+        이름/설명은 create_location_based_communities에서 묶음 호출로 생성되므로
+        N개를 만들어도 LLM 호출은 (캐시에 없는 조합 수 / 배치 크기)번입니다.
+
+        Returns:
+            요청 순서대로 생성된 커뮤니티 ID (실패하면 None)
+        """
+        communities = await self.create_location_based_communities(requests)
+        community_ids: List[Optional[str]] = []
+        for community in communities:
+            if not community:
+                community_ids.append(None)
+                continue
+            try:
+                success = await self.vector_service.add_community_info(community)
+            except Exception as e:
+                logger.error(f"커뮤니티 Vector DB 추가 오류: {str(e)}")
+                success = False
+            community_ids.append(community["community_id"] if success else None)
+
+        created = sum(1 for community_id in community_ids if community_id)
+        logger.info(f"위치 기반 커뮤니티 일괄 생성: {created}/{len(requests)}개, 이름/설명 {self.get_profile_stats()}")
+        return community_ids
+
 # 전역 인스턴스
 real_community_service = RealCommunityMatchingService()
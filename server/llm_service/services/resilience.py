@@ -0,0 +1,252 @@
+"""
+LLM 호출 안정화 (재시도 / 서킷 브레이커 / 헤지 요청)
+
+OpenAI가 느려지거나 rate limit(429)을 걸면 generate_chat_response 등은 예외를 잡고 사과 문구만
+돌려줬습니다. 다시 시도하지도 않고, 느린 호출이 쌓여 워커와 게이트웨이 슬롯을 모두 잡는 것도
+막지 못했습니다.
+
+LLMGateway의 모든 호출은 Resilience.execute를 거칩니다.
+- 재시도: 429 / 5xx / 연결·타임아웃 오류만 지수 백오프(full jitter)로 재시도
+  (Retry-After 헤더가 있으면 그만큼 기다림, 400 등 요청 자체 오류는 바로 실패)
+- 서킷 브레이커: 최근 N번 시도의 오류율이 기준을 넘으면 일정 시간 호출 없이 바로 실패(CircuitOpenError)
+  → 차단 시간이 지나면 시험 호출 1번만 허용해서 성공하면 다시 연결
+- 헤지 요청: 짧은 분석 호출이 그 호출 위치의 p95 지연을 넘기면 같은 요청을 한 번 더 보내고
+  먼저 끝난 응답을 사용 (나머지는 취소)
+
+설정은 LLMConfig.RESILIENCE_DEFAULT / RESILIENCE_POLICIES에서 호출 위치(caller)별로 지정합니다.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+from ..config.llm_config import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 호출하지 않고 바로 실패"""
+
+    def __init__(self, caller: str, retry_in: float):
+        super().__init__(f"{caller} 호출 차단 중 ({retry_in:.0f}초 후 재시도)")
+        self.caller = caller
+        self.retry_in = retry_in
+
+
+def is_retryable(error: Exception) -> bool:
+    """일시적인 오류인지 (429 / 5xx / 연결·타임아웃)"""
+    if isinstance(error, (APIConnectionError, APITimeoutError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """429 응답의 Retry-After 헤더 (초)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """최근 시도 오류율 기반 서킷 브레이커 (closed → open → half-open)"""
+
+    def __init__(self, caller: str, window: int, min_calls: int, error_rate: float, reset_seconds: float):
+        self.caller = caller
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.reset_seconds = reset_seconds
+        self.outcomes = deque(maxlen=window)  # True: 성공, False: 일시적 오류
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        """호출 가능 여부 확인 (차단 중이면 CircuitOpenError)"""
+        if self.state == "closed":
+            return
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == "open" and elapsed >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True  # 시험 호출 1번만 통과
+            return
+        raise CircuitOpenError(self.caller, max(self.reset_seconds - elapsed, 0.0))
+
+    def record_success(self):
+        self.outcomes.append(True)
+        if self.state != "closed":
+            logger.info(f"🔌 서킷 브레이커 연결 복구: {self.caller}")
+            self.state = "closed"
+            self.outcomes.clear()
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        if self.state == "half_open":
+            self._open()
+            return
+        failures = self.outcomes.count(False)
+        if (
+            self.state == "closed"
+            and len(self.outcomes) >= self.min_calls
+            and failures / len(self.outcomes) >= self.error_rate
+        ):
+            self._open()
+
+    def release_probe(self):
+        """시험 호출이 성공/실패 판단 없이 끝난 경우 (요청 자체 오류, 취소 등)"""
+        self._probe_in_flight = False
+
+    def _open(self):
+        logger.warning(f"🔌 서킷 브레이커 차단: {self.caller} (최근 오류율 기준 초과)")
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+
+class Resilience:
+    """호출 위치별 재시도 / 서킷 브레이커 / 헤지 요청 실행기"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+    def _breaker(self, caller: str, policy: Dict[str, Any]) -> CircuitBreaker:
+        if caller not in self._breakers:
+            self._breakers[caller] = CircuitBreaker(
+                caller,
+                window=policy["breaker_window"],
+                min_calls=policy["breaker_min_calls"],
+                error_rate=policy["breaker_error_rate"],
+                reset_seconds=policy["breaker_reset_seconds"],
+            )
+        return self._breakers[caller]
+
+    def _metric(self, caller: str) -> Dict[str, int]:
+        if caller not in self._metrics:
+            self._metrics[caller] = {
+                "retries": 0,          # 재시도한 횟수
+                "short_circuited": 0,  # 차단 중이라 호출 없이 실패한 수
+                "hedged": 0,           # 헤지 요청을 보낸 수
+                "hedge_wins": 0,       # 헤지 요청이 먼저 끝난 수
+            }
+        return self._metrics[caller]
+
+    async def execute(
+        self,
+        caller: str,
+        attempt: Callable[[], Awaitable[T]],
+        hedge_delay_ms: Optional[float] = None,
+    ) -> T:
+        """
+        attempt를 호출 위치 정책에 따라 실행
+
+        Args:
+            attempt: 호출 한 번을 수행하는 코루틴 함수 (재시도/헤지마다 새로 호출)
+            hedge_delay_ms: 헤지 요청을 보낼 기준 지연 (보통 해당 호출 위치의 p95, 없으면 헤지 안 함)
+        """
+        policy = LLMConfig.get_resilience_policy(caller)
+        breaker = self._breaker(caller, policy)
+        metric = self._metric(caller)
+        hedge = policy["hedge"] and hedge_delay_ms
+
+        for retry in range(policy["max_retries"] + 1):
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                metric["short_circuited"] += 1
+                raise
+
+            try:
+                if hedge:
+                    result = await self._hedged(attempt, hedge_delay_ms / 1000, metric)
+                else:
+                    result = await attempt()
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.release_probe()
+                    raise
+                breaker.record_failure()
+                if retry >= policy["max_retries"] or breaker.state == "open":
+                    raise
+                delay = self._backoff_seconds(retry, policy, e)
+                metric["retries"] += 1
+                logger.warning(f"🔁 {caller} 일시적 오류로 {delay:.2f}초 후 재시도 ({retry + 1}/{policy['max_retries']}): {e}")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                breaker.release_probe()  # 취소 등
+                raise
+
+            breaker.record_success()
+            return result
+
+    @staticmethod
+    def _backoff_seconds(retry: int, policy: Dict[str, Any], error: Exception) -> float:
+        """지수 백오프 + full jitter (Retry-After가 있으면 최소 그만큼)"""
+        ceiling = min(policy["backoff_max_ms"], policy["backoff_base_ms"] * (2 ** retry)) / 1000
+        delay = random.uniform(0, ceiling)
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, policy["backoff_max_ms"] / 1000))
+        return delay
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[T]], delay: float, metric: Dict[str, int]) -> T:
+        """delay 안에 끝나지 않으면 같은 요청을 한 번 더 보내고 먼저 성공한 결과 사용
+
+        호출한 쪽이 취소되면(상위 wait_for 시간 초과 등) 진행 중인 요청도 모두 취소해서
+        게이트웨이 동시 실행 슬롯을 붙잡고 있지 않도록 합니다.
+        """
+        pending = set()
+        try:
+            primary = asyncio.ensure_future(attempt())
+            pending.add(primary)
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            metric["hedged"] += 1
+            backup = asyncio.ensure_future(attempt())
+            pending.add(backup)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            metric["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """호출 위치별 재시도 / 차단 / 헤지 지표와 서킷 브레이커 상태"""
+        return {
+            caller: {
+                **metric,
+                "breaker_state": self._breakers[caller].state if caller in self._breakers else "closed",
+            }
+            for caller, metric in self._metrics.items()
+        }
+
+
+# 전역 인스턴스
+resilience = Resilience()
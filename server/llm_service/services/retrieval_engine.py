@@ -0,0 +1,106 @@
+"""
+프로세스 공용 검색 엔진
+
+VectorService(Chroma 연결 + OpenAI 임베딩 + BM25 인덱스)를 프로세스당 하나만 만들고
+라우터/서비스/측정 스크립트가 모두 같은 인스턴스를 사용하도록 합니다.
+
+인스턴스가 여러 개면 Chroma 연결과 BM25 인덱스가 그만큼 중복 생성되어
+시작 시간과 메모리가 늘어나고, 한쪽에서 문서를 추가해도 다른 인스턴스의
+BM25 인덱스에는 반영되지 않아 검색 결과가 서로 달라집니다.
+
+사용법:
+    from .retrieval_engine import get_vector_service
+    vector_service = get_vector_service()
+"""
+
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .vector_service import VectorService
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalEngine:
+    """공용 VectorService의 생성/종료(라이프사이클)와 상태 리포트를 담당"""
+
+    def __init__(self, persist_directory: Optional[str] = None):
+        self.persist_directory = persist_directory or os.getenv(
+            "CHROMA_PERSIST_DIRECTORY", "./chroma_db"
+        )
+        self._vector_service: Optional[VectorService] = None
+        self._lock = threading.Lock()
+        self.startup_seconds: Optional[float] = None
+
+    @property
+    def vector_service(self) -> VectorService:
+        """공용 VectorService (최초 접근 시 한 번만 생성)"""
+        if self._vector_service is None:
+            with self._lock:
+                if self._vector_service is None:
+                    start = time.perf_counter()
+                    self._vector_service = VectorService(
+                        persist_directory=self.persist_directory
+                    )
+                    self.startup_seconds = time.perf_counter() - start
+                    logger.info(
+                        f"공용 검색 엔진 초기화 완료: {self.startup_seconds:.2f}초, "
+                        f"BM25 문서 {len(self._vector_service.bm25_documents)}개"
+                    )
+        return self._vector_service
+
+    def startup(self):
+        """앱 시작 시 미리 초기화 (첫 요청 지연 방지)"""
+        _ = self.vector_service
+
+    def shutdown(self):
+        """앱 종료 시 저장 후 해제"""
+        with self._lock:
+            if self._vector_service is None:
+                return
+            try:
+                self._vector_service.vector_store.persist()
+            except Exception as e:
+                logger.warning(f"검색 엔진 종료 중 저장 실패: {e}")
+            self._vector_service = None
+            logger.info("공용 검색 엔진 종료")
+
+    def report(self) -> Dict[str, Any]:
+        """인스턴스 수 / 인덱스 크기 / 프로세스 메모리 리포트"""
+        instances = VectorService.live_instances()
+        engine = self._vector_service
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+        return {
+            "engine_initialized": engine is not None,
+            "startup_seconds": round(self.startup_seconds, 3) if self.startup_seconds else None,
+            "vector_service_instances": len(instances),
+            "duplicate_instances": VectorService.duplicate_instance_keys(),
+            "instances": [
+                {
+                    "persist_directory": vs.persist_directory,
+                    "collection_name": vs.collection_name,
+                    "bm25_documents": len(vs.bm25_documents),
+                    "shared": vs is engine,
+                }
+                for vs in instances
+            ],
+            "index_version": engine.index_version if engine else None,
+            "bm25_last_update": engine.bm25_last_update if engine else None,
+            "peak_rss_mb": round(peak_rss_mb, 1),
+        }
+
+
+# 전역 인스턴스
+retrieval_engine = RetrievalEngine()
+
+
+def get_vector_service() -> VectorService:
+    """프로세스 공용 VectorService 반환"""
+    return retrieval_engine.vector_service
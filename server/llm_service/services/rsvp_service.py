@@ -56,6 +56,7 @@ class RSVPService:
                 "activity": schedule_info.get("activity"),
                 "rsvp_required": schedule_info.get("rsvp_required", False),
                 "created_at": firestore.SERVER_TIMESTAMP,
+                "updated_at": firestore.SERVER_TIMESTAMP,  # 증분 동기화 커서 기준
                 "rsvp_responses": {},  # {user_id: "attending" | "not_attending" | "maybe"}
                 "attending_count": 0,
                 "not_attending_count": 0,
@@ -10,136 +10,130 @@
 - "이번주말 캐러반체험하러 가려고 참석가능한 엄빠들 어디세요?"
 """
 
+import os
 import re
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
 import logging
-from openai import AsyncOpenAI
-import os
+from .llm_gateway import llm_gateway
+from ..utils.temporal_grammar import parse_temporal
 from dotenv import load_dotenv
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# 참석 요청 표현
+RSVP_KEYWORDS = [
+    "나와주세요", "갈거에요", "참석", "참여", "누구", "어디세요",
+    "가실분", "참가", "함께", "모임", "만남", "나오기", "참가하실",
+    "참석하실", "가시는", "오시는", "참석 가능", "참여 가능",
+    "모여", "만나요", "만날", "볼까요", "놀아요",
+]
+RSVP_RE = re.compile("|".join(re.escape(word) for word in RSVP_KEYWORDS))
+
+LOCATION_PATTERNS = [
+    re.compile(r'(\d+동앞?\s*[가-힣]+)'),  # 2동앞 놀이터
+    re.compile(r'([가-힣]+공터)'),  # 뒷공터
+    re.compile(r'([가-힣]+놀이터)'),  # 놀이터
+    re.compile(r'([가-힣]+공원)'),  # 공원
+]
+LOCATION_PARTICLE_RE = re.compile(r'(에서|으로|에|로)$')
+
 
 class ScheduleParser:
-    """자연어에서 일정 정보를 추출하는 서비스"""
+    """자연어에서 일정 정보를 추출하는 서비스 (규칙 우선, 애매한 메시지만 LLM으로 확인)"""
+
+    # 규칙 결과의 confidence가 이 값 이상이면 LLM을 호출하지 않음
+    CONFIDENCE_THRESHOLD = float(os.getenv("SCHEDULE_RULE_CONFIDENCE", "0.7"))
     
     def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if api_key:
-            self.openai_client = AsyncOpenAI(api_key=api_key)
+        self.stats = {"rules": 0, "llm": 0}
+        if llm_gateway.available:
+            self.llm = llm_gateway  # 공유 비동기 클라이언트 + 동시 실행 제한
         else:
-            self.openai_client = None
+            self.llm = None
             logger.warning("OpenAI API 키가 없습니다. 기본 파싱만 사용합니다.")
     
     def extract_schedule_info(self, message: str) -> Dict[str, Any]:
         """
-        자연어 메시지에서 일정 정보 추출
+        규칙 기반 일정 정보 추출 (utils/temporal_grammar + 미리 컴파일한 정규식)
         
         Returns:
             {
-                "time": "2024-01-06 18:00",
+                "time": "2024-01-06T18:00:00",
+                "end_time": None,
                 "location": "2동앞 놀이터",
                 "activity": "놀이터 모임",
                 "participants_needed": True,
                 "rsvp_required": True,
                 "has_time": True,
-                "has_location": True
+                "has_location": True,
+                "confidence": 0.95,   # 규칙 결과를 그대로 써도 되는 정도 (낮으면 LLM으로 확인)
+                "source": "rules"
             }
         """
         result = {
             "time": None,
+            "end_time": None,
             "location": None,
             "activity": None,
             "participants_needed": False,
             "rsvp_required": False,
             "has_time": False,
             "has_location": False,
-            "raw_message": message
+            "raw_message": message,
+            "confidence": 1.0,
+            "source": "rules",
         }
-        
-        # 시간 추출
-        time_info = self._extract_time(message)
-        if time_info:
-            result["time"] = time_info
-            result["has_time"] = True
-        
-        # 장소 추출
+
+        temporal = parse_temporal(message)
+        # 참석자 필요 여부 (더 많은 표현 인식)
+        rsvp = RSVP_RE.search(message) is not None
+
+        # 시간 / 참석 요청 표현이 모두 없으면 일정이 아님 (장소 단어만 있는 질문 포함)
+        if not temporal["has_cue"] and not rsvp:
+            return result
+
         location = self._extract_location(message)
+        activity = self._extract_activity(message)
+        has_event_cue = bool(location or activity or rsvp)
+
+        # 해석하지 못한 막연한 시간 표현만 있고 모임 단서가 없으면 일정이 아님
+        # ("아이가 밤에 잠을 안 자요", "배변 훈련은 언제 시작하나요")
+        if not temporal["time"] and not has_event_cue:
+            return result
+
+        if temporal["time"]:
+            result["time"] = temporal["time"]
+            result["end_time"] = temporal["end_time"]
+            result["has_time"] = True
+
+        # 장소 / 활동
         if location:
             result["location"] = location
             result["has_location"] = True
-        
-        # 활동 추출
-        activity = self._extract_activity(message)
         if activity:
             result["activity"] = activity
-        
-        # 참석자 필요 여부 (더 많은 표현 인식)
-        rsvp_keywords = [
-            "나와주세요", "갈거에요", "참석", "참여", "누구", "어디세요", 
-            "가실분", "참가", "함께", "모임", "만남", "나오기", "참가하실",
-            "참석하실", "가시는", "오시는", "참석 가능", "참여 가능"
-        ]
-        if any(word in message for word in rsvp_keywords):
+
+        if rsvp:
             result["participants_needed"] = True
             result["rsvp_required"] = True
-        
+
+        # 시각은 있지만 모임 단서(장소/활동/참석 요청)가 없거나 ("밤 12시에 열이 나요"),
+        # 참석 요청만 있고 시간이 없으면 일정인지 규칙만으로 판단하기 어려움
+        if not temporal["has_cue"] or not has_event_cue:
+            result["confidence"] = min(temporal["confidence"], 0.5)
+        else:
+            result["confidence"] = temporal["confidence"]
         return result
     
-    def _extract_time(self, message: str) -> Optional[str]:
-        """시간 정보 추출"""
-        # 패턴 1: "오늘 저녁 6시"
-        if "오늘" in message:
-            today = datetime.now()
-            # 시간 추출
-            time_match = re.search(r'(\d+)시', message)
-            if time_match:
-                hour = int(time_match.group(1))
-                if "저녁" in message or "밤" in message:
-                    if hour < 12:
-                        hour += 12
-                return today.replace(hour=hour, minute=0, second=0).isoformat()
-        
-        # 패턴 2: "내일 오전10시"
-        if "내일" in message:
-            tomorrow = datetime.now() + timedelta(days=1)
-            time_match = re.search(r'오전?(\d+)시|오후?(\d+)시|(\d+)시', message)
-            if time_match:
-                hour = int(time_match.group(1) or time_match.group(2) or time_match.group(3))
-                if "오전" in message and hour == 12:
-                    hour = 0
-                elif "오후" in message and hour < 12:
-                    hour += 12
-                return tomorrow.replace(hour=hour, minute=0, second=0).isoformat()
-        
-        # 패턴 3: "이번주말"
-        if "주말" in message or "토요일" in message or "일요일" in message:
-            today = datetime.now()
-            days_until_weekend = (5 - today.weekday()) % 7  # 금요일까지
-            if days_until_weekend == 0:
-                days_until_weekend = 7  # 이미 주말이면 다음 주말
-            weekend_date = today + timedelta(days=days_until_weekend)
-            return weekend_date.replace(hour=10, minute=0, second=0).isoformat()
-        
-        return None
-    
     def _extract_location(self, message: str) -> Optional[str]:
         """장소 정보 추출"""
-        # 패턴 1: "2동앞 놀이터"
-        location_patterns = [
-            r'(\d+동앞?\s*[가-힣\s]+)',  # 2동앞 놀이터
-            r'([가-힣]+공터)',  # 뒷공터
-            r'([가-힣]+놀이터)',  # 놀이터
-            r'([가-힣]+공원)',  # 공원
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, message)
+        for pattern in LOCATION_PATTERNS:
+            match = pattern.search(message)
             if match:
-                return match.group(1).strip()
+                # 조사 제거 ("2동앞 놀이터에서" → "2동앞 놀이터")
+                return LOCATION_PARTICLE_RE.sub("", match.group(1).strip())
         
         return None
     
@@ -159,14 +153,33 @@ class ScheduleParser:
         
         return None
     
+    def needs_llm(self, rules: Dict[str, Any]) -> bool:
+        """규칙 결과만으로 확정할 수 없는 애매한 메시지인지"""
+        return rules["confidence"] < self.CONFIDENCE_THRESHOLD
+
+    @staticmethod
+    def finalize_ai_result(result: Dict[str, Any], message: str) -> Dict[str, Any]:
+        """AI가 추출한 일정 JSON에 원문과 has_time / has_location 플래그 추가"""
+        result["raw_message"] = message
+        result["source"] = "llm"
+        result["has_time"] = result.get("time") is not None and result.get("time") != "null"
+        result["has_location"] = result.get("location") is not None and result.get("location") != "null"
+        return result
+
     async def parse_with_ai(self, message: str) -> Dict[str, Any]:
         """
-        AI를 사용하여 동적 자연어 파싱
-        모든 표현 방식을 처리할 수 있도록 AI 기반으로 구현
+        규칙 → LLM 단계적 파싱
+
+        1. 시간 문법 + 참석 요청 규칙으로 먼저 추출 (LLM 호출 없음)
+        2. 시간/참석 요청 표현이 없거나 confidence가 충분하면 규칙 결과 사용
+        3. 애매한 메시지만 AI로 다양한 표현을 해석
         """
-        if not self.openai_client:
-            return self.extract_schedule_info(message)
+        rules = self.extract_schedule_info(message)
+        if not self.llm or not self.needs_llm(rules):
+            self.stats["rules"] += 1
+            return rules
         
+        self.stats["llm"] += 1
         try:
             prompt = f"""
 다음 메시지에서 일정 정보를 추출해주세요. 다양한 표현 방식을 모두 인식해야 합니다.
@@ -195,7 +208,8 @@ JSON 형식으로만 응답하세요:
 }}
 """
             
-            response = await self.openai_client.chat.completions.create(
+            response = await self.llm.chat_completion(
+                caller="schedule_parser",
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -217,15 +231,10 @@ JSON 형식으로만 응답하세요:
             elif "```" in content:
                 content = content.split("```")[1].split("```")[0].strip()
             
-            result = json.loads(content)
-            result["raw_message"] = message
-            result["has_time"] = result.get("time") is not None and result.get("time") != "null"
-            result["has_location"] = result.get("location") is not None and result.get("location") != "null"
-            
-            return result
+            return self.finalize_ai_result(json.loads(content), message)
             
         except Exception as e:
             logger.error(f"AI 파싱 실패: {e}")
-            # 폴백: 기본 파싱 사용
-            return self.extract_schedule_info(message)
+            # 폴백: 규칙 결과 사용
+            return rules
 
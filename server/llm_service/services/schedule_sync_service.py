@@ -0,0 +1,316 @@
+"""
+Firestore → 벡터 인덱스 증분 일정 동기화 서비스
+
+database/crud.get_all_schedules_from_firestore는 사용자 → 자녀 → 일정 순으로
+중첩 스트림을 돌기 때문에 매번 DB 전체를 N+1번 왕복합니다.
+
+이 서비스는 collection_group("schedules")를 updated_at 순으로 한 번에 조회하고,
+마지막으로 처리한 updated_at을 체크포인트로 저장해 다음 실행에서는
+그 이후에 바뀐 일정만 가져옵니다. 재동기화 시간은 DB 크기가 아니라 변경량에 비례합니다.
+
+- 새로 생기거나 바뀐 일정 → 검색 문서로 변환해 고정 ID로 일괄 upsert
+- 삭제 표시(deleted / is_deleted / status == "deleted")된 일정 → 인덱스에서 일괄 삭제
+- 실제로 문서가 지워진 경우(tombstone 없음)는 reconcile_deleted()로 ID만 비교해 정리
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import firebase_admin
+from firebase_admin import firestore
+
+from .retrieval_engine import get_vector_service
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_SOURCE = "schedule_sync"
+DELETED_STATUSES = {"deleted", "cancelled", "canceled"}
+
+
+class ScheduleSyncService:
+    """updated_at 커서 기반 일정 증분 동기화"""
+
+    def __init__(
+        self,
+        vector_service=None,
+        checkpoint_path: Optional[str] = None,
+        page_size: int = 500,
+    ):
+        if not firebase_admin._apps:
+            try:
+                from ...backend.main import cred
+                firebase_admin.initialize_app(cred)
+            except Exception as e:
+                logger.warning(f"Firebase 초기화 실패: {e}")
+
+        self.db = firestore.client() if firebase_admin._apps else None
+        self.vector_service = vector_service or get_vector_service()
+        self.checkpoint_path = Path(
+            checkpoint_path
+            or os.getenv("SCHEDULE_SYNC_CHECKPOINT", "./data/schedule_sync_checkpoint.json")
+        )
+        self.page_size = page_size
+        self._lock = asyncio.Lock()  # 동시에 두 번 동기화되지 않도록
+
+    # ========== 체크포인트 ==========
+
+    def load_checkpoint(self) -> Dict[str, Any]:
+        """
+        Returns:
+            {
+                "updated_at": 마지막으로 처리한 updated_at (ISO 문자열 또는 None),
+                "paths": 그 시각과 updated_at이 정확히 같은 이미 처리된 문서 경로들
+            }
+        """
+        if not self.checkpoint_path.exists():
+            return {"updated_at": None, "paths": []}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"동기화 체크포인트 로드 실패 (처음부터 동기화): {e}")
+            return {"updated_at": None, "paths": []}
+
+    def save_checkpoint(self, updated_at: Optional[datetime], paths: List[str]):
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "updated_at": updated_at.isoformat() if updated_at else None,
+                    "paths": paths,
+                    "saved_at": datetime.now().isoformat(),
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.checkpoint_path)  # 중간에 죽어도 체크포인트가 깨지지 않게
+
+    def reset_checkpoint(self):
+        """다음 동기화를 처음부터 다시 하도록 체크포인트 삭제"""
+        if self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
+
+    # ========== 문서 변환 ==========
+
+    @staticmethod
+    def document_id(path: str) -> str:
+        """Firestore 문서 경로 → 벡터 인덱스 고정 ID"""
+        return f"schedule:{path}"
+
+    @staticmethod
+    def _is_deleted(data: Dict[str, Any]) -> bool:
+        return bool(
+            data.get("deleted")
+            or data.get("is_deleted")
+            or str(data.get("status", "")).lower() in DELETED_STATUSES
+        )
+
+    @staticmethod
+    def _parse_path(path: str) -> Tuple[Optional[str], Optional[str]]:
+        """문서 경로에서 (user_id, child_id) 추출
+
+        users/{uid}/children/{cid}/schedules/{sid} 또는 최상위 schedules/{sid}
+        """
+        parts = path.split("/")
+        if len(parts) >= 6 and parts[0] == "users" and parts[2] == "children":
+            return parts[1], parts[3]
+        return None, None
+
+    def _fetch_parent_names(self, snapshots: List[Any], cache: Dict[str, str]):
+        """페이지에 등장한 사용자/자녀 이름을 get_all 한 번으로 일괄 조회"""
+        refs = []
+        for snapshot in snapshots:
+            user_id, child_id = self._parse_path(snapshot.reference.path)
+            if not user_id:
+                continue
+            child_ref = snapshot.reference.parent.parent
+            user_ref = child_ref.parent.parent
+            for ref in (user_ref, child_ref):
+                if ref.path not in cache:
+                    cache[ref.path] = ""
+                    refs.append(ref)
+        if not refs:
+            return
+        for parent in self.db.get_all(refs):
+            data = parent.to_dict() or {}
+            cache[parent.reference.path] = data.get("full_name") or data.get("name") or ""
+
+    def _to_retrieval_document(
+        self, snapshot: Any, data: Dict[str, Any], names: Dict[str, str]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """일정 문서 → (검색 텍스트, 메타데이터)"""
+        path = snapshot.reference.path
+        user_id, child_id = self._parse_path(path)
+
+        if user_id:
+            child_ref = snapshot.reference.parent.parent
+            user_name = names.get(child_ref.parent.parent.path) or "알 수 없음"
+            child_name = names.get(child_ref.path) or "알 수 없음"
+            # database/crud.py와 같은 텍스트 형식 유지
+            text = (
+                f"사용자 {user_name}의 자녀 {child_name}의 일정입니다. "
+                f"일정 제목: {data.get('title', '')}. "
+                f"상세 내용: {data.get('description', '')}. "
+                f"시간: {data.get('start_time')}."
+            )
+        else:
+            # 채팅에서 만들어진 공동육아 일정 (rsvp_service)
+            user_id = data.get("creator_id")
+            parts = [
+                f"공동육아 일정입니다. 활동: {data.get('activity') or ''}.",
+                f"장소: {data.get('location') or ''}.",
+                f"시간: {data.get('time') or ''}.",
+            ]
+            if data.get("rsvp_required"):
+                parts.append(f"참석 {data.get('attending_count', 0)}명.")
+            text = " ".join(parts)
+
+        metadata = {
+            "source": SCHEDULE_SOURCE,
+            "type": "schedule",
+            "schedule_path": path,
+            "schedule_id": snapshot.id,
+            "user_id": user_id or "",
+            "child_id": child_id or "",
+            "updated_at": str(data.get("updated_at", "")),
+        }
+        return text, metadata
+
+    # ========== 동기화 ==========
+
+    async def _sync(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        checkpoint = self.load_checkpoint()
+        cursor_time = (
+            datetime.fromisoformat(checkpoint["updated_at"])
+            if checkpoint.get("updated_at")
+            else None
+        )
+        cursor_paths = set(checkpoint.get("paths") or [])
+
+        base_query = self.db.collection_group("schedules").order_by("updated_at")
+        if cursor_time:
+            # 같은 시각에 바뀐 문서를 놓치지 않도록 >= 로 조회하고 이미 처리한 경로는 건너뜀
+            base_query = base_query.where("updated_at", ">=", cursor_time)
+
+        stats = {"pages": 0, "scanned": 0, "upserted": 0, "deleted": 0, "skipped": 0}
+        names: Dict[str, str] = {}
+        last_snapshot = None
+
+        while True:
+            query = base_query.limit(self.page_size)
+            if last_snapshot is not None:
+                query = query.start_after(last_snapshot)
+            # Firestore 클라이언트는 동기 방식이라 이벤트 루프를 막지 않도록 스레드에서 조회
+            snapshots = await asyncio.to_thread(lambda: list(query.stream()))
+            if not snapshots:
+                break
+
+            stats["pages"] += 1
+            stats["scanned"] += len(snapshots)
+            await asyncio.to_thread(self._fetch_parent_names, snapshots, names)
+
+            upsert_ids, upsert_texts, upsert_metadatas, delete_ids = [], [], [], []
+            for snapshot in snapshots:
+                data = snapshot.to_dict() or {}
+                updated_at = data.get("updated_at")
+                path = snapshot.reference.path
+
+                if cursor_time and updated_at == cursor_time and path in cursor_paths:
+                    stats["skipped"] += 1
+                    continue
+
+                if self._is_deleted(data):
+                    delete_ids.append(self.document_id(path))
+                else:
+                    text, metadata = self._to_retrieval_document(snapshot, data, names)
+                    upsert_ids.append(self.document_id(path))
+                    upsert_texts.append(text)
+                    upsert_metadatas.append(metadata)
+
+                # 커서 전진 (같은 시각이면 경로 누적)
+                if updated_at != cursor_time:
+                    cursor_time, cursor_paths = updated_at, set()
+                cursor_paths.add(path)
+
+            # 페이지 단위로 일괄 반영 (BM25 재구축은 마지막에 한 번)
+            if upsert_ids:
+                await self.vector_service.upsert_documents(
+                    upsert_ids, upsert_texts, upsert_metadatas, rebuild_bm25=False
+                )
+            if delete_ids:
+                await self.vector_service.delete_documents(delete_ids, rebuild_bm25=False)
+            stats["upserted"] += len(upsert_ids)
+            stats["deleted"] += len(delete_ids)
+
+            # 페이지마다 체크포인트 저장 → 중간에 실패해도 이어서 동기화
+            self.save_checkpoint(cursor_time, sorted(cursor_paths))
+
+            last_snapshot = snapshots[-1]
+            if len(snapshots) < self.page_size:
+                break
+
+        if stats["upserted"] or stats["deleted"]:
+            await asyncio.to_thread(self.vector_service._update_bm25_index)
+
+        stats["cursor"] = cursor_time.isoformat() if cursor_time else None
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        return stats
+
+    async def sync_incremental(self) -> Dict[str, Any]:
+        """마지막 체크포인트 이후 바뀐 일정만 동기화"""
+        if not self.db:
+            logger.error("Firestore 연결이 없어 일정을 동기화할 수 없습니다.")
+            return {"success": False, "message": "Firestore 연결 없음"}
+
+        async with self._lock:
+            try:
+                stats = await self._sync()
+                logger.info(f"📅 일정 증분 동기화 완료: {stats}")
+                return {"success": True, **stats}
+            except Exception as e:
+                logger.error(f"일정 증분 동기화 실패: {e}")
+                return {"success": False, "message": str(e)}
+
+    def _list_firestore_schedule_ids(self) -> set:
+        # 필드 없이 문서 경로만 조회 (본문을 내려받지 않음)
+        return {
+            self.document_id(snapshot.reference.path)
+            for snapshot in self.db.collection_group("schedules").select([]).stream()
+        }
+
+    async def reconcile_deleted(self) -> Dict[str, Any]:
+        """
+        Firestore에서 실제로 지워진 일정을 인덱스에서도 제거
+
+        삭제 표시 없이 문서를 지우면 updated_at 쿼리에 나타나지 않으므로,
+        가끔(예: 하루 한 번) ID 목록만 비교해서 정리합니다.
+        """
+        if not self.db:
+            return {"success": False, "message": "Firestore 연결 없음"}
+
+        async with self._lock:
+            try:
+                firestore_ids = await asyncio.to_thread(self._list_firestore_schedule_ids)
+                indexed_ids = await asyncio.to_thread(
+                    self.vector_service.list_document_ids, where={"source": SCHEDULE_SOURCE}
+                )
+                stale_ids = [doc_id for doc_id in indexed_ids if doc_id not in firestore_ids]
+                await self.vector_service.delete_documents(stale_ids)
+                stats = {"indexed": len(indexed_ids), "deleted": len(stale_ids)}
+                logger.info(f"📅 삭제된 일정 정리 완료: {stats}")
+                return {"success": True, **stats}
+            except Exception as e:
+                logger.error(f"삭제된 일정 정리 실패: {e}")
+                return {"success": False, "message": str(e)}
+
+
+# 전역 인스턴스
+schedule_sync_service = ScheduleSyncService()
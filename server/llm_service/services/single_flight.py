@@ -0,0 +1,87 @@
+"""
+Single-flight 요청 병합
+
+같은 키의 작업이 이미 진행 중이면 새로 실행하지 않고 진행 중인 작업의 결과를 함께 기다립니다.
+공지 직후처럼 많은 부모가 같은 질문을 동시에 보내면 캐시가 채워지기 전이라 모두 미스가 나고
+똑같은 LLM 호출과 캐시 쓰기가 요청 수만큼 발생하는데, 이를 한 번으로 줄입니다.
+
+사용법:
+    flight = SingleFlight("chat")
+    answer, shared = await flight.do(key, lambda: generate(query))
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """키별로 진행 중인 작업을 하나만 유지하는 요청 병합기"""
+
+    # 이름 → 인스턴스 (지표 일괄 조회용)
+    _registry: Dict[str, "SingleFlight"] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.metrics = {
+            "calls": 0,       # do() 호출 수
+            "executions": 0,  # 실제로 실행된 작업 수
+            "coalesced": 0,   # 진행 중인 작업에 합류한 요청 수 (절약된 호출)
+            "errors": 0,      # 실패한 작업 수
+            "max_waiters": 0, # 한 작업을 동시에 기다린 최대 요청 수
+        }
+        SingleFlight._registry[name] = self
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        key로 func를 한 번만 실행
+
+        작업은 별도 Task로 실행되므로, 처음 요청한 클라이언트가 연결을 끊어도
+        함께 기다리는 다른 요청의 작업은 취소되지 않습니다.
+
+        Returns:
+            (결과, 다른 요청의 작업 결과를 공유받았는지 여부)
+        """
+        self.metrics["calls"] += 1
+        task = self._inflight.get(key)
+        shared = task is not None
+
+        if task is None:
+            self.metrics["executions"] += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+        else:
+            self.metrics["coalesced"] += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        self.metrics["max_waiters"] = max(self.metrics["max_waiters"], self._waiters[key])
+        return await asyncio.shield(task), shared
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        # 기다리던 요청이 모두 취소된 경우에도 예외가 '회수되지 않음' 경고로 남지 않도록 확인
+        if not task.cancelled() and task.exception() is not None:
+            self.metrics["errors"] += 1
+            logger.warning(f"[single-flight:{self.name}] 작업 실패: {task.exception()}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        calls = self.metrics["calls"]
+        return {
+            **self.metrics,
+            "inflight": len(self._inflight),
+            "coalesced_rate": round(self.metrics["coalesced"] / calls, 4) if calls else 0.0,
+        }
+
+    @classmethod
+    def all_metrics(cls) -> Dict[str, Dict[str, Any]]:
+        return {name: flight.get_metrics() for name, flight in cls._registry.items()}
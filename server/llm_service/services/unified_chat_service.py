@@ -1,34 +1,62 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from datetime import datetime
+import asyncio
+import hashlib
+import json
 import logging
+import time
 
-from .vector_service import VectorService
+from .retrieval_engine import get_vector_service
 from .session_manager import SessionManager
-from .openai_service import OpenAIService
+from .conversation_memory_service import ConversationMemoryService
+from .openai_service import OpenAIService, ChatGenerationError, FALLBACK_RESPONSE
 from .prompt_service import PromptService
+from .prompt_assembler import PromptAssembler
 from .emotion_service import emotion_service
 from .location_service import location_service
 from .schedule_parser import ScheduleParser
 from .query_transformer import QueryTransformer
+from .message_analyzer import MessageAnalyzer
 from .group_member_service import group_member_service
 from .notification_service import notification_service
 from .rsvp_service import rsvp_service
+from .single_flight import SingleFlight
+from .cache_service import cache_service
+from .query_log_service import query_log_service
 from ..config.keyword_config import KeywordConfig
+from ..config.cache_config import CacheConfig
+from ..config.chat_pipeline_config import ChatPipelineConfig
 
 logger = logging.getLogger(__name__)
 
 class UnifiedChatService:
     def __init__(self):
-        self.vector_service = VectorService()
+        self.vector_service = get_vector_service()  # 프로세스 공용 검색 엔진
         self.openai_service = OpenAIService()
         self.prompt_service = PromptService()
+        self.prompt_assembler = PromptAssembler(self.prompt_service)  # 토큰 예산 기반 프롬프트 조합
         self.session_manager = SessionManager()
+        self.memory_service = ConversationMemoryService(self.vector_service)  # 장기 대화 메모리
         self.location_service = location_service
         self.schedule_parser = ScheduleParser()  # 일정 파서 추가
         self.query_transformer = QueryTransformer()  # 쿼리 변환기 추가
+        self.message_analyzer = MessageAnalyzer(self.schedule_parser, self.query_transformer)  # 의도/일정/장소 키워드 통합 분석
+        self.generation_flight = SingleFlight("unified_generation")  # 동시 동일 요청 병합
+        self._background_tasks = set()  # 일정 저장/알림 등 응답 후속 작업
         
-    def classify_intent_and_urgency(self, message: str) -> Dict[str, str]:
-        """동적 키워드 기반 의도 분류 (하드코딩 제거)"""
+    def classify_intent_and_urgency(
+        self, message: str, analysis: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        """
+        동적 키워드 기반 의도 분류 (하드코딩 제거)
+
+        MessageAnalyzer 분석 결과가 있으면 그 의도/긴급도를 우선 사용합니다.
+        """
+        if analysis and analysis.get("intent"):
+            intent = analysis["intent"]
+            urgency = analysis.get("urgency") or ("medium" if intent == "medical" else "low")
+            return {"intent": intent, "urgency": urgency}
+
         intent_keywords = KeywordConfig.get_intent_keywords()
         
         # 의도별 키워드 매칭 (확장 가능)
@@ -85,78 +113,344 @@ class UnifiedChatService:
     async def process_message(
         self, user_id: str, message: str, user_context: Dict[str, Any]
     ) -> Dict[str, Any]:
-        # 의도 및 긴급도 분석
-        classification = self.classify_intent_and_urgency(message)
+        turn = await self._prepare_turn(user_id, message, user_context)
+        intent, urgency = turn["intent"], turn["urgency"]
+
+        if turn["cached_answer"] is not None:
+            return await self._finish_turn(
+                user_id, message, turn["cached_answer"], intent, urgency,
+                turn["places_data"], cached=True, turn=turn
+            )
+
+        # 3~6. 프롬프트 조합 → AI 응답 생성 (RAG 검색 결과는 준비 단계에서 이미 가져옴)
+        generate_start = time.perf_counter()
+        generated = True
+        try:
+            ai_response_content, shared = await self.generate_response(
+                message,
+                intent,
+                conversation_history=turn["conversation_history"],
+                relevant_text=turn["relevant_text"],
+                real_places_info=turn["real_places_info"],
+                context_info=turn["context_info"],
+                prompt_tokens=turn["prompt_tokens"],
+            )
+        except ChatGenerationError:
+            # 사과 문구는 사용자에게만 보여 주고 공유 캐시에는 저장하지 않음
+            ai_response_content, shared, generated = FALLBACK_RESPONSE, False, False
+        turn["timings"]["generate"] = round((time.perf_counter() - generate_start) * 1000, 1)
+
+        # 병합된 요청은 먼저 온 요청이 이미 저장하므로 한 번만 저장
+        if turn["cache_scope"] and generated and not shared:
+            cache_service.save_cache_background(
+                message, ai_response_content, intent=intent, scope=turn["cache_scope"]
+            )
+
+        return await self._finish_turn(
+            user_id, message, ai_response_content, intent, urgency, turn["places_data"],
+            turn=turn, remember=generated,
+        )
+
+    async def process_message_stream(
+        self, user_id: str, message: str, user_context: Dict[str, Any]
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        process_message의 스트리밍 버전: (이벤트 이름, 데이터)를 순서대로 전달
+
+        - meta: 의도 / 긴급도 / 캐시 여부 (토큰보다 먼저)
+        - places: 장소 검색 결과 (있을 때만)
+        - token: 응답 텍스트 조각 (캐시 답변은 한 번에 전달)
+        - done: 세션 저장까지 끝난 최종 결과 (응답 본문 제외)
+        - error: 처리 중 오류 (부분 응답은 세션/캐시에 저장하지 않음)
+
+        스트림은 요청마다 따로 받아야 하므로 같은 프롬프트 병합(generation_flight)은 쓰지 않습니다.
+        """
+        try:
+            turn = await self._prepare_turn(user_id, message, user_context)
+            intent, urgency = turn["intent"], turn["urgency"]
+            cached = turn["cached_answer"] is not None
+
+            yield "meta", {"intent": intent, "urgency": urgency, "cached": cached}
+            if turn["places_data"]:
+                yield "places", {"places": turn["places_data"]}
+
+            if cached:
+                content = turn["cached_answer"]
+                yield "token", {"text": content}
+            else:
+                generate_start = time.perf_counter()
+                messages_for_api = await self.build_messages(
+                    message,
+                    intent,
+                    conversation_history=turn["conversation_history"],
+                    relevant_text=turn["relevant_text"],
+                    real_places_info=turn["real_places_info"],
+                    context_info=turn["context_info"],
+                    prompt_tokens=turn["prompt_tokens"],
+                )
+                parts: List[str] = []
+                async for delta in self.openai_service.stream_chat_response(messages_for_api):
+                    if not parts:
+                        turn["timings"]["first_token"] = round(
+                            (time.perf_counter() - turn["started_at"]) * 1000, 1
+                        )
+                    parts.append(delta)
+                    yield "token", {"text": delta}
+                content = "".join(parts)
+                turn["timings"]["generate"] = round((time.perf_counter() - generate_start) * 1000, 1)
+
+                if turn["cache_scope"] and content:
+                    cache_service.save_cache_background(
+                        message, content, intent=intent, scope=turn["cache_scope"]
+                    )
+
+            # 스트림이 끝난 뒤에 한 번만 세션/메모리에 저장
+            result = await self._finish_turn(
+                user_id, message, content, intent, urgency, turn["places_data"],
+                cached=cached, turn=turn
+            )
+            result.pop("response", None)
+            result.pop("places", None)
+            yield "done", result
+
+        except Exception as e:
+            logger.error(f"스트리밍 채팅 처리 오류: {e}")
+            yield "error", {"message": "응답을 생성하는 중 오류가 발생했습니다."}
+
+    async def _prepare_turn(
+        self, user_id: str, message: str, user_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        응답 생성 전 단계 (일반/스트리밍 응답 공통)
+
+        서로 의존하지 않는 단계는 asyncio.gather로 동시에 실행합니다.
+
+            키워드 의도 분류 (즉시)
+              ├─ analysis: 의도/긴급도/일정/장소 키워드 (규칙 우선, 애매할 때만 LLM 1회)
+              ├─ rag:      하이브리드 검색
+              ├─ cache:    답변 캐시 조회 (공유 가능해 보이는 질문일 때)
+              └─ memory:   최근 대화 + 관련 과거 대화 (개인 질문일 때)
+            → 분석 결과로 의도 확정 / 공유 가능 여부 재판단
+              ├─ places:   네이버 장소 검색 (장소 질문일 때)
+              └─ memory:   (공유 불가로 바뀐 경우)
+            → 응답 생성
+
+        각 단계는 ChatPipelineConfig의 타임아웃을 넘기면 결과 없이 진행하고,
+        단계별 소요 시간(ms)은 결과의 timings에 담깁니다.
+        """
+        turn_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        # 분석 결과 전에는 키워드 의도로 공유 가능 여부를 먼저 판단하고,
+        # 캐시 조회 / 대화 맥락 중 필요한 쪽을 다른 단계와 함께 미리 실행
+        keyword_intent = self.classify_intent_and_urgency(message)["intent"]
+        maybe_shareable = self._is_shareable_turn(
+            user_id, keyword_intent, message, None, user_context
+        )
+        cache_scope = self._cache_scope(keyword_intent, user_context) if maybe_shareable else None
+
+        stages = {
+            "analysis": self._run_stage(
+                "analysis", self.message_analyzer.analyze(message, keyword_intent), timings
+            ),
+            # 실패/타임아웃이어도 빈 목록으로 넘겨 build_messages에서 다시 검색하지 않도록 함
+            "rag": self._run_stage("rag", self._retrieve_context(message), timings, default=[]),
+        }
+        if cache_scope:
+            stages["cache"] = self._run_stage(
+                "cache",
+                cache_service.search_similar_cache(
+                    message, threshold=CacheConfig.SIMILARITY_THRESHOLD, scope=cache_scope
+                ),
+                timings,
+            )
+        else:
+            stages["memory"] = self._run_stage(
+                "memory", self._load_memory_context(user_id, message), timings
+            )
+
+        results = dict(zip(stages, await asyncio.gather(*stages.values())))
+
+        # 의도 및 긴급도 확정 (분석 실패/타임아웃 시 키워드 분류 + 규칙 기반 일정 추출)
+        analysis = results["analysis"] or self.message_analyzer.analyze_basic(message)
+        classification = self.classify_intent_and_urgency(message, analysis)
         intent = classification["intent"]
         urgency = classification["urgency"]
-        
-        # 일정 관련 메시지인 경우 일정 정보 추출 및 처리 (AI 기반 동적 처리)
-        schedule_info = None
-        # 모든 표현을 인식할 수 있도록 AI 기반으로 의도 판단
+
+        # 일정이 담긴 메시지는 저장/알림을 응답 생성과 별도로 진행
+        schedule_info = analysis["schedule"]
+        if schedule_info and (
+            schedule_info.get("has_time")
+            or schedule_info.get("has_location")
+            or schedule_info.get("rsvp_required")
+        ):
+            logger.info(f"📅 일정 정보 추출: {schedule_info}")
+            self._run_background(
+                self._persist_schedule(user_id, message, schedule_info, user_context)
+            )
+
+        # 일반 육아 질문은 의도 + 지역 + 자녀 나이대 범위의 시맨틱 캐시를 사용합니다.
+        # 분석 결과 의도가 바뀌었거나 일정이 담긴 개인 질문이면 미리 조회한 캐시 결과는 버림
+        cached = None
+        followups = {
+            "places": self._run_stage(
+                "places",
+                self._search_places(message, intent, user_context, analysis.get("place_keyword")),
+                timings,
+                default=([], ""),
+            ),
+        }
+        if cache_scope:
+            if intent == keyword_intent and self._is_shareable_turn(
+                user_id, intent, message, schedule_info, user_context
+            ):
+                cached = results["cache"]
+                query_log_service.log(message, intent, cache_scope, cached)
+                if cached:
+                    logger.info(f"💾 답변 캐시 히트 ({cached['tier']}, {cache_scope})")
+            else:
+                cache_scope = None
+                followups["memory"] = self._run_stage(
+                    "memory", self._load_memory_context(user_id, message), timings
+                )
+
+        results.update(zip(followups, await asyncio.gather(*followups.values())))
+        places_data, real_places_info = results["places"]
+
+        # 캐시 답변을 쓰거나, 다른 사용자에게도 제공될 답변이므로 개인 대화 기록 없이 생성
+        memory_context = results.get("memory") or {"recent_messages": [], "relevant_text": ""}
+
+        timings["prepare"] = round((time.perf_counter() - turn_start) * 1000, 1)
+
+        return {
+            "intent": intent,
+            "urgency": urgency,
+            "places_data": places_data,
+            "real_places_info": real_places_info,
+            "cache_scope": cache_scope,
+            "cached_answer": cached["answer"] if cached else None,
+            "conversation_history": memory_context["recent_messages"],
+            "relevant_text": memory_context["relevant_text"],
+            "context_info": results["rag"],
+            "timings": timings,
+            "prompt_tokens": {},  # 섹션별 프롬프트 토큰 내역 (생성 단계에서 채움)
+            "started_at": turn_start,
+        }
+
+    async def _run_stage(
+        self, name: str, coro, timings: Dict[str, float], default: Any = None
+    ) -> Any:
+        """단계 하나를 타임아웃 안에서 실행하고 소요 시간(ms) 기록 (실패/초과 시 default)"""
+        timeout = ChatPipelineConfig.get_timeout(name)
+        start = time.perf_counter()
         try:
-            schedule_info = await self.schedule_parser.parse_with_ai(message)
-            if schedule_info.get("has_time") or schedule_info.get("has_location") or schedule_info.get("rsvp_required"):
-                logger.info(f"📅 일정 정보 추출: {schedule_info}")
-                
-                # 일정 정보가 추출되면 Firestore에 저장하고 그룹 멤버에게 알림 보내기
-                if schedule_info.get("has_time") or schedule_info.get("has_location"):
-                    try:
-                        # 일정을 ChromaDB에 저장 (RAG 검색을 위해)
-                        try:
-                            # 일정 정보를 텍스트로 변환하여 ChromaDB에 저장
-                            schedule_text = self._format_schedule_text(schedule_info, message)
-                            if schedule_text and len(schedule_text) >= 20:  # 최소 길이 체크
-                                await self.vector_service.add_schedule_info(
-                                    user_id=user_id,
-                                    schedule_text=schedule_text,
-                                    intent="schedule",
-                                    urgency=schedule_info.get("urgency", "low")
-                                )
-                                logger.info(f"📅 일정 정보를 ChromaDB에 저장 완료")
-                        except Exception as e:
-                            logger.warning(f"ChromaDB 저장 실패 (계속 진행): {e}")
-                        
-                        # 일정을 Firestore에 저장 (RSVP가 필요한 경우)
-                        schedule_id = None
-                        if schedule_info.get("rsvp_required"):
-                            schedule_id = await rsvp_service.create_schedule_with_rsvp(
-                                creator_id=user_id,
-                                schedule_info=schedule_info
-                            )
-                            if schedule_id:
-                                schedule_info["schedule_id"] = schedule_id
-                                logger.info(f"📅 일정 저장 완료: {schedule_id}")
-                        
-                        # RSVP가 필요한 경우 그룹 멤버에게 알림 전송
-                        if schedule_info.get("rsvp_required"):
-                            # 그룹 멤버 조회
-                            group_members = await group_member_service.get_group_members(user_id, user_context)
-                            member_ids = [member["user_id"] for member in group_members]
-                            
-                            if member_ids:
-                                # 알림에 schedule_id 포함
-                                notification_result = await notification_service.send_schedule_notification(
-                                    user_id=user_id,
-                                    schedule_info=schedule_info,
-                                    member_ids=member_ids
-                                )
-                                logger.info(f"📢 RSVP 일정 알림 전송 완료: {notification_result}")
-                            else:
-                                logger.info("📢 RSVP 필요한 일정이지만 알림 대상 멤버가 없습니다.")
-                    except Exception as e:
-                        logger.error(f"일정 저장 및 알림 전송 실패: {e}")
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ {name} 단계 타임아웃 ({timeout}초) - 결과 없이 진행")
+            return default
         except Exception as e:
-            logger.error(f"일정 파싱 실패: {e}")
+            logger.warning(f"{name} 단계 실패 (계속 진행): {e}")
+            return default
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _run_background(self, coro):
+        """응답을 기다리게 하지 않는 후속 작업 실행 (완료 전 GC되지 않도록 참조 유지)"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _retrieve_context(self, message: str) -> List[Dict[str, Any]]:
+        """RAG 참고 정보 검색 (RRF Hybrid Search: Vector + BM25 + RRF)"""
+        return await self.vector_service.search_similar_documents(
+            message, top_k=5, use_hybrid=True
+        )
 
+    async def _load_memory_context(self, user_id: str, message: str) -> Dict[str, Any]:
+        """최근 1~2턴 + 관련 과거 대화를 토큰 예산 안에서 가져오기"""
+        recent_history = self.session_manager.get_conversation_history(
+            user_id, limit=self.memory_service.recent_turns * 2
+        )
+        return await self.memory_service.build_context(user_id, message, recent_history)
+
+    async def _persist_schedule(
+        self,
+        user_id: str,
+        message: str,
+        schedule_info: Dict[str, Any],
+        user_context: Dict[str, Any],
+    ):
+        """추출된 일정을 ChromaDB / Firestore에 저장하고 그룹 멤버에게 알림"""
+        # 일정 정보가 추출되면 Firestore에 저장하고 그룹 멤버에게 알림 보내기
+        if schedule_info.get("has_time") or schedule_info.get("has_location"):
+            try:
+                # 일정을 ChromaDB에 저장 (RAG 검색을 위해)
+                try:
+                    # 일정 정보를 텍스트로 변환하여 ChromaDB에 저장
+                    schedule_text = self._format_schedule_text(schedule_info, message)
+                    if schedule_text and len(schedule_text) >= 20:  # 최소 길이 체크
+                        await self.vector_service.add_schedule_info(
+                            user_id=user_id,
+                            schedule_text=schedule_text,
+                            intent="schedule",
+                            urgency=schedule_info.get("urgency", "low")
+                        )
+                        logger.info(f"📅 일정 정보를 ChromaDB에 저장 완료")
+                except Exception as e:
+                    logger.warning(f"ChromaDB 저장 실패 (계속 진행): {e}")
+
+                # 일정을 Firestore에 저장 (RSVP가 필요한 경우)
+                schedule_id = None
+                if schedule_info.get("rsvp_required"):
+                    schedule_id = await rsvp_service.create_schedule_with_rsvp(
+                        creator_id=user_id,
+                        schedule_info=schedule_info
+                    )
+                    if schedule_id:
+                        schedule_info["schedule_id"] = schedule_id
+                        logger.info(f"📅 일정 저장 완료: {schedule_id}")
+
+                # RSVP가 필요한 경우 그룹 멤버에게 알림 전송
+                if schedule_info.get("rsvp_required"):
+                    # 그룹 멤버 조회
+                    group_members = await group_member_service.get_group_members(user_id, user_context)
+                    member_ids = [member["user_id"] for member in group_members]
+
+                    if member_ids:
+                        # 알림에 schedule_id 포함
+                        notification_result = await notification_service.send_schedule_notification(
+                            user_id=user_id,
+                            schedule_info=schedule_info,
+                            member_ids=member_ids
+                        )
+                        logger.info(f"📢 RSVP 일정 알림 전송 완료: {notification_result}")
+                    else:
+                        logger.info("📢 RSVP 필요한 일정이지만 알림 대상 멤버가 없습니다.")
+            except Exception as e:
+                logger.error(f"일정 저장 및 알림 전송 실패: {e}")
+
+    async def _search_places(
+        self,
+        message: str,
+        intent: str,
+        user_context: Dict[str, Any],
+        place_keyword: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        장소 질문이면 주변 장소 검색 (프론트엔드용 데이터, 프롬프트용 텍스트)
+
+        place_keyword: MessageAnalyzer가 추출한 검색 키워드 (없으면 규칙 기반 추출)
+        """
         # 장소 키워드 추출
         place_keywords = self.extract_place_keywords(message)
         print(f"🔍 DEBUG: 추출된 키워드={place_keywords}")
 
         real_places_info = ""
         places_data = []  # 프론트엔드로 전달할 장소 데이터
+        places = []
 
         
-        if place_keywords and intent == "place" and user_context.get("children"):
+        if (place_keywords or place_keyword) and intent == "place" and user_context.get("children"):
             print(f"🔍 DEBUG: 네이버 API 호출 시작...")
             # 사용자 위치 정보 추출
             user_lat, user_lng = self.extract_user_location(user_context)
@@ -164,15 +458,8 @@ class UnifiedChatService:
             if user_lat and user_lng:
                 # 자연어 쿼리에서 핵심 키워드만 추출 (Query Transformation)
                 # 예: "5살 아이와 가기 좋은 공원" → "공원"
-                if place_keywords:
-                    # 첫 번째 키워드를 사용하되, 전체 메시지에서 더 정확한 키워드 추출 시도
-                    raw_keyword = place_keywords[0]
-                    # 자연어 쿼리 전체를 AI로 변환하여 더 정확한 키워드 추출
-                    transformed_keyword = await self.query_transformer.transform_query(message)
-                    search_keyword = transformed_keyword if transformed_keyword else raw_keyword
-                else:
-                    # 키워드가 없으면 메시지 전체를 변환
-                    search_keyword = await self.query_transformer.transform_query(message)
+                # 분석 호출에서 이미 변환한 키워드를 쓰고, 없으면 별도 LLM 호출 없이 규칙 기반 추출
+                search_keyword = place_keyword or self.query_transformer.extract_keyword_basic(message)
                 
                 print(f"🔍 DEBUG: 원본 쿼리: '{message}'")
                 print(f"🔍 DEBUG: 변환된 키워드: '{search_keyword}'")
@@ -215,43 +502,111 @@ class UnifiedChatService:
                 f"🔍 DEBUG: API 호출 조건 미충족 - keywords={bool(place_keywords)}, intent={intent}, children={bool(user_context.get('children'))}"
             )
 
-        # 2. SessionManager를 사용해 이전 대화 기록을 가져옵니다.
-        conversation_history = self.session_manager.get_conversation_history(user_id)
+        return places_data, real_places_info
 
-        # 3. VectorService를 사용해 RAG를 위한 참고 정보를 검색합니다.
-        # RRF Hybrid Search 사용 (Vector + BM25 + RRF)
-        context_info = await self.vector_service.search_similar_documents(
-            message, top_k=5, use_hybrid=True
-        )
+    async def generate_response(
+        self,
+        message: str,
+        intent: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        relevant_text: str = "",
+        real_places_info: str = "",
+        context_info: Optional[List[Dict[str, Any]]] = None,
+        prompt_tokens: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, bool]:
+        """
+        RAG 참고 정보와 의도별 시스템 프롬프트로 AI 응답 생성
 
-        # 4. PromptService를 사용해 최종 시스템 프롬프트를 조합합니다.
-        system_prompt_dict = self.prompt_service.get_system_prompt(intent, context_info)
+        대화 기록 없이 호출하면 사용자 간에 공유 가능한 답변이 됩니다. (캐시 예열에서도 사용)
 
-        # 실제 장소 정보가 있으면 시스템 프롬프트에 추가
-        if real_places_info:
-            system_prompt_dict["content"] += (
-                real_places_info
-                + "\n위 실제 장소 정보를 참고하여 구체적이고 정확한 추천을 해주세요."
-            )
+        Returns:
+            (응답 내용, 동시에 들어온 같은 요청의 결과를 공유받았는지 여부)
 
-        # 5. 최종 대화 메시지 목록을 구성합니다.
-        messages_for_api = (
-            [system_prompt_dict]
-            + conversation_history
-            + [{"role": "user", "content": message}]
+        Raises:
+            ChatGenerationError: 응답 생성 실패 (병합된 요청 모두에 전달)
+        """
+        messages_for_api = await self.build_messages(
+            message, intent, conversation_history, relevant_text, real_places_info, context_info,
+            prompt_tokens=prompt_tokens,
         )
 
         # 6. OpenAI API를 호출하여 AI 응답을 생성합니다.
-        ai_response_content = await self.openai_service.generate_chat_response(
-            messages_for_api
+        # 공유 가능한 의도는 완전히 같은 프롬프트로 동시에 들어온 요청을 한 번의 호출로 병합
+        shared = False
+        if CacheConfig.is_cacheable(intent):
+            ai_response_content, shared = await self.generation_flight.do(
+                self._messages_key(messages_for_api),
+                lambda: self.openai_service.generate_chat_response(
+                    messages_for_api, fallback=False
+                ),
+            )
+        else:
+            ai_response_content = await self.openai_service.generate_chat_response(
+                messages_for_api, fallback=False
+            )
+
+        return ai_response_content, shared
+
+    async def build_messages(
+        self,
+        message: str,
+        intent: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        relevant_text: str = "",
+        real_places_info: str = "",
+        context_info: Optional[List[Dict[str, Any]]] = None,
+        prompt_tokens: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        RAG 참고 정보 + 의도별 시스템 프롬프트 + 대화 기록으로 LLM 메시지 목록 구성
+
+        context_info가 None이면 (캐시 예열 등) 여기서 RAG 검색을 합니다.
+        (채팅 파이프라인은 검색 실패/타임아웃 시 빈 목록을 넘기므로 다시 검색하지 않음)
+        prompt_tokens를 넘기면 섹션별 토큰 내역을 채워 줍니다.
+        """
+        # 3. VectorService를 사용해 RAG를 위한 참고 정보를 검색합니다.
+        if context_info is None:
+            context_info = await self._retrieve_context(message)
+
+        # 4~5. 시스템 프롬프트 / RAG / 장소 / 과거 대화 / 대화 기록을 토큰 예산 안에서 조합합니다.
+        messages_for_api, breakdown = self.prompt_assembler.assemble(
+            message,
+            intent,
+            context_info=context_info,
+            real_places_info=real_places_info,
+            relevant_text=relevant_text,
+            conversation_history=conversation_history,
         )
+        if prompt_tokens is not None:
+            prompt_tokens.update(breakdown)
+        return messages_for_api
 
-        # 7. SessionManager를 사용해 새로운 대화 내용을 저장합니다.
-        new_history = conversation_history + [
-            {"role": "user", "content": message},
-            {"role": "assistant", "content": ai_response_content},
-        ]
-        self.session_manager.save_conversation_history(user_id, new_history)
+    async def _finish_turn(
+        self,
+        user_id: str,
+        message: str,
+        ai_response_content: str,
+        intent: str,
+        urgency: str,
+        places_data: List[Dict[str, Any]],
+        cached: bool = False,
+        turn: Optional[Dict[str, Any]] = None,
+        remember: bool = True,
+    ) -> Dict[str, Any]:
+        # 7. 이번 턴만 세션에 추가하고, 장기 메모리에도 색인합니다.
+        self.session_manager.save_conversation_history(
+            user_id,
+            [
+                {"role": "user", "content": message},
+                {"role": "assistant", "content": ai_response_content},
+            ],
+        )
+        # 메모리 색인(임베딩 + Chroma 쓰기)은 응답을 기다리게 하지 않도록 백그라운드로 실행
+        # (생성 실패 시의 사과 문구는 과거 대화로 색인하지 않음)
+        if remember and ai_response_content:
+            self._run_background(
+                self.memory_service.remember_exchange(user_id, message, ai_response_content)
+            )
 
         # 8. 최종 결과를 메인 백엔드로 반환합니다.
         result = {
@@ -260,8 +615,18 @@ class UnifiedChatService:
             "intent": intent,
             "urgency": urgency,
             "timestamp": datetime.now().isoformat(),
+            "cached": cached,
         }
 
+        # 단계별 소요 시간 (ms)
+        if turn is not None:
+            timings = turn["timings"]
+            timings["total"] = round((time.perf_counter() - turn["started_at"]) * 1000, 1)
+            result["timings"] = timings
+            logger.info(f"⏱️ 채팅 단계 소요 시간(ms): {timings}")
+            if turn["prompt_tokens"]:
+                result["prompt_tokens"] = turn["prompt_tokens"]
+
         # 장소 검색 결과가 있으면 포함
         if places_data:
             result["places"] = places_data
@@ -269,6 +634,78 @@ class UnifiedChatService:
 
         return result
 
+    def _is_shareable_turn(
+        self,
+        user_id: str,
+        intent: str,
+        message: str,
+        schedule_info: Optional[Dict[str, Any]],
+        user_context: Dict[str, Any],
+    ) -> bool:
+        """
+        답변을 다른 사용자와 공유(캐시)해도 되는 일반 질문인지 판단
+
+        공유하면 대화 기록/과거 대화 없이 답변하므로, 대화를 새로 시작하는
+        독립된 질문(최근 대화 없음 + 질문으로 끝남)일 때만 공유합니다.
+        """
+        if not CacheConfig.is_cacheable(intent):
+            return False
+        if not CacheConfig.is_standalone_question(message):
+            return False
+        if self._has_recent_turn(user_id):
+            return False
+        # 일정이 담긴 메시지는 저장/알림 등 개인 처리가 필요
+        if schedule_info and (
+            schedule_info.get("has_time")
+            or schedule_info.get("has_location")
+            or schedule_info.get("rsvp_required")
+        ):
+            return False
+        # 개인 상황이나 이전 대화에 기대는 질문
+        if any(marker in message for marker in CacheConfig.PERSONAL_MARKERS):
+            return False
+        child_names = [c.get("name") for c in user_context.get("children", []) if c.get("name")]
+        if any(name in message for name in child_names):
+            return False
+        return True
+
+    def _has_recent_turn(self, user_id: str) -> bool:
+        """SHAREABLE_IDLE_SECONDS 안에 이 사용자의 대화가 있었는지 (이어지는 질문일 수 있음)"""
+        history = self.session_manager.get_conversation_history(user_id, limit=1)
+        if not history:
+            return False
+        try:
+            last_at = datetime.fromisoformat(history[-1]["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            return True  # 시각을 알 수 없으면 이어지는 대화로 간주
+        return (datetime.now() - last_at).total_seconds() < CacheConfig.SHAREABLE_IDLE_SECONDS
+
+    def _cache_scope(self, intent: str, user_context: Dict[str, Any]) -> str:
+        """캐시 범위: 의도 | 대략적인 지역 | 자녀 나이대"""
+        area = user_context.get("area")
+        if not area:
+            lat, lng = self.extract_user_location(user_context)
+            # 약 10km 격자 (정확한 위치는 키에 넣지 않음, 좌표가 없거나 잘못되면 지역 무관)
+            try:
+                area = f"{round(float(lat), 1)},{round(float(lng), 1)}" if lat and lng else "any"
+            except (ValueError, TypeError):
+                logger.warning(f"좌표 타입 오류 (캐시 범위는 지역 무관): lat={lat}, lng={lng}")
+                area = "any"
+
+        ages = sorted({
+            CacheConfig.get_age_band(int(child["age"]))
+            for child in user_context.get("children", [])
+            if str(child.get("age", "")).isdigit()
+        })
+        age_band = "+".join(ages) if ages else "any"
+        return f"{intent}|{area}|{age_band}"
+
+    @staticmethod
+    def _messages_key(messages: List[Dict[str, str]]) -> str:
+        """LLM에 보낼 메시지 목록 전체의 해시 (같은 프롬프트 판별)"""
+        payload = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+        return hashlib.md5(payload.encode()).hexdigest()
+
     def extract_user_location(self, user_context: Dict[str, Any]) -> tuple:
         """사용자 컨텍스트에서 위치 정보 추출"""
         children = user_context.get("children", [])
@@ -309,13 +746,8 @@ class UnifiedChatService:
         if schedule_info.get("rsvp_required"):
             parts.append("참석 여부 확인 필요")
         
-        formatted_text = " ".join(parts)
-        
-        # 길이 제한 (300자)
-        if len(formatted_text) > 300:
-            formatted_text = formatted_text[:297] + "..."
-        
-        return formatted_text
+        # 300자를 넘는 긴 안내문은 잘라내지 않고 VectorService에서 청크로 나눠 저장
+        return " ".join(parts)
 
     async def process_unified_chat(self, message: str, user_id: str) -> str:
         # 1. 감정 분석 추가
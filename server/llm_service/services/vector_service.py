@@ -2,27 +2,74 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+import asyncio
 import logging
 import os
 import re
+import heapq
+import hashlib
 from rank_bm25 import BM25Okapi
+from ..utils.chunk_utils import iter_chunks
+from .embedding_batcher import BatchedEmbeddings
+from ..config.llm_config import LLMConfig
 import time
+import weakref
 
 
 class VectorService:
-    def __init__(self, persist_directory: str = "./chroma_db"):
-        self.embeddings = OpenAIEmbeddings()
+    # 살아있는 인스턴스 추적 (같은 DB/컬렉션을 여는 중복 인스턴스 감지용)
+    _instances: "weakref.WeakSet[VectorService]" = weakref.WeakSet()
+
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        embeddings=None,
+        collection_name: str = "langchain",
+    ):
+        # embeddings를 주입하면 OpenAI 대신 사용 (벤치마크용 오프라인 임베딩 등)
+        # 기본 OpenAI 임베딩은 검색 질의를 동시 요청끼리 묶어서 호출 (embedding_batcher)
+        self.embeddings = embeddings or BatchedEmbeddings(OpenAIEmbeddings(base_url=LLMConfig.BASE_URL))
         self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self._register_instance()
         self.vector_store = Chroma(
-            persist_directory=self.persist_directory, embedding_function=self.embeddings
+            collection_name=collection_name,
+            persist_directory=self.persist_directory,
+            embedding_function=self.embeddings,
         )
         # BM25 인덱스 및 문서 캐시
         self.bm25_index: Optional[BM25Okapi] = None
         self.bm25_documents: List[str] = []  # 원본 문서 텍스트
         self.bm25_doc_metadata: List[Dict[str, Any]] = []  # 문서 메타데이터
         self.bm25_last_update: Optional[float] = None
+        # 색인 내용이 바뀔 때마다 달라지는 버전 (평가 결과 캐시 키 등에 사용)
+        self.index_version: str = "empty"
         self._initialize_bm25_index()
 
+    def _register_instance(self):
+        key = (os.path.abspath(self.persist_directory), self.collection_name)
+        for other in VectorService._instances:
+            if (os.path.abspath(other.persist_directory), other.collection_name) == key:
+                logging.warning(
+                    f"같은 컬렉션을 여는 VectorService가 이미 있습니다: {key} "
+                    "(retrieval_engine.get_vector_service() 사용 권장)"
+                )
+                break
+        VectorService._instances.add(self)
+
+    @classmethod
+    def live_instances(cls) -> List["VectorService"]:
+        return list(cls._instances)
+
+    @classmethod
+    def duplicate_instance_keys(cls) -> List[str]:
+        """같은 (저장 경로, 컬렉션)을 연 인스턴스가 2개 이상인 키 목록"""
+        counts: Dict[Tuple[str, str], int] = {}
+        for vs in cls._instances:
+            key = (os.path.abspath(vs.persist_directory), vs.collection_name)
+            counts[key] = counts.get(key, 0) + 1
+        return [f"{path}:{name}" for (path, name), count in counts.items() if count > 1]
+
     async def add_schedule_info(
         self,
         user_id: str,
@@ -31,8 +78,8 @@ class VectorService:
         urgency: str = "low",
     ):
         # 임베딩 단위 길이 체크 (예: 20~300자)
-        if not (20 <= len(schedule_text) <= 300):
-            logging.warning(f"임베딩 단위 길이 초과/미만: {len(schedule_text)}자")
+        if len(schedule_text) < 20:
+            logging.warning(f"임베딩 단위 길이 미만: {len(schedule_text)}자")
             return
         try:
             metadata = {
@@ -42,6 +89,10 @@ class VectorService:
                 "urgency": urgency,
                 "created_at": datetime.now().isoformat(),
             }
+            if len(schedule_text) > 300:
+                # 긴 공지/안내문은 청크로 나눠 저장
+                await self.add_long_document(schedule_text, metadata)
+                return
             self.vector_store.add_texts([schedule_text], metadatas=[metadata])
             self.vector_store.persist()
             # BM25 인덱스 업데이트
@@ -50,14 +101,184 @@ class VectorService:
         except Exception as e:
             logging.error(f"스케줄 저장 실패: {e}")
 
+    async def add_texts_batch(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        여러 문서를 배치 단위로 한 번에 저장합니다.
+
+        문서마다 add_texts + BM25 재구축을 반복하지 않고,
+        batch_size개씩 임베딩/저장한 뒤 BM25 인덱스는 마지막에 한 번만 재구축합니다.
+
+        Returns:
+            저장된 문서 수
+        """
+        if not texts:
+            return 0
+        metadatas = metadatas or [{} for _ in texts]
+        added = 0
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            self.vector_store.add_texts(
+                texts[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end] if ids else None,
+            )
+            added += len(texts[start:end])
+        self.vector_store.persist()
+        self._update_bm25_index()
+        logging.info(f"배치 저장 완료: {added}개 문서")
+        return added
+
+    async def upsert_documents(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        batch_size: int = 500,
+        rebuild_bm25: bool = True,
+    ) -> int:
+        """
+        고정 ID 기준으로 문서를 일괄 추가/갱신합니다 (이미 있으면 덮어씀).
+
+        외부 원본(Firestore 등)과 동기화할 때 같은 문서가 중복 저장되지 않도록 사용합니다.
+        임베딩 API 호출 / Chroma 쓰기 / BM25 재구축은 모두 동기 작업이므로 스레드에서 실행합니다.
+        """
+        if not ids:
+            return 0
+        await asyncio.to_thread(self._upsert_batches, ids, texts, metadatas, batch_size)
+        if rebuild_bm25:
+            await asyncio.to_thread(self._update_bm25_index)
+        return len(ids)
+
+    def _upsert_batches(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        batch_size: int,
+    ):
+        collection = self.vector_store._collection
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            batch_texts = texts[start:end]
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=self.embeddings.embed_documents(batch_texts),
+                documents=batch_texts,
+                metadatas=metadatas[start:end],
+            )
+
+    async def delete_documents(self, ids: List[str], rebuild_bm25: bool = True) -> int:
+        """ID 목록으로 문서를 일괄 삭제합니다."""
+        if not ids:
+            return 0
+        await asyncio.to_thread(self.vector_store._collection.delete, ids=ids)
+        if rebuild_bm25:
+            await asyncio.to_thread(self._update_bm25_index)
+        return len(ids)
+
+    async def add_long_document(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        parent_id: Optional[str] = None,
+        target_chars: int = 300,
+        overlap_chars: int = 50,
+        batch_size: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        긴 문서(어린이집 공지, 가정통신문, 육아 가이드 등)를 청크로 나눠 저장합니다.
+
+        문장 단위로 나눈 뒤 target_chars 크기 창에 겹치게 묶고(utils/chunk_utils.iter_chunks),
+        각 청크에 parent_id를 붙여 batch_size개씩 저장합니다.
+        같은 parent_id로 다시 넣으면 기존 청크를 지우고 새로 저장합니다.
+        parent_id를 주지 않으면 (user_id, 본문)으로 만들어서, 다른 사용자가 같은 공지를 올려도
+        서로의 청크를 지우거나 덮어쓰지 않습니다.
+
+        Returns:
+            {"parent_id": 부모 문서 ID, "chunks": 저장된 청크 수}
+        """
+        base_metadata = dict(metadata or {})
+        if not parent_id:
+            owner_key = f"{base_metadata.get('user_id', '')}\x00{text}"
+            parent_id = f"doc_{hashlib.md5(owner_key.encode()).hexdigest()[:16]}"
+        base_metadata["parent_id"] = parent_id
+
+        # 재색인 시 이전 버전 청크가 남지 않도록 먼저 정리
+        await asyncio.to_thread(
+            self.vector_store._collection.delete, where={"parent_id": parent_id}
+        )
+
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        chunk_count = 0
+        for chunk_index, chunk in enumerate(
+            iter_chunks(text, target_chars=target_chars, overlap_chars=overlap_chars)
+        ):
+            ids.append(f"{parent_id}#{chunk_index}")
+            texts.append(chunk)
+            metadatas.append({**base_metadata, "chunk_index": chunk_index})
+            if len(ids) >= batch_size:
+                chunk_count += await self.upsert_documents(ids, texts, metadatas, rebuild_bm25=False)
+                ids, texts, metadatas = [], [], []
+        if ids:
+            chunk_count += await self.upsert_documents(ids, texts, metadatas, rebuild_bm25=False)
+
+        await asyncio.to_thread(self._update_bm25_index)
+        logging.info(f"긴 문서 저장됨: {parent_id} - {chunk_count}개 청크")
+        return {"parent_id": parent_id, "chunks": chunk_count}
+
+    def _group_by_parent(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        같은 부모 문서의 청크는 가장 순위가 높은 하나만 남깁니다.
+
+        긴 문서 하나가 top-k를 독차지하지 않도록 하기 위함이며,
+        대표 청크에 matched_chunks(해당 문서에서 걸린 청크 수)를 표시합니다.
+        """
+        grouped: List[Dict[str, Any]] = []
+        by_parent: Dict[str, Dict[str, Any]] = {}
+        for result in results:
+            parent_id = (result.get("metadata") or {}).get("parent_id")
+            if not parent_id:
+                grouped.append(result)
+                continue
+            if parent_id in by_parent:
+                by_parent[parent_id]["matched_chunks"] += 1
+                continue
+            representative = {**result, "matched_chunks": 1}
+            by_parent[parent_id] = representative
+            grouped.append(representative)
+        return grouped
+
+    def list_document_ids(self, where: Optional[Dict[str, Any]] = None) -> List[str]:
+        """조건에 맞는 문서 ID 목록 (본문/임베딩 없이 ID만 조회)"""
+        collection = self.vector_store._collection
+        ids: List[str] = []
+        offset = 0
+        while True:
+            page = collection.get(where=where, limit=self.BM25_PAGE_SIZE, offset=offset, include=[])
+            page_ids = page.get("ids") or []
+            ids.extend(page_ids)
+            offset += len(page_ids)
+            if len(page_ids) < self.BM25_PAGE_SIZE:
+                break
+        return ids
+
     async def search_similar_schedules(
         self, query_text: str, top_k: int = 3
     ) -> List[Dict[str, Any]]:
-        results = self.vector_store.similarity_search_with_score(query_text, k=top_k)
-        return [
+        # 청크가 부모 문서별로 묶이면서 줄어드는 만큼 여유 있게 가져옴
+        results = self.vector_store.similarity_search_with_score(query_text, k=top_k * 2)
+        return self._group_by_parent([
             {"text": doc.page_content, "metadata": doc.metadata, "similarity": score}
             for doc, score in results
-        ]
+        ])[:top_k]
 
     async def search_similar_documents(
         self, query_text: str, top_k: int = 3, use_hybrid: bool = True
@@ -71,6 +292,15 @@ class VectorService:
         else:
             return await self.search_similar_schedules(query_text, top_k)
 
+    async def keyword_search(
+        self, query_text: str, top_k: int = 3
+    ) -> List[Dict[str, Any]]:
+        """BM25 키워드 검색만 사용 (벤치마크/평가 비교용)"""
+        return [
+            {"text": doc_text, "metadata": metadata, "similarity": score}
+            for doc_text, metadata, score in self._bm25_search(query_text, top_k)
+        ]
+
     async def add_community_info(self, community_data: Dict[str, Any]):
         """커뮤니티 정보를 벡터 DB에 저장"""
         try:
@@ -272,6 +502,9 @@ class VectorService:
         tokens.extend(korean_words)
         return list(set(tokens))  # 중복 제거
     
+    # BM25 재구축 시 ChromaDB에서 한 번에 읽어올 문서 수
+    BM25_PAGE_SIZE = 5000
+
     def _initialize_bm25_index(self):
         """BM25 인덱스를 초기화합니다."""
         try:
@@ -290,18 +523,38 @@ class VectorService:
             # LangChain의 Chroma는 내부적으로 chromadb를 사용하므로 collection에 직접 접근
             collection = self.vector_store._collection
             
-            # 모든 문서 조회 (최대 10000개)
-            all_data = collection.get(limit=10000)
+            # 모든 문서 조회 (페이지 단위로 끝까지 - 10000개 제한 없음)
+            documents: List[str] = []
+            metadatas: List[Dict[str, Any]] = []
+            version_hash = hashlib.md5()
+            offset = 0
+            while True:
+                page = collection.get(
+                    limit=self.BM25_PAGE_SIZE,
+                    offset=offset,
+                    include=["documents", "metadatas"],
+                )
+                page_docs = page.get('documents') or []
+                if not page_docs:
+                    break
+                documents.extend(page_docs)
+                # 같은 ID로 내용만 바뀌어도(upsert_documents) 버전이 달라지도록 ID와 본문을 함께 해시
+                for doc_id, doc_text in zip(page.get('ids') or [], page_docs):
+                    version_hash.update(f"{doc_id}\x00{doc_text}\x00".encode())
+                metadatas.extend(page.get('metadatas') or [{}] * len(page_docs))
+                offset += len(page_docs)
+                if len(page_docs) < self.BM25_PAGE_SIZE:
+                    break
             
-            if not all_data or not all_data.get('documents'):
+            if not documents:
                 logging.warning("ChromaDB에 문서가 없습니다. BM25 인덱스를 건너뜁니다.")
                 self.bm25_index = None
                 self.bm25_documents = []
                 self.bm25_doc_metadata = []
+                self.index_version = "empty"
                 return
             
-            documents = all_data['documents']
-            metadatas = all_data.get('metadatas', [{}] * len(documents))
+            self.index_version = f"{len(documents)}-{version_hash.hexdigest()[:12]}"
             
             # 문서를 토큰화하여 BM25 인덱스 구축
             tokenized_docs = [self._tokenize_korean(doc) for doc in documents]
@@ -402,6 +655,99 @@ class VectorService:
         
         return results
     
+    def _vector_search(
+        self, query_text: str, k: int, query_embedding: Optional[List[float]] = None
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Semantic Search 결과를 (doc_text, metadata, distance) 형식으로 반환
+        
+        query_embedding을 넘기면 임베딩 API 호출 없이 바로 검색합니다
+        (여러 검색 설정이 같은 쿼리 임베딩을 재사용할 때).
+        """
+        if query_embedding is not None:
+            results = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=k
+            )
+        else:
+            results = self.vector_store.similarity_search_with_score(query_text, k=k)
+        return [(doc.page_content, doc.metadata, float(score)) for doc, score in results]
+    
+    def _bm25_search(
+        self, query_text: str, k: int
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """Keyword Search 결과를 (doc_text, metadata, bm25_score) 형식으로 반환"""
+        if self.bm25_index is None:
+            return []
+        
+        bm25_results = []
+        try:
+            # 쿼리 토큰화
+            query_tokens = self._tokenize_korean(query_text)
+            if not query_tokens:
+                return []
+            
+            # BM25 점수 계산
+            bm25_scores = self.bm25_index.get_scores(query_tokens)
+            
+            # 상위 k개 결과 선택 (전체 정렬 대신 부분 선택 - 문서가 많을 때 O(N log k))
+            top_indices = heapq.nlargest(
+                k, range(len(bm25_scores)), key=lambda i: bm25_scores[i]
+            )
+            
+            # BM25 결과 포맷팅
+            for idx in top_indices:
+                if idx < len(self.bm25_documents):
+                    doc_text = self.bm25_documents[idx]
+                    metadata = self.bm25_doc_metadata[idx] if idx < len(self.bm25_doc_metadata) else {}
+                    bm25_results.append((doc_text, metadata, float(bm25_scores[idx])))
+        except Exception as e:
+            logging.warning(f"BM25 검색 중 오류 발생: {e}")
+            # BM25 실패 시 벡터 검색만 사용
+            return []
+        return bm25_results
+    
+    def _hybrid_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        vector_k: int = 10,
+        bm25_k: int = 10,
+        rrf_k: int = 60,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """hybrid_search의 동기 본체 (스레드 풀/평가 하네스에서 직접 호출 가능)"""
+        # 1. Semantic Search (Vector Search) 수행
+        # OpenAI Embedding을 사용하여 의미 유사도 기반 검색
+        vector_results = self._vector_search(query_text, vector_k, query_embedding)
+        
+        # 2. Keyword Search (BM25) 수행
+        # 키워드 빈도 기반 정확한 매칭 검색
+        bm25_results = self._bm25_search(query_text, bm25_k)
+        
+        # BM25 인덱스가 없거나 업데이트가 필요한 경우
+        if self.bm25_index is None:
+            logging.info("BM25 인덱스가 없습니다. Semantic Search만 사용합니다.")
+            # Semantic Search (Vector Search) 결과만 반환
+            return self._group_by_parent([
+                {
+                    "text": doc_text,
+                    "metadata": metadata,
+                    "similarity": 1.0 - score,  # 거리를 유사도로 변환
+                    "vector_score": score,
+                    "bm25_score": 0.0,
+                    "rrf_score": 0.0
+                }
+                for doc_text, metadata, score in vector_results
+            ])[:top_k]
+        
+        # 3. RRF로 Semantic Search와 Keyword Search 결과 통합
+        rrf_results = self._reciprocal_rank_fusion(
+            vector_results, bm25_results, k=rrf_k
+        )
+        
+        # 4. 긴 문서의 청크는 부모 문서별로 묶은 뒤 최종 결과 반환
+        return self._group_by_parent(rrf_results)[:top_k]
+    
     async def hybrid_search(
         self, query_text: str, top_k: int = 5, vector_k: int = 10, bm25_k: int = 10
     ) -> List[Dict[str, Any]]:
@@ -434,7 +780,8 @@ class VectorService:
         
         왜 async로 만들었나요?
         - 기존 search_similar_documents()가 async였고, unified_chat_service에서 await로 호출합니다
-        - 일관성을 위해 async로 구현했습니다 (실제로는 동기 작업이지만)
+        - 실제 검색(임베딩 + Chroma + BM25)은 동기 작업이라 스레드 풀에서 실행합니다
+          (채팅 단계들이 asyncio.gather로 동시에 실행될 때 이벤트 루프를 막지 않도록)
         
         왜 vector_service에 만들었나요?
         - 기존 RAG 검색 로직이 VectorService에 있습니다 (search_similar_documents)
@@ -444,73 +791,11 @@ class VectorService:
         start_time = time.time()
         
         try:
-            # 1. Semantic Search (Vector Search) 수행
-            # OpenAI Embedding을 사용하여 의미 유사도 기반 검색
-            vector_results_raw = self.vector_store.similarity_search_with_score(
-                query_text, k=vector_k
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                None, self._hybrid_search, query_text, top_k, vector_k, bm25_k
             )
             
-            # Semantic Search 결과 포맷팅: (doc_text, metadata, score)
-            vector_results = []
-            for doc, score in vector_results_raw:
-                doc_text = doc.page_content  # 문서 텍스트를 직접 사용
-                vector_results.append((doc_text, doc.metadata, float(score)))
-            
-            # 2. Keyword Search (BM25) 수행
-            # 키워드 빈도 기반 정확한 매칭 검색
-            bm25_results = []
-            if self.bm25_index is not None:
-                try:
-                    # 쿼리 토큰화
-                    query_tokens = self._tokenize_korean(query_text)
-                    
-                    if query_tokens:
-                        # BM25 점수 계산
-                        bm25_scores = self.bm25_index.get_scores(query_tokens)
-                        
-                        # 상위 bm25_k개 결과 선택
-                        top_indices = sorted(
-                            range(len(bm25_scores)), 
-                            key=lambda i: bm25_scores[i], 
-                            reverse=True
-                        )[:bm25_k]
-                        
-                        # BM25 결과 포맷팅
-                        for idx in top_indices:
-                            if idx < len(self.bm25_documents):
-                                doc_text = self.bm25_documents[idx]
-                                metadata = self.bm25_doc_metadata[idx] if idx < len(self.bm25_doc_metadata) else {}
-                                score = float(bm25_scores[idx])
-                                bm25_results.append((doc_text, metadata, score))
-                except Exception as e:
-                    logging.warning(f"BM25 검색 중 오류 발생: {e}")
-                    # BM25 실패 시 벡터 검색만 사용
-                    pass
-            
-            # BM25 인덱스가 없거나 업데이트가 필요한 경우
-            if self.bm25_index is None:
-                logging.info("BM25 인덱스가 없습니다. Semantic Search만 사용합니다.")
-                # Semantic Search (Vector Search) 결과만 반환
-                results = [
-                    {
-                        "text": doc.page_content,
-                        "metadata": doc.metadata,
-                        "similarity": 1.0 - float(score),  # 거리를 유사도로 변환
-                        "vector_score": float(score),
-                        "bm25_score": 0.0,
-                        "rrf_score": 0.0
-                    }
-                    for doc, score in vector_results_raw[:top_k]
-                ]
-            else:
-                # 3. RRF로 Semantic Search와 Keyword Search 결과 통합
-                rrf_results = self._reciprocal_rank_fusion(
-                    vector_results, bm25_results, k=60
-                )
-                
-                # 4. 최종 결과 반환 (이미 문서 텍스트가 포함되어 있음)
-                results = rrf_results[:top_k]
-            
             elapsed_time = time.time() - start_time
             logging.info(f"Hybrid Search 완료: {len(results)}개 결과, {elapsed_time:.3f}초 소요")
             
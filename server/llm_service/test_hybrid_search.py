@@ -33,7 +33,7 @@ else:
 # 프로젝트 루트를 Python 경로에 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.vector_service import VectorService
+from llm_service.services.retrieval_engine import get_vector_service
 import logging
 
 # 로깅 설정
@@ -65,7 +65,7 @@ async def test_hybrid_search():
     # VectorService 초기화
     print("\n1️⃣ VectorService 초기화 중...")
     try:
-        vector_service = VectorService()
+        vector_service = get_vector_service()
         print("✅ VectorService 초기화 완료")
     except Exception as e:
         print(f"❌ VectorService 초기화 실패: {e}")
@@ -221,7 +221,7 @@ async def test_with_sample_data():
     print("📝 샘플 데이터 추가 및 테스트")
     print("=" * 60)
     
-    vector_service = VectorService()
+    vector_service = get_vector_service()
     
     # 샘플 문서 추가 (20자 이상인 문서들)
     # BM25가 제대로 작동하려면 최소 10-20개 문서가 권장됩니다
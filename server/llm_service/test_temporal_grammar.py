@@ -0,0 +1,90 @@
+"""
+한국어 시간 표현 문법(utils/temporal_grammar.py) 단위 테스트
+
+기준 시각은 2024-01-03(수) 15:00으로 고정합니다.
+confidence는 ScheduleParser.CONFIDENCE_THRESHOLD(기본 0.7) 기준으로
+규칙만으로 확정하는지(LLM 생략) 여부를 확인합니다.
+
+사용법:
+    cd server/llm_service
+    python -m pytest -q test_temporal_grammar.py
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llm_service.utils.temporal_grammar import parse_temporal
+
+NOW = datetime(2024, 1, 3, 15, 0)
+THRESHOLD = 0.7
+
+# (메시지, 시작 시각, 종료 시각, 규칙만으로 확정하는지)
+CASES = [
+    # 상대 날짜 / 요일 / 주말
+    ("내일 오후 3시에 만나요", "2024-01-04T15:00:00", None, True),
+    ("모레 오전 10시 반", "2024-01-05T10:30:00", None, True),
+    ("다음주 월요일 오전 10시", "2024-01-08T10:00:00", None, True),
+    ("금요일 저녁 7시", "2024-01-05T19:00:00", None, True),
+    ("이번 주말 점심에 볼까요", "2024-01-06T12:00:00", None, False),
+    # 날짜 형식
+    ("3월 5일 18:30 정기 모임", "2024-03-05T18:30:00", None, True),
+    ("2024-02-10 오후 2시", "2024-02-10T14:00:00", None, True),
+    # 날짜 없이 시각만: 이미 지났으면 내일
+    ("오후 2시에 봐요", "2024-01-04T14:00:00", None, True),
+    ("오후 5시에 봐요", "2024-01-03T17:00:00", None, True),
+    # 밤 12시 / 자정은 그날이 끝나는 자정 (다음 날 0시)
+    ("오늘 밤 12시", "2024-01-04T00:00:00", None, True),
+    ("오늘 자정까지", "2024-01-04T00:00:00", None, True),
+    ("밤 12시에 출발", "2024-01-04T00:00:00", None, True),
+    # 범위
+    ("내일 오후 2시부터 4시까지", "2024-01-04T14:00:00", "2024-01-04T16:00:00", True),
+    ("내일 오전 10시부터 12시까지", "2024-01-04T10:00:00", "2024-01-04T12:00:00", True),
+    ("내일 10~2시", "2024-01-04T10:00:00", "2024-01-04T14:00:00", True),
+    ("내일 저녁 7시~9시", "2024-01-04T19:00:00", "2024-01-04T21:00:00", True),
+    ("밤 11시~1시", "2024-01-03T23:00:00", "2024-01-04T01:00:00", True),
+    ("밤 11~1시", "2024-01-03T23:00:00", "2024-01-04T01:00:00", True),
+    ("밤 10시~12시", "2024-01-03T22:00:00", "2024-01-04T00:00:00", True),
+    # 오전/오후가 불분명하거나 여러 날짜가 섞이면 LLM으로 확인
+    ("내일 6시", "2024-01-04T18:00:00", None, True),
+    ("내일 말고 모레 3시", "2024-01-04T15:00:00", None, False),
+    # 존재하지 않는 날짜는 규칙으로 확정하지 않음
+    ("2024-02-30 10시", None, None, False),
+    ("2월 30일 오후 3시", None, None, False),
+]
+
+
+@pytest.mark.parametrize("message, start, end, confident", CASES)
+def test_parse_temporal(message, start, end, confident):
+    result = parse_temporal(message, now=NOW)
+    assert result["has_cue"] is True
+    if start is not None:
+        assert result["time"] == start
+        assert result["end_time"] == end
+    assert (result["confidence"] >= THRESHOLD) is confident, result
+
+
+@pytest.mark.parametrize("message", ["고마워요", "아이가 요즘 잘 먹어요"])
+def test_no_temporal_cue(message):
+    result = parse_temporal(message, now=NOW)
+    assert result == {"has_cue": False, "time": None, "end_time": None, "confidence": 1.0}
+
+
+@pytest.mark.parametrize("message", ["나중에 만나요", "다음 달에 한번 봐요", "2024-02-30"])
+def test_vague_cue_needs_llm(message):
+    result = parse_temporal(message, now=NOW)
+    assert result["has_cue"] is True
+    assert result["time"] is None
+    assert result["confidence"] < THRESHOLD
+
+
+def test_resolved_time_is_not_in_the_past():
+    """규칙만으로 확정한 시각은 기준 시각 이후여야 함"""
+    for message, _, _, confident in CASES:
+        result = parse_temporal(message, now=NOW)
+        if confident and result["time"]:
+            assert datetime.fromisoformat(result["time"]) >= NOW, message
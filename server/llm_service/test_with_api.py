@@ -82,10 +82,13 @@ async def test_search_performance():
     print("📊 검색 성능 비교 테스트")
     print("=" * 60)
     
+    import sys
     import time
-    from services.vector_service import VectorService
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from llm_service.services.retrieval_engine import get_vector_service
     
-    vector_service = VectorService()
+    vector_service = get_vector_service()
     query = "아이가 밤에 잠을 안 자요"
     
     # Vector Search만
@@ -1,9 +1,87 @@
 import re
-from typing import List
+from typing import Iterator, List
+
+# 문장 경계: 마침표/느낌표/물음표 뒤 공백 또는 줄바꿈
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
 
 def split_text_by_meaning(text: str) -> List[str]:
-    # 문장 구분자 기준 분할 (마침표, 느낌표, 물음표 뒤 공백)
-    chunks = re.split(r'(?<=[.!?])\s+', text.strip())
+    # 문장 구분자 기준 분할 (마침표, 느낌표, 물음표 뒤 공백 / 줄바꿈)
+    chunks = SENTENCE_BOUNDARY.split(text.strip())
     # 빈 문자열 제거
-    chunks = [chunk for chunk in chunks if chunk]
+    chunks = [chunk.strip() for chunk in chunks if chunk and chunk.strip()]
     return chunks
+
+
+def _split_long_sentence(sentence: str, target_chars: int, overlap_chars: int) -> Iterator[str]:
+    """목표 크기보다 긴 한 문장은 글자 단위로 겹치게 자르기"""
+    step = max(target_chars - overlap_chars, 1)
+    for start in range(0, len(sentence), step):
+        yield sentence[start:start + target_chars]
+        if start + target_chars >= len(sentence):
+            break
+
+
+def _overlap_tail(chunk: str, max_chars: int) -> str:
+    """앞 청크의 끝부분 max_chars자 (가능하면 단어 경계에서 시작)"""
+    if max_chars <= 0:
+        return ""
+    if len(chunk) <= max_chars:
+        return chunk
+    tail = chunk[-max_chars:]
+    if chunk[-max_chars - 1] != " ":
+        # 단어 중간에서 시작하면 다음 공백부터 (공백이 없으면 글자 단위 그대로)
+        space = tail.find(" ")
+        if 0 <= space < len(tail) - 1:
+            tail = tail[space + 1:]
+    return tail
+
+
+def iter_chunks(
+    text: str,
+    target_chars: int = 300,
+    overlap_chars: int = 50,
+) -> Iterator[str]:
+    """split_text_by_meaning으로 나눈 문장을 목표 크기 창(window)에 채워 청크로 묶기
+
+    다음 청크는 앞 청크의 끝부분(overlap_chars자)으로 시작해서 문맥을 이어 갑니다.
+    문장 길이와 상관없이 겹침이 생기도록 문장 단위가 아닌 글자 단위로 이월합니다.
+
+    Args:
+        target_chars: 청크 하나의 최대 글자 수 (임베딩 단위)
+        overlap_chars: 다음 청크에 이어 붙일 앞 청크의 끝부분 최대 글자 수
+    """
+    window: List[str] = []
+    window_len = 0
+    has_new_sentence = False  # 창에 이월된 겹침 외의 새 문장이 있는지
+
+    def flush() -> str:
+        return " ".join(window)
+
+    for sentence in split_text_by_meaning(text):
+        if len(sentence) > target_chars:
+            # 현재 창을 먼저 내보내고 긴 문장은 따로 자름
+            if window and has_new_sentence:
+                yield flush()
+            window, window_len, has_new_sentence = [], 0, False
+            yield from _split_long_sentence(sentence, target_chars, overlap_chars)
+            continue
+
+        added_len = len(sentence) + (1 if window else 0)
+        if window and window_len + added_len > target_chars:
+            chunk = flush()
+            yield chunk
+            # 겹침: 앞 청크 끝부분을 새 문장과 합쳐 목표 크기를 넘지 않는 만큼만 이월
+            tail = _overlap_tail(chunk, min(overlap_chars, target_chars - len(sentence) - 1))
+            window = [tail] if tail else []
+            window_len = len(tail)
+            has_new_sentence = False
+            added_len = len(sentence) + (1 if window else 0)
+
+        window.append(sentence)
+        window_len += added_len
+        has_new_sentence = True
+
+    # 이월된 겹침만 남은 창은 이미 앞 청크에 포함되어 있으므로 내보내지 않음
+    if window and has_new_sentence:
+        yield flush()
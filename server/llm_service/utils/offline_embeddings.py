@@ -0,0 +1,46 @@
+"""
+오프라인 임베딩 (API 호출 없음)
+
+문자 n-gram을 해싱해서 고정 차원 벡터로 만드는 결정적(deterministic) 임베딩입니다.
+의미 이해 능력은 OpenAI 임베딩보다 떨어지지만, 같은 글자 조합을 공유하는 문장끼리
+가까워지므로 벤치마크/시뮬레이션에서 네트워크 지연과 비용 없이 검색 경로 전체를 돌려볼 수 있습니다.
+"""
+
+import hashlib
+import math
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+
+class HashingEmbeddings(Embeddings):
+    """문자 n-gram 해싱 기반 오프라인 임베딩 (LangChain Embeddings 호환)"""
+
+    def __init__(self, dimension: int = 256, ngram_range: tuple = (1, 3)):
+        self.dimension = dimension
+        self.ngram_range = ngram_range
+
+    def _bucket(self, token: str) -> int:
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "little") % self.dimension
+
+    def embed_text(self, text: str) -> List[float]:
+        """단일 텍스트를 L2 정규화된 벡터로 변환"""
+        vector = [0.0] * self.dimension
+        normalized = " ".join((text or "").lower().split())
+        min_n, max_n = self.ngram_range
+        for word in normalized.split(" "):
+            for n in range(min_n, max_n + 1):
+                for i in range(len(word) - n + 1):
+                    vector[self._bucket(word[i:i + n])] += 1.0
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            return vector
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_text(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_text(text)
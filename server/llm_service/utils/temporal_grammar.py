@@ -0,0 +1,289 @@
+"""
+한국어 시간 표현 문법 (규칙 기반 일정 추출)
+
+ScheduleParser가 LLM을 부르기 전에 먼저 쓰는 규칙 단계입니다.
+정규식은 모듈 로드 시 한 번만 컴파일하고, 메시지마다 다음 표현을 찾습니다.
+
+- 상대 날짜: 오늘, 내일, 모레, 내일모레, 글피
+- 요일: (이번주/다음주/다다음주) 월~일요일, 월욜
+- 주말: (이번/다음) 주말
+- 날짜: 3월 5일, 3/5, 2024-03-05, 15일
+- 시각: 오전/오후/아침/점심/낮/저녁/밤/새벽 + 6시, 6시 30분, 6시 반, 세 시, 18:30, 정오, 자정
+- 범위: 10시부터 12시까지, 10시~12시, 10~12시
+- 막연한 표현: 다음주, 저녁에, 이따, 나중에, 언제 (해석은 못 하지만 일정 가능성 있음)
+
+결과의 confidence는 규칙만으로 일정을 확정해도 되는 정도(0~1)입니다.
+시간 표현이 전혀 없으면 has_cue=False (일정 아님이 확실하므로 LLM 불필요).
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+WEEKDAYS = {"월": 0, "화": 1, "수": 2, "목": 3, "금": 4, "토": 5, "일": 6}
+
+RELATIVE_DAYS = {"오늘": 0, "금일": 0, "내일모레": 2, "내일": 1, "모레": 2, "글피": 3}
+
+NATIVE_HOURS = {
+    "한": 1, "두": 2, "세": 3, "네": 4, "다섯": 5, "여섯": 6,
+    "일곱": 7, "여덟": 8, "아홉": 9, "열": 10, "열한": 11, "열두": 12,
+}
+
+# 오후로 보정하는 시간대 / 오전으로 두는 시간대
+PM_PERIODS = {"오후", "저녁", "밤"}
+MIDDAY_PERIODS = {"점심", "낮"}
+
+_HOUR = r"(\d{1,2}|열한|열두|다섯|여섯|일곱|여덟|아홉|한|두|세|네|열)"
+_PERIOD = r"(오전|오후|아침|점심|낮|저녁|밤|새벽)"
+_WEEK = r"(이번\s*주|다다음\s*주|다음\s*주|담주)"
+
+RELATIVE_DAY_RE = re.compile(r"(내일모레|오늘|금일|내일|모레|글피)")
+WEEKDAY_RE = re.compile(_WEEK + r"?\s*([월화수목금토일])(?:요일|욜)")
+WEEKEND_RE = re.compile(r"(이번|다음|담)?\s*주말")
+MONTH_DAY_RE = re.compile(r"(?:(\d{4})\s*년\s*)?(\d{1,2})\s*월\s*(\d{1,2})\s*일")
+ISO_DATE_RE = re.compile(r"(?<!\d)(\d{4})[-.](\d{1,2})[-.](\d{1,2})(?!\d)")
+SLASH_DATE_RE = re.compile(r"(?<![\d/])(\d{1,2})/(\d{1,2})(?![\d/])")
+DAY_ONLY_RE = re.compile(r"(?<![\d월])(\d{1,2})\s*일(?=에|날|\s|$)(?!\s*(?:동안|간|째))")
+
+TIME_RE = re.compile(
+    _PERIOD + r"?\s*" + _HOUR + r"\s*시(?!간|적|작|키|켜)\s*(?:(\d{1,2})\s*분|(반))?"
+)
+CLOCK_RE = re.compile(_PERIOD + r"?\s*(?<![\d:])(\d{1,2}):(\d{2})(?![\d:])")
+NOON_RE = re.compile(r"(정오|자정)")
+SHORT_RANGE_RE = re.compile(_PERIOD + r"?\s*(\d{1,2})\s*[~\-]\s*(\d{1,2})\s*시(?!간)")
+RANGE_JOINER_RE = re.compile(r"^\s*(?:부터|에서|~|-)\s*$")
+
+# 시각 없이 시간대만 있는 표현 ("내일 저녁에") → 시간대의 대표 시각으로 추정
+PERIOD_ONLY_RE = re.compile(_PERIOD + r"\s*(?:에|쯤|즈음)")
+PERIOD_DEFAULT_HOURS = {
+    "새벽": 6, "아침": 9, "오전": 10, "점심": 12, "낮": 13, "오후": 14, "저녁": 18, "밤": 20,
+}
+# 날짜/시각으로 해석할 수 없는 막연한 표현 → 규칙으로 확정할 수 없음
+VAGUE_RE = re.compile(
+    r"(다음\s*주|담주|다음\s*달|이번\s*달|이따|나중에|다음에|조만간|언제|며칠|몇\s*시(?!간))"
+)
+
+
+def _to_hour(token: str) -> int:
+    return int(token) if token.isdigit() else NATIVE_HOURS[token]
+
+
+def _apply_period(hour: int, period: Optional[str]) -> Tuple[int, bool]:
+    """
+    시간대를 반영한 24시간제 시각과, 오전/오후가 불분명했는지 여부
+
+    "밤 12시"는 0시를 돌려주며, 그날 밤이 끝나는 자정이므로 호출한 쪽에서 다음 날로 넘깁니다.
+    """
+    if period in PM_PERIODS:
+        if hour < 12:
+            hour += 12
+        elif period == "밤" and hour == 12:
+            hour = 0
+        return hour, False
+    if period in MIDDAY_PERIODS:
+        return (hour + 12 if hour <= 6 else hour), False
+    if period:  # 오전 / 아침 / 새벽
+        return (0 if hour == 12 else hour), False
+    if hour >= 13:
+        return hour, False
+    # 시간대가 없으면 1~7시는 오후로 간주 (육아 모임은 대개 낮/저녁), 8~12시는 그대로
+    if 1 <= hour <= 7:
+        return hour + 12, True
+    return hour, hour == 0
+
+
+def _is_end_of_day(hour: int, period: Optional[str]) -> bool:
+    """"밤 12시"처럼 그날이 끝나는 자정인지 (날짜를 다음 날로 넘겨야 함)"""
+    return period == "밤" and hour == 0
+
+
+def _hour_after(start_hour: int, hour: int) -> int:
+    """
+    12시간제 시각(hour)을 시작 시각 뒤에 오는 가장 가까운 24시간제 시각으로
+
+    "오후 2시부터 4시까지" → 16시, "밤 11시~1시" → 1시(다음 날), "10~2시" → 14시
+    """
+    candidates = {hour % 12, hour % 12 + 12}
+    return min(candidates, key=lambda h: (h - start_hour) % 24 or 24)
+
+
+def _find_times(message: str) -> List[Dict[str, Any]]:
+    """메시지 안의 시각 표현 (등장 순서대로)"""
+    found = []
+    for match in TIME_RE.finditer(message):
+        hour = _to_hour(match.group(2))
+        if hour > 24:
+            continue
+        minute = 30 if match.group(4) else int(match.group(3) or 0)
+        period = match.group(1)
+        hour, ambiguous = _apply_period(hour % 24, period)
+        found.append({"start": match.start(), "end": match.end(), "hour": hour,
+                      "minute": min(minute, 59), "ambiguous": ambiguous, "period": period,
+                      "next_day": _is_end_of_day(hour, period)})
+    for match in CLOCK_RE.finditer(message):
+        hour, minute = int(match.group(2)), int(match.group(3))
+        if hour > 23 or minute > 59:
+            continue
+        period = match.group(1)
+        hour, ambiguous = _apply_period(hour, period)
+        found.append({"start": match.start(), "end": match.end(), "hour": hour,
+                      "minute": minute, "ambiguous": ambiguous, "period": period,
+                      "next_day": _is_end_of_day(hour, period) and minute == 0})
+    for match in NOON_RE.finditer(message):
+        midnight = match.group(1) == "자정"
+        found.append({"start": match.start(), "end": match.end(),
+                      "hour": 0 if midnight else 12,
+                      "minute": 0, "ambiguous": False, "period": None, "next_day": midnight})
+    return sorted(found, key=lambda t: t["start"])
+
+
+def _find_range(message: str, times: List[Dict[str, Any]]):
+    """시작/종료 시각 쌍 (없으면 None)"""
+    match = SHORT_RANGE_RE.search(message)
+    if match:
+        period = match.group(1)
+        start_hour, start_amb = _apply_period(int(match.group(2)) % 24, period)
+        raw_end = int(match.group(3)) % 24
+        # 종료 시각은 시작 시각 뒤로 ("10~2시" → 14시, "밤 11~1시" → 다음 날 1시)
+        end_hour = _hour_after(start_hour, raw_end) if raw_end <= 12 else raw_end
+        return (
+            {"hour": start_hour, "minute": 0, "ambiguous": start_amb,
+             "next_day": _is_end_of_day(start_hour, period)},
+            {"hour": end_hour, "minute": 0, "ambiguous": start_amb, "next_day": False},
+        )
+    for first, second in zip(times, times[1:]):
+        if RANGE_JOINER_RE.match(message[first["end"]:second["start"]]):
+            if not second["period"] and (second["ambiguous"] or second["hour"] <= 12):
+                # 시간대 없는 종료 시각은 시작 시각 뒤로 ("오후 2시부터 4시까지" → 16시)
+                hour = _hour_after(first["hour"], second["hour"])
+                second = {**second, "hour": hour, "ambiguous": first["ambiguous"], "next_day": False}
+            return first, second
+    return None
+
+
+def _find_dates(message: str, now: datetime) -> Tuple[List[datetime], int]:
+    """메시지 안의 날짜 표현 (자정 기준 datetime)과, 날짜 형식이지만 존재하지 않는 날짜 수"""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = []
+
+    for match in RELATIVE_DAY_RE.finditer(message):
+        dates.append(today + timedelta(days=RELATIVE_DAYS[match.group(1)]))
+
+    for match in WEEKDAY_RE.finditer(message):
+        week, weekday = match.group(1), WEEKDAYS[match.group(2)]
+        monday = today - timedelta(days=today.weekday())
+        if week is None:
+            # 가장 가까운 해당 요일 (오늘 포함)
+            dates.append(today + timedelta(days=(weekday - today.weekday()) % 7))
+            continue
+        week = re.sub(r"\s", "", week)
+        offset = {"이번주": 0, "다음주": 1, "담주": 1, "다다음주": 2}[week]
+        dates.append(monday + timedelta(weeks=offset, days=weekday))
+
+    for match in WEEKEND_RE.finditer(message):
+        days = (5 - today.weekday()) % 7
+        if match.group(1) in ("다음", "담"):
+            days += 7
+        dates.append(today + timedelta(days=days))
+
+    for match in MONTH_DAY_RE.finditer(message):
+        year = int(match.group(1)) if match.group(1) else today.year
+        dates.append(_safe_date(year, int(match.group(2)), int(match.group(3)), today, roll=not match.group(1)))
+    for match in ISO_DATE_RE.finditer(message):
+        dates.append(_safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)), today))
+    for match in SLASH_DATE_RE.finditer(message):
+        dates.append(_safe_date(today.year, int(match.group(1)), int(match.group(2)), today, roll=True))
+    if not dates:
+        for match in DAY_ONLY_RE.finditer(message):
+            day = int(match.group(1))
+            month, year = today.month, today.year
+            if day < today.day:  # 이미 지난 날이면 다음 달
+                month, year = (1, year + 1) if month == 12 else (month + 1, year)
+            dates.append(_safe_date(year, month, day, today))
+
+    return [d for d in dates if d is not None], sum(1 for d in dates if d is None)
+
+
+def _safe_date(year: int, month: int, day: int, today: datetime, roll: bool = False) -> Optional[datetime]:
+    """존재하지 않는 날짜는 None, roll=True면 이미 지난 날짜를 내년으로"""
+    try:
+        date = datetime(year, month, day)
+    except ValueError:
+        return None
+    if roll and date < today - timedelta(days=1):
+        date = date.replace(year=year + 1)
+    return date
+
+
+def parse_temporal(message: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    메시지의 시간 표현 해석
+
+    Returns:
+        {
+            "has_cue": True,                  # 시간 관련 표현이 하나라도 있는지
+            "time": "2024-01-06T18:00:00",    # 시작 시각 (없으면 None)
+            "end_time": "2024-01-06T20:00:00" # 범위 종료 시각 (없으면 None)
+            "confidence": 0.95                # 규칙 결과를 그대로 써도 되는 정도
+        }
+    """
+    now = now or datetime.now()
+    dates, invalid_dates = _find_dates(message, now)
+    times = _find_times(message)
+    period_only = PERIOD_ONLY_RE.search(message)
+
+    if not dates and not times:
+        vague = invalid_dates > 0 or period_only is not None or VAGUE_RE.search(message) is not None
+        return {
+            "has_cue": vague,
+            "time": None,
+            "end_time": None,
+            "confidence": 0.4 if vague else 1.0,
+        }
+
+    time_range = _find_range(message, times)
+    start = time_range[0] if time_range else (times[0] if times else None)
+    end = time_range[1] if time_range else None
+
+    confidence = 0.95
+    if dates:
+        date = dates[0]
+        if len({d.date() for d in dates}) > 1:
+            confidence -= 0.35  # 서로 다른 날짜가 여러 개 (예: "내일 말고 모레")
+    else:
+        # 날짜 없이 시각만 있으면 오늘, 이미 지났으면 내일로 간주
+        date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if not start.get("next_day") and (start["hour"], start["minute"]) < (now.hour, now.minute):
+            date += timedelta(days=1)
+        confidence -= 0.15
+
+    if start is None and period_only:
+        # "내일 저녁에"처럼 시각 없이 시간대만 있음
+        start = {"hour": PERIOD_DEFAULT_HOURS[period_only.group(1)], "minute": 0, "ambiguous": False}
+        confidence -= 0.3
+    elif start is None:
+        start = {"hour": 10, "minute": 0, "ambiguous": False}  # 날짜만 있으면 오전 10시
+        confidence -= 0.1
+    elif start["ambiguous"]:
+        confidence -= 0.2
+    if len(times) > (2 if time_range else 1):
+        confidence -= 0.2  # 범위가 아닌 시각이 여러 개
+    if invalid_dates:
+        # 날짜를 적었지만 존재하지 않는 날짜 (예: 2월 30일) → 규칙 결과로 확정하지 않음
+        confidence = min(confidence, 0.3)
+
+    start_at = date.replace(hour=start["hour"], minute=start["minute"])
+    if start.get("next_day"):
+        start_at += timedelta(days=1)  # "오늘 밤 12시" / "자정" → 그날이 끝나는 자정
+    end_at = None
+    if end is not None:
+        end_at = date.replace(hour=end["hour"], minute=end["minute"])
+        if end_at <= start_at:
+            end_at += timedelta(days=1)
+
+    return {
+        "has_cue": True,
+        "time": start_at.strftime("%Y-%m-%dT%H:%M:00"),
+        "end_time": end_at.strftime("%Y-%m-%dT%H:%M:00") if end_at else None,
+        "confidence": round(max(confidence, 0.0), 2),
+    }
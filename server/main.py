@@ -26,12 +26,17 @@ except Exception as e:
 # LLM Service 라우터들
 try:
     from llm_service.routers.chat import router as chat_router
+    from llm_service.routers.chat import cache_warmer
     from llm_service.routers.schedule import router as schedule_router
     from llm_service.routers.location_community import (
         router as location_community_router,
     )
     from llm_service.routers.group_purchase import router as group_purchase_router
     from llm_service.routers.feedback import router as feedback_router
+    from llm_service.services.retrieval_engine import retrieval_engine
+    from llm_service.services.llm_gateway import llm_gateway
+    from llm_service.services.cache_service import cache_service
+    from llm_service.services.embedding_batcher import EmbeddingBatcher, bind_event_loop
 
     print("✅ LLM Service 라우터들 import 성공")
 except Exception as e:
@@ -130,6 +135,40 @@ async def health_check():
     }
 
 
+@app.get("/health/retrieval")
+async def retrieval_health():
+    """공용 검색 엔진 인스턴스/메모리 리포트 (중복 VectorService 감지)"""
+    return retrieval_engine.report()
+
+
+@app.get("/health/llm")
+async def llm_health():
+    """공용 LLM 게이트웨이 동시 호출 수 / 호출 위치별 지연시간 지표"""
+    return llm_gateway.get_metrics()
+
+
+@app.get("/health/embeddings")
+async def embedding_health():
+    """모델별 임베딩 마이크로 배치 지표 (요청 수 / API 호출 수 / 호출당 요청 수)"""
+    return {"batchers": EmbeddingBatcher.all_stats()}
+
+
+@app.on_event("startup")
+async def startup_event():
+    bind_event_loop()  # executor 스레드의 검색 질의 임베딩을 이 루프의 배치로 모음
+    retrieval_engine.startup()
+    cache_service.start_evictor()
+    cache_warmer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await cache_warmer.stop()
+    await cache_service.stop_evictor()
+    retrieval_engine.shutdown()
+    await llm_gateway.close()
+
+
 @app.get("/debug")
 async def debug_info():
     return {